@@ -11,13 +11,37 @@ Versão: 3.0 - Premium Edition (Mobile Ready) - Fixed Overflow
 """
 
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import numpy as np
+import streamlit.components.v1 as components
+from streamlit.logger import get_logger
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import os
-from pathlib import Path
+import json
+import hashlib
+import threading
+import uuid
+
+from predictfy import assets, busca, cubo, dados, memoria, snapshot, telemetria
+from predictfy.cache_colunar import NOME_PASTA_CACHE
+from predictfy.cache_dados import MAX_ITENS as MAX_ITENS_DADOS, CacheDados
+from predictfy.cache_figuras import CacheFiguras, CacheFragmentos
+from predictfy.config import (
+    ARQUIVO_CLIENTES,
+    ARQUIVO_CLUSTERS,
+    ARQUIVO_QUANTIS,
+    ARQUIVO_RECOMENDACOES,
+)
+from predictfy.datasets import RegistroDatasets
+from predictfy.drilldown import TAMANHO_PAGINA, IndiceClusters
+from predictfy.filtros import FAIXAS_RECENCIA, TIPOS_FILTRO, IndiceFiltros, clusters_do_snapshot, snapshot_filtrado
+from predictfy.formatacao import formatar_numero
+from predictfy.graficos import barras_horizontais, gerar_paleta
+from predictfy.importacao import TEMPOS_TARDIOS, tardio
+
+# Só importado quando um gráfico sai do cache de figuras (raro depois do primeiro)
+px = tardio('plotly.express')
+
+# Logs do pacote `predictfy` (tempos de carga, etc.) saem no log do Streamlit
+get_logger('predictfy')
 
 # ============================================================================
 # CONFIGURAÇÃO DA PÁGINA
@@ -30,691 +54,33 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+# Tempo, figuras e bytes do rerun e de cada seção (histogramas em predictfy.telemetria)
+medicao_rerun = telemetria.Secao('rerun', raiz=True).iniciar()
+secoes = telemetria.SecoesEmSequencia()
+# Sessões ativas (contabilidade de memória) = sessões com rerun recente
+memoria.marcar_sessao(st.session_state.setdefault('id_sessao', uuid.uuid4().hex))
+
 # ============================================================================
 # TEMA FIXO - DARKER
 # ============================================================================
 
-tema_atual = {
-    'bg': 'linear-gradient(135deg, #050510 0%, #0a0a15 25%, #0f0f1f 50%, #0a0a15 75%, #050510 100%)',
-    'accent1': '#0891b2',
-    'accent2': '#2563eb',
-    'accent3': '#7c3aed',
-    'glow': 'rgba(37, 99, 235, 0.5)'
-}
+tema_atual = assets.TEMA
 
 # ============================================================================
 # ESTILOS CSS ULTRA MODERNOS
 # ============================================================================
 
-st.markdown(f"""
-    <style>
-    /* IMPORTAR FONTE MODERNA */
-    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700;900&display=swap');
-    
-    * {{
-        font-family: 'Inter', sans-serif !important;
-    }}
-    
-    /* === PARTÍCULAS ANIMADAS === */
-    @keyframes float {{
-        0%, 100% {{ transform: translateY(0px) translateX(0px); opacity: 0.3; }}
-        25% {{ transform: translateY(-20px) translateX(10px); opacity: 0.5; }}
-        50% {{ transform: translateY(-40px) translateX(-10px); opacity: 0.7; }}
-        75% {{ transform: translateY(-20px) translateX(5px); opacity: 0.5; }}
-    }}
-    
-    .particle {{
-        position: fixed;
-        width: 3px;
-        height: 3px;
-        background: {tema_atual['accent1']};
-        border-radius: 50%;
-        pointer-events: none;
-        z-index: 1;
-        animation: float 15s infinite ease-in-out;
-        box-shadow: 0 0 10px {tema_atual['accent1']};
-    }}
-    
-    .particle:nth-child(2) {{ left: 20%; top: 20%; animation-delay: 2s; animation-duration: 18s; }}
-    .particle:nth-child(3) {{ left: 40%; top: 60%; animation-delay: 4s; animation-duration: 20s; }}
-    .particle:nth-child(4) {{ left: 60%; top: 30%; animation-delay: 1s; animation-duration: 16s; }}
-    .particle:nth-child(5) {{ left: 80%; top: 70%; animation-delay: 3s; animation-duration: 22s; }}
-    .particle:nth-child(6) {{ left: 15%; top: 80%; animation-delay: 5s; animation-duration: 19s; }}
-    .particle:nth-child(7) {{ left: 70%; top: 15%; animation-delay: 2.5s; animation-duration: 17s; }}
-    .particle:nth-child(8) {{ left: 35%; top: 45%; animation-delay: 4.5s; animation-duration: 21s; }}
-    
-    /* FUNDO ANIMADO */
-    @keyframes animated-gradient {{
-      0% {{ background-position: 0% 50%; }}
-      50% {{ background-position: 100% 50%; }}
-      100% {{ background-position: 0% 50%; }}
-    }}
-    
-    [data-testid="stAppViewContainer"] {{
-        background: {tema_atual['bg']};
-        background-size: 300% 300%;
-        animation: animated-gradient 25s ease infinite;
-        min-height: 100vh;
-        overflow-y: visible !important;
-    }}
-    
-    [data-testid="stHeader"] {{
-        background: transparent;
-    }}
-    
-    html, body {{
-        overflow-y: auto !important;
-        height: auto !important;
-    }}
-    
-    /* REMOVER PADDING PADRÃO */
-    .block-container {{
-        padding-top: 3rem;
-        padding-bottom: 2rem;
-        padding-left: 2rem;
-        padding-right: 2rem;
-        max-width: 100%;
-    }}
-    
-    h1 {{
-        color: #fafafa;
-        font-weight: 900;
-        font-size: 3rem !important;
-        letter-spacing: -1px;
-        margin-bottom: 0.5rem;
-        text-align: center;
-    }}
-    
-    h2 {{
-        color: #e0e0e0;
-        font-weight: 700;
-        font-size: 1.5rem !important;
-        margin-top: 2rem;
-        margin-bottom: 1rem;
-        display: flex;
-        align-items: center;
-        gap: 10px;
-        flex-wrap: wrap;
-    }}
-    
-    h3 {{
-        color: #fafafa;
-        font-weight: 600;
-        font-size: 1.1rem !important;
-        margin-bottom: 1rem;
-    }}
-    
-    /* === EFEITO 3D NOS CARDS === */
-    .bento-card {{
-        background: rgba(255, 255, 255, 0.05);
-        backdrop-filter: blur(20px);
-        border: 1px solid rgba(255, 255, 255, 0.1);
-        border-radius: 20px;
-        padding: 24px;
-        box-shadow: 0 8px 32px 0 rgba(31, 38, 135, 0.37);
-        transition: all 0.4s cubic-bezier(0.25, 0.8, 0.25, 1);
-        margin-bottom: 20px;
-        position: relative;
-        z-index: 1;
-        isolation: isolate;
-    }}
-    
-    .bento-card:hover {{
-        transform: translateY(-5px);
-        box-shadow: 0 15px 40px 0 {tema_atual['glow']};
-        border: 1px solid {tema_atual['accent2']};
-        z-index: 10;
-    }}
-    
-    /* METRIC CARDS */
-    .metric-card {{
-        background: linear-gradient(135deg, rgba(8, 145, 178, 0.1) 0%, rgba(37, 99, 235, 0.1) 50%, rgba(124, 58, 237, 0.1) 100%);
-        border: 2px solid transparent;
-        border-image: linear-gradient(135deg, {tema_atual['accent1']}, {tema_atual['accent2']}, {tema_atual['accent3']}) 1;
-        border-radius: 16px;
-        padding: 24px;
-        text-align: center;
-        transition: all 0.4s cubic-bezier(0.25, 0.8, 0.25, 1);
-        margin-bottom: 15px;
-        position: relative;
-        z-index: 1;
-    }}
-
-    .metric-card:hover {{
-        transform: translateY(-5px) scale(1.02);
-        box-shadow: 0 0 30px {tema_atual['glow']};
-        z-index: 10;
-    }}
-
-    .stPlotlyChart {{
-        background: rgba(255, 255, 255, 0.05);
-        backdrop-filter: blur(20px);
-        border: 1px solid rgba(255, 255, 255, 0.1);
-        border-radius: 20px;
-        padding: 16px;
-        box-shadow: 0 8px 32px 0 rgba(31, 38, 135, 0.37);
-        transition: all 0.4s cubic-bezier(0.25, 0.8, 0.25, 1);
-        margin-bottom: 20px;
-        position: relative;
-        z-index: 1;
-        isolation: isolate;
-    }}
-
-    .stPlotlyChart:hover {{
-        transform: translateY(-5px);
-        box-shadow: 0 15px 40px 0 {tema_atual['glow']};
-        border: 1px solid {tema_atual['accent2']};
-        z-index: 10;
-    }}
-    
-    /* === ANIMAÇÃO DE ENTRADA === */
-    @keyframes fadeInUp {{
-        from {{
-            opacity: 0;
-            transform: translateY(30px);
-        }}
-        to {{
-            opacity: 1;
-            transform: translateY(0);
-        }}
-    }}
-    
-    .fade-in {{
-        animation: fadeInUp 0.8s ease-out forwards;
-    }}
-    
-    .metric-value {{
-        font-size: 2.5rem;
-        font-weight: 900;
-        background: linear-gradient(90deg, {tema_atual['accent1']} 0%, {tema_atual['accent2']} 50%, {tema_atual['accent3']} 100%);
-        -webkit-background-clip: text;
-        background-clip: text;
-        -webkit-text-fill-color: transparent;
-        color: transparent;
-        margin: 0;
-        line-height: 1.2;
-        display: inline-block;
-    }}
-    
-    .metric-label {{
-        font-size: 0.85rem;
-        color: #a0a0a0;
-        text-transform: uppercase;
-        letter-spacing: 2px;
-        margin-top: 8px;
-        font-weight: 600;
-    }}
-    
-    .metric-delta {{
-        font-size: 0.8rem;
-        color: {tema_atual['accent1']};
-        margin-top: 4px;
-        font-weight: 600;
-    }}
-    
-    /* === TOOLTIPS INFORMATIVOS === */
-    .tooltip-icon {{
-        display: inline-block;
-        width: 20px;
-        height: 20px;
-        background: rgba(255, 255, 255, 0.1);
-        border-radius: 50%;
-        text-align: center;
-        line-height: 20px;
-        font-size: 12px;
-        cursor: help;
-        margin-left: 8px;
-        transition: all 0.3s ease;
-    }}
-    
-    .tooltip-icon:hover {{
-        background: {tema_atual['accent2']};
-        transform: scale(1.2);
-    }}
-    
-    .tooltip-icon::after {{
-        content: 'ℹ️';
-        font-size: 10px;
-    }}
-    
-    /* BADGES COLORIDOS */
-    .badge {{
-        display: inline-block;
-        padding: 6px 14px;
-        border-radius: 20px;
-        font-size: 0.75rem;
-        font-weight: 700;
-        letter-spacing: 0.5px;
-        margin: 4px;
-    }}
-    
-    .badge-cyan {{
-        background: linear-gradient(135deg, {tema_atual['accent1']} 0%, #0891b2 100%);
-        color: white;
-        box-shadow: 0 4px 15px {tema_atual['glow']};
-    }}
-    
-    .badge-blue {{
-        background: linear-gradient(135deg, {tema_atual['accent2']} 0%, #2563eb 100%);
-        color: white;
-        box-shadow: 0 4px 15px {tema_atual['glow']};
-    }}
-    
-    .badge-purple {{
-        background: linear-gradient(135deg, {tema_atual['accent3']} 0%, #7c3aed 100%);
-        color: white;
-        box-shadow: 0 4px 15px rgba(124, 58, 237, 0.4);
-    }}
-    
-    .badge-orange {{
-        background: linear-gradient(135deg, #f59e0b 0%, #d97706 100%);
-        color: white;
-        box-shadow: 0 4px 15px rgba(245, 158, 11, 0.4);
-    }}
-    
-    .badge-red {{
-        background: linear-gradient(135deg, #ef4444 0%, #dc2626 100%);
-        color: white;
-        box-shadow: 0 4px 15px rgba(239, 68, 68, 0.4);
-    }}
-    
-    /* ALERT BOX */
-    .alert-box {{
-        background: linear-gradient(135deg, rgba(245, 158, 11, 0.15) 0%, rgba(251, 146, 60, 0.15) 100%);
-        border-left: 4px solid #f59e0b;
-        border-radius: 12px;
-        padding: 16px 20px;
-        margin: 20px 0;
-        color: #fbbf24;
-    }}
-    
-    .alert-box strong {{
-        color: #f59e0b;
-    }}
-    
-    /* INSIGHT CARDS */
-    .insight-card {{
-        background: rgba(255, 255, 255, 0.03);
-        border-radius: 16px;
-        padding: 20px;
-        border-left: 4px solid;
-        transition: all 0.3s ease;
-        margin-bottom: 12px;
-    }}
-    
-    .insight-card:hover {{
-        background: rgba(255, 255, 255, 0.05);
-        transform: translateX(5px);
-    }}
-    
-    .insight-card h3 {{
-        margin-top: 0;
-        margin-bottom: 12px;
-    }}
-    
-    /* === MINI DASHBOARD COMPARATIVO (SEMPRE ABERTO) === */
-    .comparison-mini {{
-        background: rgba(255, 255, 255, 0.03);
-        border-radius: 16px;
-        padding: 20px;
-        margin: 20px 0;
-        border: 1px solid rgba(255, 255, 255, 0.1);
-    }}
-    
-    .comparison-header {{
-        font-weight: 700;
-        color: {tema_atual['accent2']};
-        font-size: 1.1rem;
-        margin-bottom: 20px;
-    }}
-    
-    .comparison-grid {{
-        display: grid;
-        grid-template-columns: 1fr 1fr;
-        gap: 20px;
-    }}
-    
-    /* REMOVER ELEMENTOS DESNECESSÁRIOS */
-    #MainMenu {{visibility: hidden;}}
-    footer {{visibility: hidden;}}
-    header {{visibility: hidden;}}
-    
-    /* ANIMAÇÃO PULSE */
-    @keyframes pulse {{
-        0%, 100% {{ opacity: 1; }}
-        50% {{ opacity: 0.85; }}
-    }}
-    
-    .pulse {{
-        animation: pulse 2.5s cubic-bezier(0.4, 0, 0.6, 1) infinite;
-    }}
-    
-    /* SCROLLBAR ESTILIZADA */
-    ::-webkit-scrollbar {{
-        width: 8px;
-        height: 8px;
-    }}
-    
-    ::-webkit-scrollbar-track {{
-        background: rgba(255, 255, 255, 0.05);
-    }}
-    
-    ::-webkit-scrollbar-thumb {{
-        background: linear-gradient(135deg, {tema_atual['accent1']}, {tema_atual['accent2']}, {tema_atual['accent3']});
-        border-radius: 10px;
-    }}
-    
-    ::-webkit-scrollbar-thumb:hover {{
-        background: linear-gradient(135deg, #0891b2, #2563eb, #7c3aed);
-    }}
-    
-    /* ===================================================================== */
-    /* 📱 RESPONSIVIDADE MOBILE/TABLET */
-    /* ===================================================================== */
-    
-    /* TABLETS E TELAS MÉDIAS (< 1024px) */
-    @media screen and (max-width: 1024px) {{
-        .block-container {{
-            padding-left: 1.5rem;
-            padding-right: 1.5rem;
-            padding-top: 2rem;
-        }}
-        
-        h1 {{
-            font-size: 2.2rem !important;
-        }}
-        
-        h2 {{
-            font-size: 1.3rem !important;
-        }}
-        
-        h3 {{
-            font-size: 1rem !important;
-        }}
-        
-        .metric-card {{
-            padding: 18px;
-        }}
-        
-        .metric-value {{
-            font-size: 2rem;
-        }}
-        
-        .metric-label {{
-            font-size: 0.75rem;
-            letter-spacing: 1.5px;
-        }}
-        
-        .bento-card {{
-            padding: 18px;
-        }}
-        
-        .stPlotlyChart {{
-            padding: 14px;
-        }}
-        
-        .comparison-header {{
-            font-size: 1rem;
-        }}
-    }}
-    
-    /* MOBILE E TELAS PEQUENAS (< 768px) */
-    @media screen and (max-width: 768px) {{
-        .block-container {{
-            padding: 1.5rem 1rem;
-        }}
-        
-        h1 {{
-            font-size: 1.8rem !important;
-            letter-spacing: -0.5px;
-            line-height: 1.2;
-        }}
-        
-        h2 {{
-            font-size: 1.1rem !important;
-            margin-top: 1.5rem;
-        }}
-        
-        h3 {{
-            font-size: 0.95rem !important;
-        }}
-        
-        /* Cards menores e empilhados */
-        .metric-card {{
-            padding: 16px 12px;
-            margin-bottom: 12px;
-        }}
-        
-        .metric-value {{
-            font-size: 1.8rem;
-        }}
-        
-        .metric-label {{
-            font-size: 0.7rem;
-            letter-spacing: 1px;
-        }}
-        
-        .metric-delta {{
-            font-size: 0.7rem;
-        }}
-        
-        .bento-card {{
-            padding: 16px;
-            margin-bottom: 15px;
-        }}
-        
-        .stPlotlyChart {{
-            padding: 12px;
-            margin-bottom: 15px;
-        }}
-        
-        /* Grid responsivo - empilha em 1 coluna */
-        .comparison-grid {{
-            grid-template-columns: 1fr !important;
-            gap: 15px;
-        }}
-        
-        .comparison-mini {{
-            padding: 15px;
-        }}
-        
-        .comparison-header {{
-            font-size: 0.95rem;
-            margin-bottom: 15px;
-        }}
-        
-        /* Badges menores */
-        .badge {{
-            font-size: 0.65rem;
-            padding: 5px 10px;
-            margin: 3px;
-        }}
-        
-        /* Alert box responsivo */
-        .alert-box {{
-            padding: 12px 16px;
-            font-size: 0.85rem;
-            margin: 15px 0;
-        }}
-        
-        /* Insight cards */
-        .insight-card {{
-            padding: 16px;
-            margin-bottom: 10px;
-        }}
-        
-        .insight-card h3 {{
-            font-size: 0.9rem !important;
-        }}
-        
-        .insight-card p {{
-            font-size: 0.85rem;
-            line-height: 1.5;
-        }}
-        
-        /* Desabilitar efeitos 3D no mobile (performance) */
-        .bento-card:hover,
-        .metric-card:hover,
-        .stPlotlyChart:hover {{
-            transform: none;
-        }}
-        
-        /* Partículas desabilitadas no mobile (performance) */
-        .particle {{
-            display: none;
-        }}
-        
-        /* Texto do subtítulo menor */
-        p {{
-            font-size: 0.85rem;
-        }}
-    }}
-    
-    /* MOBILE MUITO PEQUENO (< 480px) */
-    @media screen and (max-width: 480px) {{
-        .block-container {{
-            padding: 1rem 0.75rem;
-        }}
-        
-        h1 {{
-            font-size: 1.5rem !important;
-            margin-bottom: 0.3rem;
-        }}
-        
-        h2 {{
-            font-size: 1rem !important;
-            margin-top: 1rem;
-        }}
-        
-        h3 {{
-            font-size: 0.85rem !important;
-        }}
-        
-        .metric-card {{
-            padding: 12px 10px;
-        }}
-        
-        .metric-value {{
-            font-size: 1.5rem;
-        }}
-        
-        .metric-label {{
-            font-size: 0.65rem;
-            letter-spacing: 0.5px;
-        }}
-        
-        .bento-card {{
-            padding: 12px;
-        }}
-        
-        .stPlotlyChart {{
-            padding: 10px;
-        }}
-        
-        .comparison-mini {{
-            padding: 12px;
-        }}
-        
-        .comparison-header {{
-            font-size: 0.85rem;
-        }}
-        
-        .badge {{
-            font-size: 0.6rem;
-            padding: 4px 8px;
-        }}
-        
-        .alert-box {{
-            font-size: 0.8rem;
-            padding: 10px 12px;
-        }}
-        
-        .insight-card {{
-            padding: 12px;
-        }}
-        
-        .tooltip-icon {{
-            width: 16px;
-            height: 16px;
-            font-size: 10px;
-        }}
-    }}
-    
-    /* LANDSCAPE MOBILE (altura < 500px) */
-    @media screen and (max-height: 500px) {{
-        h1 {{
-            font-size: 1.3rem !important;
-        }}
-        
-        .metric-card {{
-            padding: 10px;
-        }}
-        
-        .metric-value {{
-            font-size: 1.3rem;
-        }}
-    }}
-    
-    /* ISOLAMENTO DE COLUNAS */
-    [data-testid="column"] {{
-        position: relative;
-        z-index: 1;
-        isolation: isolate;
-        contain: layout style paint;
-        margin: 0 4px;
-    }}
-    
-    [data-testid="column"]:hover {{
-        z-index: 10;
-    }}
-    
-    /* FORÇAR BORDER RADIUS E CONTENÇÃO NOS GRÁFICOS INTERNOS */
-    [data-testid="stPlotlyChart"] > div {{
-        border-radius: 16px !important;
-        overflow: hidden !important;
-        max-width: 100%;
-    }}
-    
-    /* GARANTIR QUE OS GRÁFICOS FIQUEM CONTIDOS */
-    [data-testid="column"] > div {{
-        isolation: isolate;
-        max-width: 100%;
-    }}
-    
-    /* CONTER ELEMENTOS DENTRO DAS COLUNAS */
-    .js-plotly-plot {{
-        max-width: 100% !important;
-    }}
-    
-    </style>
-    
-    <!-- PARTÍCULAS ANIMADAS -->
-    <div class="particle"></div>
-    <div class="particle"></div>
-    <div class="particle"></div>
-    <div class="particle"></div>
-    <div class="particle"></div>
-    <div class="particle"></div>
-    <div class="particle"></div>
-    <div class="particle"></div>
-    
-    <!-- JAVASCRIPT PARA ANIMAÇÃO DE ENTRADA -->
-    <script>
-        const observer = new IntersectionObserver((entries) => {{
-            entries.forEach(entry => {{
-                if (entry.isIntersecting) {{
-                    entry.target.classList.add('fade-in');
-                }}
-            }});
-        }}, {{ threshold: 0.1 }});
-        
-        setTimeout(() => {{
-            document.querySelectorAll('.metric-card, .bento-card, .stPlotlyChart').forEach(el => {{
-                observer.observe(el);
-            }});
-        }}, 100);
-    </script>
-""", unsafe_allow_html=True)
+# Com o build (python -m predictfy.assets), CSS e JS vêm de static/ e são
+# injetados uma vez por aba; sem ele, o CSS minificado vai inline.
+manifesto_assets = assets.ler_manifesto() if st.get_option('server.enableStaticServing') else None
+if manifesto_assets:
+    components.html(assets.html_carregador(manifesto_assets), height=0)
+    estilo = assets.CSS_CRITICO
+else:
+    estilo = assets.css_inline()
+
+# PARTÍCULAS ANIMADAS
+st.markdown(f"<style>{estilo}</style>" + '<div class="particle"></div>' * 8, unsafe_allow_html=True)
 
 # ============================================================================
 # FUNÇÕES DE CARREGAMENTO DE DADOS
@@ -733,64 +99,95 @@ while not os.path.exists(os.path.join(project_root, '.gitignore')):
         break
 
 PASTA_GRAFICOS = os.path.join(project_root, 'Desafios', 'data', 'bi') + '/'
-CSV = os.path.join(project_root, 'Desafios', 'data', 'csv') + '/'
+# PREDICTFY_CSV aponta a dashboard para outra pasta de dados (benchmarks, testes de carga)
+CSV = os.path.join(os.environ.get('PREDICTFY_CSV') or os.path.join(project_root, 'Desafios', 'data', 'csv'), '')
+# Histogramas por seção no formato do Prometheus (textfile collector / predictfy.telemetria)
+ARQUIVO_METRICAS = os.environ.get('PREDICTFY_METRICAS') or os.path.join(CSV, NOME_PASTA_CACHE, 'metricas.prom')
+# Cubo dia × cluster × tipo das compras, relativo à pasta de dados (vigiado como os CSVs)
+ARQUIVO_CUBO = os.path.join(NOME_PASTA_CACHE, cubo.ARQUIVO_CUBO)
+# Figuras e cards de períodos e filtros: ~7 figuras e ~12 cards por recorte, poucos recortes em memória
+MAX_FIGURAS_RECORTES = 28
+MAX_FRAGMENTOS_RECORTES = 64
+# Painel de memória: com PREDICTFY_ADMIN=<token>, aparece ao abrir a página com ?admin=<token>
+TOKEN_ADMIN = os.environ.get('PREDICTFY_ADMIN')
+
+# Tempo máximo (s) de um dataset em memória e quantos ficam carregados; os
+# arquivos da pasta são vigiados e uma troca é recarregada uma vez por processo
+TTL_DADOS = float(os.environ['PREDICTFY_TTL_DADOS']) if os.environ.get('PREDICTFY_TTL_DADOS') else None
+MAX_DATASETS = int(os.environ.get('PREDICTFY_MAX_DATASETS', MAX_ITENS_DADOS))
+
+@st.cache_resource
+def obter_cache_dados():
+    """Cache de datasets do processo, compartilhado pelas sessões e atualizado quando os CSVs mudam."""
+    cache = CacheDados(CSV, ttl=TTL_DADOS, max_itens=MAX_DATASETS)
+    cache.registrar('clusters', lambda: dados.ler_clusters(CSV, processos=1), (ARQUIVO_CLUSTERS, ARQUIVO_CLIENTES))
+    cache.registrar('clientes', lambda: dados.ler_clientes(CSV), (ARQUIVO_CLIENTES,))
+    cache.registrar('recomendacoes', lambda: dados.ler_recomendacoes(CSV), (ARQUIVO_RECOMENDACOES,))
+    cache.registrar(
+        'snapshot', lambda: snapshot.obter_snapshot(CSV, lambda: cache.obter('clusters')),
+        (ARQUIVO_CLUSTERS, ARQUIVO_CLIENTES, ARQUIVO_QUANTIS),
+    )
+    cache.registrar('cubo', lambda: cubo.abrir(CSV), (ARQUIVO_CUBO,))
+    return cache.iniciar()
 
-@st.cache_data
 def carregar_dados_clusters():
-    """Carrega dados de clusters do CSV."""
+    """Carrega dados de clusters do CSV (ou agrega do cliente.csv se ele não existir)."""
     try:
-        df = pd.read_csv(f'{CSV}cluster.csv', sep=',', encoding='utf-8')
-        df['tipo'] = df['cluster'].apply(lambda x: 'Empresa' if 'Empresa' in x else 'Pessoa')
-        df = df.rename(columns={
-            'Qtd': 'quantidade',
-            'recency_mean': 'recencia_media',
-            'frequency_mean': 'frequencia_media',
-            'monetary_mean': 'gasto_medio_total'
-        })
-        return df
+        return obter_cache_dados().obter('clusters')
     except Exception as e:
         st.error(f"Erro ao carregar dados de clusters: {e}")
         return None
 
-@st.cache_data
 def carregar_dados_clientes():
     """Carrega dados de clientes."""
     try:
-        df = pd.read_csv(f'{CSV}cliente.csv', sep=',', encoding='utf-8')
-        return df
+        return obter_cache_dados().obter('clientes')
     except Exception as e:
         st.error(f"Erro ao carregar dados de clientes: {e}")
         return None
 
-@st.cache_data
 def carregar_recomendacoes():
     """Carrega recomendações."""
     try:
-        df = pd.read_csv(f'{CSV}recomendacoes_finais_desafio3.csv', sep=',', encoding='utf-8')
-        return df
+        return obter_cache_dados().obter('recomendacoes')
     except Exception as e:
         st.error(f"Erro ao carregar recomendações: {e}")
         return None
 
-df_clusters = carregar_dados_clusters()
-df_clientes = carregar_dados_clientes()
-df_recomendacoes = carregar_recomendacoes()
+def carregar_snapshot():
+    """Carrega o snapshot pré-calculado da versão dos dados (constrói se faltar)."""
+    try:
+        return obter_cache_dados().obter('snapshot')
+    except Exception as e:
+        st.error(f"Erro ao carregar snapshot: {e}")
+        return None
+
+def carregar_cubo():
+    """Carrega o cubo dia × cluster × tipo das compras (gerado por `python -m predictfy.cubo`)."""
+    try:
+        return obter_cache_dados().obter('cubo')
+    except Exception as e:
+        st.error(f"Erro ao carregar o cubo de compras: {e}")
+        return None
+
+# Datasets copiados para cada sessão a cada rerun (`cache_data`): nenhum, hoje
+# todos vêm do cache de dados compartilhado
+DATASETS_COPIADOS = ()
+
+# Nada é lido aqui: cada seção declara os datasets que usa com `registro.requer`
+# (vários de uma vez são carregados em paralelo, com o contexto do script nas threads)
+contexto_script = get_script_run_ctx()
+registro = RegistroDatasets(preparar_thread=lambda: add_script_run_ctx(threading.current_thread(), contexto_script))
+registro.registrar('clusters', carregar_dados_clusters)
+registro.registrar('clientes', carregar_dados_clientes)
+registro.registrar('recomendacoes', carregar_recomendacoes)
+registro.registrar('snapshot', carregar_snapshot)
+registro.registrar('cubo', carregar_cubo)
 
 # ============================================================================
 # FUNÇÕES AUXILIARES
 # ============================================================================
 
-def formatar_numero(n):
-    """Formata número de forma compacta."""
-    if abs(n) < 1000:
-        return f'{n:.0f}'
-    elif abs(n) < 1_000_000:
-        return f'{n/1000:.1f}k'.replace('.0k', 'k')
-    elif abs(n) < 1_000_000_000:
-        return f'{n/1_000_000:.1f}M'.replace('.0M', 'M')
-    else:
-        return f'{n/1_000_000_000:.1f}G'.replace('.0G', 'G')
-
 def criar_metric_card(valor, label, delta=None):
     """Cria um card de métrica estilizado."""
     delta_html = f'<div class="metric-delta">↗ {delta}</div>' if delta else ''
@@ -806,6 +203,112 @@ def criar_badge(texto, cor="cyan"):
     """Cria um badge colorido."""
     return f'<span class="badge badge-{cor}">{texto}</span>'
 
+@st.cache_resource
+def recursos_compartilhados():
+    """Objetos de `cache_resource` criados no processo (para a contabilidade de memória)."""
+    return {}
+
+@st.cache_resource
+def obter_cache_figuras():
+    """Cache de figuras do processo, compartilhado por todas as sessões (e gravado em disco)."""
+    cache = CacheFiguras(pasta=os.path.join(CSV, NOME_PASTA_CACHE, 'figuras'))
+    recursos_compartilhados()['figuras'] = cache
+    return cache
+
+@st.cache_resource
+def versao_codigo():
+    """Hash do app.py: figuras gravadas por uma versão anterior do código não são reaproveitadas."""
+    with open(__file__, 'rb') as f:
+        return hashlib.blake2b(f.read(), digest_size=6).hexdigest()
+
+@st.cache_resource
+def obter_caches_recortes():
+    """Figuras e cards de recortes (períodos do cubo, filtros): LRU pequeno, só em memória.
+
+    Cada período ou filtro escolhido é uma versão nova; separados, os recortes não
+    empurram para fora as figuras da base completa nem enchem o disco.
+    """
+    caches = {
+        'figuras': CacheFiguras(max_itens=MAX_FIGURAS_RECORTES),
+        'fragmentos': CacheFragmentos(max_itens=MAX_FRAGMENTOS_RECORTES),
+    }
+    recursos_compartilhados()['recortes'] = caches
+    return caches
+
+def exibir_grafico(nome, construir, versao=None):
+    """Exibe um gráfico Plotly a partir do cache de figuras (constrói só na falta).
+
+    O acerto devolve o JSON da figura, que vai ao `st.plotly_chart` como
+    dict, sem rodar de novo o `construir()` (agregações e montagem com o
+    Plotly Express). `versao` é a do snapshot de onde vêm os dados (padrão:
+    o da página).
+    """
+    versao = versao or snap['versao_dados']
+    cache = obter_cache_figuras() if versao == versao_dados else obter_caches_recortes()['figuras']
+    with telemetria.figura():
+        spec = cache.obter(f"{versao}-{versao_codigo()}", nome, construir)
+    telemetria.enviados(len(spec))
+    st.plotly_chart(json.loads(spec), use_container_width=True, theme='streamlit')
+
+@st.cache_resource
+def obter_cache_fragmentos():
+    """Cards HTML já montados, compartilhados por todas as sessões."""
+    cache = CacheFragmentos()
+    recursos_compartilhados()['fragmentos'] = cache
+    return cache
+
+def exibir_html(nome, renderizar, versao=None):
+    """Exibe um card HTML montado uma vez por versão dos dados (`renderizar()` só na falta)."""
+    versao = versao or snap['versao_dados']
+    cache = obter_cache_fragmentos() if versao == versao_dados else obter_caches_recortes()['fragmentos']
+    html = cache.obter(f"{versao}-{versao_codigo()}", nome, renderizar)
+    telemetria.enviados(len(html))
+    st.markdown(html, unsafe_allow_html=True)
+
+@st.cache_resource(max_entries=1)
+def obter_indice_clusters(versao, _df_clientes):
+    """Índice cluster -> linhas do cliente.csv, compartilhado pelas sessões."""
+    indice = None if _df_clientes is None else IndiceClusters(_df_clientes)
+    recursos_compartilhados()['indice_clusters'] = indice
+    return indice
+
+@st.cache_resource(max_entries=1)
+def obter_indice_filtros(versao, _df_clientes):
+    """Grade cluster × faixa de recência dos filtros, compartilhada pelas sessões."""
+    indice = None if _df_clientes is None else IndiceFiltros(_df_clientes)
+    recursos_compartilhados()['indice_filtros'] = indice
+    return indice
+
+@st.cache_resource(max_entries=1)
+def obter_busca(versao, _df_clientes, _df_recomendacoes):
+    """Busca indexada por fk_contact (índices persistidos por versão dos dados)."""
+    indices = busca.abrir(CSV, _df_clientes, _df_recomendacoes, versao)
+    recursos_compartilhados()['busca'] = indices
+    return indices
+
+def medir_memoria():
+    """Memória dos datasets e recursos carregados: compartilhada e copiada por sessão."""
+    carregados = registro.carregados()
+    recursos = {nome: df for nome, df in carregados.items() if nome not in DATASETS_COPIADOS}
+    recursos.update(recursos_compartilhados())
+    copias = {nome: carregados[nome] for nome in DATASETS_COPIADOS if nome in carregados}
+    return memoria.medir(recursos, copias, memoria.bytes_cache_data())
+
+def criar_card_quantis(df, titulo, cores):
+    """Card com mediana, p90 e p99 do gasto de cada cluster (esboços de quantis)."""
+    html_content = f'<div class="bento-card"><h3>{titulo}</h3>'
+    for idx, row in df.dropna(subset=['monetary_p50']).iterrows():
+        cor = cores[idx % len(cores)]
+        html_content += f'<div class="insight-card" style="border-left-color: {cor}; margin-bottom: 12px;">'
+        html_content += f'<div style="color: {cor}; font-weight: bold;">{row["rotulo"]}</div>'
+        html_content += '<div style="margin-top: 6px; color: #a0a0a0; font-size: 0.85rem;">'
+        html_content += f'Mediana <strong>R$ {formatar_numero(row["monetary_p50"])}</strong> · '
+        html_content += f'p90 <strong>R$ {formatar_numero(row["monetary_p90"])}</strong> · '
+        html_content += f'p99 <strong>R$ {formatar_numero(row["monetary_p99"])}</strong>'
+        html_content += '</div></div>'
+    html_content += '</div>'
+    return html_content
+
 def criar_tooltip(texto_tooltip):
     """Cria um ícone de tooltip com informação."""
     return f'<span class="tooltip-icon" title="{texto_tooltip}"></span>'
@@ -814,14 +317,21 @@ def criar_tooltip(texto_tooltip):
 # VERIFICAR SE DADOS FORAM CARREGADOS
 # ============================================================================
 
-if df_clusters is None:
+snap, = registro.requer('snapshot')
+
+if snap is None:
     st.error("❌ Erro ao carregar dados! Verifique o caminho dos arquivos CSV.")
     st.stop()
 
+# Versão dos arquivos (o snapshot de um período tem versão própria, ver abaixo)
+versao_dados = snap['versao_dados']
+
 # ============================================================================
 # HEADER PRINCIPAL COM GRADIENTE
 # ============================================================================
 
+secoes.iniciar('metricas')
+
 st.markdown(f"""
 <div style="text-align: center; margin-bottom: 40px;">
     <h1 class="pulse" style="
@@ -836,45 +346,68 @@ st.markdown(f"""
 </div>
 """, unsafe_allow_html=True)
 
+# ============================================================================
+# PERÍODO
+# ============================================================================
+
+# Com o cubo de compras, todos os KPIs e recortes da página podem ser
+# recalculados para uma faixa de datas; o período completo usa o cluster.csv
+if os.path.exists(os.path.join(CSV, ARQUIVO_CUBO)):
+    indice_cubo, = registro.requer('cubo')
+    if indice_cubo is not None:
+        primeira_data, ultima_data = indice_cubo.periodo
+        periodo = st.date_input(
+            'Período', value=(primeira_data, ultima_data), min_value=primeira_data,
+            max_value=ultima_data, format="DD/MM/YYYY", key='periodo',
+        )
+        if len(periodo) == 2 and tuple(periodo) != (primeira_data, ultima_data):
+            snap_periodo = cubo.snapshot_periodo(indice_cubo, periodo[0], periodo[1], versao_dados)
+            if snap_periodo['kpis']['total_pf'] and snap_periodo['kpis']['total_pj']:
+                snap = snap_periodo
+                st.caption("Compras do período: clientes distintos estimados (HyperLogLog, erro de ~3%); recência até o fim do período.")
+            else:
+                st.warning("O período não tem compras de PF e de PJ: mostrando o histórico completo.")
+
 # ============================================================================
 # MÉTRICAS PRINCIPAIS
 # ============================================================================
 
-total_clientes = df_clusters['quantidade'].sum()
-total_clusters = len(df_clusters)
-ticket_medio_geral = (df_clusters['quantidade'] * df_clusters['gasto_medio_total']).sum() / total_clientes
-clientes_pf = df_clusters[df_clusters['tipo'] == 'Pessoa']['quantidade'].sum()
-pct_pf = (clientes_pf / total_clientes * 100)
+kpis = snap['kpis']
+total_clientes = kpis['total_clientes']
+total_clusters = kpis['total_clusters']
+ticket_medio_geral = kpis['ticket_medio_geral']
+clientes_pf = kpis['clientes_pf']
+pct_pf = kpis['pct_pf']
 
 col1, col2, col3, col4 = st.columns(4, gap="small")
 
 with col1:
-    st.markdown(criar_metric_card(
+    exibir_html('card_total_clientes', lambda: criar_metric_card(
         formatar_numero(total_clientes),
         "TOTAL CLIENTES",
-        "Base completa"
-    ), unsafe_allow_html=True)
+        "Ativos no período" if snap.get('periodo') else "Base completa"
+    ))
 
 with col2:
-    st.markdown(criar_metric_card(
+    exibir_html('card_clusters', lambda: criar_metric_card(
         f"{total_clusters}",
         "CLUSTERS",
         "Segmentos"
-    ), unsafe_allow_html=True)
+    ))
 
 with col3:
-    st.markdown(criar_metric_card(
+    exibir_html('card_ticket_medio', lambda: criar_metric_card(
         f"R$ {formatar_numero(ticket_medio_geral)}",
         "TICKET MÉDIO",
-        "Lifetime Value"
-    ), unsafe_allow_html=True)
+        "Gasto no período" if snap.get('periodo') else "Lifetime Value"
+    ))
 
 with col4:
-    st.markdown(criar_metric_card(
+    exibir_html('card_pessoa_fisica', lambda: criar_metric_card(
         f"{pct_pf:.1f}%",
         "PESSOA FÍSICA",
         f"{formatar_numero(clientes_pf)} clientes"
-    ), unsafe_allow_html=True)
+    ))
 
 st.markdown("<br>", unsafe_allow_html=True)
 
@@ -882,6 +415,8 @@ st.markdown("<br>", unsafe_allow_html=True)
 # MINI DASHBOARD COMPARATIVO (SEMPRE ABERTO)
 # ============================================================================
 
+secoes.iniciar('comparacao_rapida')
+
 st.markdown(f"""
 <div class="comparison-mini">
     <div class="comparison-header">
@@ -895,7 +430,7 @@ st.markdown(f"""
         </div>
         <div style="text-align: center; padding: 20px; background: rgba(16, 185, 129, 0.1); border-radius: 12px;">
             <div style="font-size: 0.8rem; color: #888; margin-bottom: 10px;">🏢 PESSOA JURÍDICA</div>
-            <div style="font-size: 2rem; color: #10b981; font-weight: 900;">{df_clusters[df_clusters['tipo'] == 'Empresa']['quantidade'].sum()}</div>
+            <div style="font-size: 2rem; color: #10b981; font-weight: 900;">{kpis['total_pj']}</div>
             <div style="font-size: 0.75rem; color: #888; margin-top: 5px;">empresas</div>
         </div>
     </div>
@@ -908,408 +443,467 @@ st.markdown("<br>", unsafe_allow_html=True)
 # SEÇÃO PESSOA FÍSICA
 # ============================================================================
 
-st.markdown(f"""
-## 👥 Análise: Pessoa Física {criar_tooltip("Análise detalhada dos clientes pessoa física segmentados por comportamento de compra")}
-""", unsafe_allow_html=True)
-
-df_pessoa = df_clusters[df_clusters['tipo'] == 'Pessoa'].sort_values('quantidade', ascending=False)
+def secao_pessoa_fisica(recorte):
+    """Gráficos e cards dos clusters PF do `recorte` (snapshot da página ou filtrado)."""
+    versao = recorte['versao_dados']
+
+    st.markdown(f"""
+    ## 👥 Análise: Pessoa Física {criar_tooltip("Análise detalhada dos clientes pessoa física segmentados por comportamento de compra")}
+    """, unsafe_allow_html=True)
+
+    df_pessoa = recorte['df_pessoa']
+
+    col1, col2 = st.columns([1, 1], gap="small")
+
+    with col1:
+        cores_pf = [tema_atual['accent1'], tema_atual['accent2'], tema_atual['accent3'], '#a855f7']
+
+        def grafico_distribuicao_pf():
+            fig = px.pie(
+                df_pessoa,
+                values='quantidade',
+                names=df_pessoa['cluster'].str.replace('Pessoa - ', ''),
+                color_discrete_sequence=gerar_paleta(cores_pf, len(df_pessoa)),
+                hole=0.5
+            )
+
+            fig.update_traces(
+                textposition='outside',
+                textinfo='percent+label',
+                textfont=dict(color='white', size=11, family='Inter'),
+                marker=dict(line=dict(color='#0a0e27', width=3))
+            )
+
+            fig.update_layout(
+                title=dict(
+                    text='📊 Distribuição de Clientes PF',
+                    font=dict(color='#fafafa', size=16, family='Inter'),
+                    x=0.05, y=0.95, xanchor='left', yanchor='top'
+                ),
+                height=380,
+                margin=dict(l=5, r=5, t=60, b=10),
+                paper_bgcolor='rgba(0,0,0,0)',
+                plot_bgcolor='rgba(0,0,0,0)',
+                font=dict(color='white', size=11, family='Inter'),
+                showlegend=True,
+                legend=dict(
+                    orientation="v", yanchor="middle", y=0.5, xanchor="left", x=1.01,
+                    bgcolor='rgba(255,255,255,0.05)',
+                    bordercolor='rgba(255,255,255,0.1)', borderwidth=1,
+                    font=dict(size=10)
+                ),
+                autosize=True
+            )
+            return fig
+
+        exibir_grafico('distribuicao_pf', grafico_distribuicao_pf, versao)
+
+    with col2:
+        def grafico_gasto_medio_pf():
+            fig = barras_horizontais(
+                df_pessoa, 'rotulo', 'gasto_medio_total', cores_pf,
+                '💰 Gasto Médio por Cluster PF',
+                altura=380,
+                margem=dict(l=5, r=5, t=60, b=10),
+                hover='cluster',
+                eixo_x=dict(showgrid=True, gridcolor='rgba(255,255,255,0.1)', color='white', title=None)
+            )
+            return fig
+
+        exibir_grafico('gasto_medio_pf', grafico_gasto_medio_pf, versao)
+
+    col1, col2 = st.columns([3, 2], gap="small")
+
+    with col1:
+        def grafico_recencia_frequencia_pf():
+            fig = px.scatter(
+                df_pessoa,
+                x='recencia_media',
+                y='frequencia_media',
+                size='quantidade',
+                color='gasto_medio_total',
+                hover_name='cluster',
+                color_continuous_scale=[[0, tema_atual['accent1']], [0.5, tema_atual['accent2']], [1, tema_atual['accent3']]],
+                size_max=60
+            )
+
+            fig.update_layout(
+                title=dict(
+                    text='⚡ Recência vs Frequência PF',
+                    font=dict(color='#fafafa', size=16, family='Inter'),
+                    x=0.05, y=0.95, xanchor='left', yanchor='top'
+                ),
+                height=350,
+                margin=dict(l=5, r=5, t=60, b=5),
+                paper_bgcolor='rgba(0,0,0,0)',
+                plot_bgcolor='rgba(0,0,0,0)',
+                xaxis=dict(showgrid=True, gridcolor='rgba(255,255,255,0.1)', color='white', title='Recência (dias)'),
+                yaxis=dict(showgrid=True, gridcolor='rgba(255,255,255,0.1)', color='white', title='Frequência'),
+                font=dict(color='white', family='Inter'),
+                coloraxis_colorbar=dict(
+                    title="Gasto<br>Médio", titleside="right",
+                    titlefont=dict(color='white', size=10), tickfont=dict(color='white', size=9),
+                    bgcolor='rgba(255,255,255,0.05)',
+                    bordercolor='rgba(255,255,255,0.1)', borderwidth=1,
+                    len=0.7
+                ),
+                autosize=True
+            )
+            return fig
+
+        exibir_grafico('recencia_frequencia_pf', grafico_recencia_frequencia_pf, versao)
+
+        st.markdown("<div style='margin-top: 24px;'></div>", unsafe_allow_html=True)
+
+        def grafico_impacto_pf():
+            fig_treemap_pf = px.treemap(
+                df_pessoa,
+                path=[px.Constant("Clientes PF"), df_pessoa['rotulo']],
+                values='valor_total',
+                color='gasto_medio_total',
+                color_continuous_scale=[[0, tema_atual['accent1']], [0.5, tema_atual['accent2']], [1, tema_atual['accent3']]],
+                hover_data={'quantidade': ':.0f', 'gasto_medio_total': ':.2f', 'valor_total': ':.2f'},
+                custom_data=['quantidade', 'gasto_medio_total', 'valor_total']
+            )
+
+            fig_treemap_pf.update_traces(
+                texttemplate="<b>%{label}</b><br>R$ %{value:,.2s}",
+                textfont=dict(color='white', size=13, family='Inter'),
+                hovertemplate="<b>%{label}</b><br><br>Valor Total: R$ %{customdata[2]:,.2f}<br>Clientes: %{customdata[0]:,.0f}<br>Gasto Médio: R$ %{customdata[1]:,.2f}<extra></extra>"
+            )
+
+            fig_treemap_pf.update_layout(
+                title=dict(
+                    text='💸 Impacto Financeiro Total por Cluster PF',
+                    font=dict(color='#fafafa', size=16, family='Inter'),
+                    x=0.05, y=0.95, xanchor='left', yanchor='top'
+                ),
+                height=400,
+                margin=dict(l=5, r=5, t=60, b=5),
+                paper_bgcolor='rgba(0,0,0,0)',
+                plot_bgcolor='rgba(0,0,0,0)',
+                font=dict(color='white', family='Inter'),
+                coloraxis_colorbar=dict(
+                    title="Gasto<br>Médio", titleside="right",
+                    titlefont=dict(color='white', size=10), tickfont=dict(color='white', size=9),
+                    bgcolor='rgba(255,255,255,0.05)',
+                    bordercolor='rgba(255,255,255,0.1)', borderwidth=1,
+                    len=0.7
+                ),
+                autosize=True
+            )
+            return fig_treemap_pf
+
+        exibir_grafico('impacto_pf', grafico_impacto_pf, versao)
+
+    with col2:
+        def card_top_oportunidades_pf():
+            badges_cores = ['cyan', 'blue', 'purple', 'orange']
+
+            html_content = '<div class="bento-card"><h3>🎯 Top Oportunidades PF</h3>'
+
+            for idx, (index, row) in enumerate(df_pessoa.head(4).iterrows()):
+                html_content += f'<div class="insight-card" style="border-left-color: {cores_pf[idx]}; margin-bottom: 12px;">'
+                html_content += f'{criar_badge(row["rotulo"], badges_cores[idx])}'
+                html_content += '<div style="margin-top: 10px;">'
+                html_content += f'<span style="color: {cores_pf[idx]}; font-weight: bold; font-size: 1.3rem;">{formatar_numero(row["quantidade"])}</span>'
+                html_content += '<span style="color: #888; margin-left: 8px; font-size: 0.9rem;">clientes</span>'
+                html_content += '</div>'
+                html_content += f'<div style="margin-top: 6px; color: {tema_atual["accent1"]}; font-size: 0.85rem;">💰 R$ {formatar_numero(row["gasto_medio_total"])} médio</div>'
+                html_content += '</div>'
+
+            html_content += '</div>'
+            return html_content
+
+        exibir_html('top_oportunidades_pf', card_top_oportunidades_pf, versao)
+
+        if recorte['tem_quantis']:
+            exibir_html('quantis_pf', lambda: criar_card_quantis(df_pessoa, '📐 Distribuição do Gasto PF', cores_pf), versao)
+
+    st.markdown("<br><br>", unsafe_allow_html=True)
 
-col1, col2 = st.columns([1, 1], gap="small")
-
-with col1:
-    cores_pf = [tema_atual['accent1'], tema_atual['accent2'], tema_atual['accent3'], '#a855f7']
-    
-    fig = px.pie(
-        df_pessoa,
-        values='quantidade',
-        names=df_pessoa['cluster'].str.replace('Pessoa - ', ''),
-        color_discrete_sequence=cores_pf,
-        hole=0.5
-    )
-    
-    fig.update_traces(
-        textposition='outside',
-        textinfo='percent+label',
-        textfont=dict(color='white', size=11, family='Inter'),
-        marker=dict(line=dict(color='#0a0e27', width=3))
-    )
-    
-    fig.update_layout(
-        title=dict(
-            text='📊 Distribuição de Clientes PF',
-            font=dict(color='#fafafa', size=16, family='Inter'),
-            x=0.05, y=0.95, xanchor='left', yanchor='top'
-        ),
-        height=380,
-        margin=dict(l=5, r=5, t=60, b=10),
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        font=dict(color='white', size=11, family='Inter'),
-        showlegend=True,
-        legend=dict(
-            orientation="v", yanchor="middle", y=0.5, xanchor="left", x=1.01,
-            bgcolor='rgba(255,255,255,0.05)',
-            bordercolor='rgba(255,255,255,0.1)', borderwidth=1,
-            font=dict(size=10)
-        ),
-        autosize=True
-    )
-    
-    st.plotly_chart(fig, use_container_width=True)
+# ============================================================================
+# ALERT E SEÇÃO EMPRESA
+# ============================================================================
 
-with col2:
-    fig = go.Figure()
-    
-    for idx, (index, row) in enumerate(df_pessoa.iterrows()):
-        fig.add_trace(go.Bar(
-            y=[row['cluster'].replace('Pessoa - ', '')],
-            x=[row['gasto_medio_total']],
-            orientation='h',
-            marker=dict(color=cores_pf[idx], line=dict(color='white', width=2)),
-            text=f"R$ {formatar_numero(row['gasto_medio_total'])}",
-            textposition='auto',
-            textfont=dict(color='white', size=12, family='Inter'),
-            showlegend=False,
-            hovertemplate=f"<b>{row['cluster']}</b><br>R$ {row['gasto_medio_total']:.2f}<extra></extra>"
-        ))
-    
-    fig.update_layout(
-        title=dict(
-            text='💰 Gasto Médio por Cluster PF',
-            font=dict(color='#fafafa', size=16, family='Inter'),
-            x=0.05, y=0.95, xanchor='left', yanchor='top'
-        ),
-        height=380,
-        margin=dict(l=5, r=5, t=60, b=10),
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        xaxis=dict(showgrid=True, gridcolor='rgba(255,255,255,0.1)', color='white', title=None),
-        yaxis=dict(showgrid=False, color='white'),
-        font=dict(color='white', family='Inter'),
-        autosize=True
-    )
-    
-    st.plotly_chart(fig, use_container_width=True)
+def secao_pessoa_juridica(recorte):
+    """Alerta, gráficos e cards dos clusters PJ do `recorte`."""
+    versao = recorte['versao_dados']
 
-col1, col2 = st.columns([3, 2], gap="small")
+    df_empresa = recorte['df_empresa']
 
-with col1:
-    fig = px.scatter(
-        df_pessoa,
-        x='recencia_media',
-        y='frequencia_media',
-        size='quantidade',
-        color='gasto_medio_total',
-        hover_name='cluster',
-        color_continuous_scale=[[0, tema_atual['accent1']], [0.5, tema_atual['accent2']], [1, tema_atual['accent3']]],
-        size_max=60
-    )
-    
-    fig.update_layout(
-        title=dict(
-            text='⚡ Recência vs Frequência PF',
-            font=dict(color='#fafafa', size=16, family='Inter'),
-            x=0.05, y=0.95, xanchor='left', yanchor='top'
-        ),
-        height=350,
-        margin=dict(l=5, r=5, t=60, b=5),
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        xaxis=dict(showgrid=True, gridcolor='rgba(255,255,255,0.1)', color='white', title='Recência (dias)'),
-        yaxis=dict(showgrid=True, gridcolor='rgba(255,255,255,0.1)', color='white', title='Frequência'),
-        font=dict(color='white', family='Inter'),
-        coloraxis_colorbar=dict(
-            title="Gasto<br>Médio", titleside="right",
-            titlefont=dict(color='white', size=10), tickfont=dict(color='white', size=9),
-            bgcolor='rgba(255,255,255,0.05)',
-            bordercolor='rgba(255,255,255,0.1)', borderwidth=1,
-            len=0.7
-        ),
-        autosize=True
-    )
-    
-    st.plotly_chart(fig, use_container_width=True)
+    if recorte['kpis']['total_pf']:
+        st.markdown(f"""
+        <div class="alert-box">
+            <strong>⚠️ ATENÇÃO:</strong> Dados de empresas são extremamente discrepantes de PF. 
+            Total: <strong>{recorte['kpis']['total_pj']} empresas</strong> vs 
+            <strong>{formatar_numero(recorte['kpis']['total_pf'])} pessoas</strong>. 
+            Visualizações separadas para melhor análise e compreensão.
+        </div>
+        """, unsafe_allow_html=True)
+
+    st.markdown(f"""
+    ## 🏢 Análise: Pessoa Jurídica {criar_tooltip("Análise de empresas com alto volume de compras e transações recorrentes")}
+    """, unsafe_allow_html=True)
+
+    col1, col2, col3 = st.columns([2, 2, 2], gap="small")
+
+    with col1:
+        cores_pj = ['#10b981', '#14b8a6', tema_atual['accent1'], '#0ea5e9']
+
+        def grafico_distribuicao_pj():
+            fig = px.pie(
+                df_empresa,
+                values='quantidade',
+                names=df_empresa['cluster'].str.replace('Empresa - ', ''),
+                color_discrete_sequence=gerar_paleta(cores_pj, len(df_empresa)),
+                hole=0.5
+            )
+
+            fig.update_traces(
+                textposition='inside',
+                textinfo='percent+label',
+                textfont=dict(color='white', size=11, family='Inter'),
+                marker=dict(line=dict(color='#0a0e27', width=3))
+            )
+
+            fig.update_layout(
+                title=dict(
+                    text='📊 Distribuição PJ',
+                    font=dict(color='#fafafa', size=16, family='Inter'),
+                    x=0.05, y=0.95, xanchor='left', yanchor='top'
+                ),
+                height=320,
+                margin=dict(l=5, r=5, t=60, b=5),
+                paper_bgcolor='rgba(0,0,0,0)',
+                showlegend=False,
+                font=dict(color='white', family='Inter'),
+                autosize=True
+            )
+            return fig
+
+        exibir_grafico('distribuicao_pj', grafico_distribuicao_pj, versao)
+
+    with col2:
+        def grafico_valor_medio_pj():
+            fig = barras_horizontais(
+                df_empresa, 'rotulo', 'gasto_medio_total', cores_pj,
+                '💎 Valor Médio PJ',
+                altura=320,
+                margem=dict(l=5, r=5, t=60, b=5),
+                tamanho_texto=11
+            )
+            return fig
+
+        exibir_grafico('valor_medio_pj', grafico_valor_medio_pj, versao)
+
+    with col3:
+        def card_destaques_pj():
+            vip = recorte['vip_pj']
+
+            html_content = f'<div class="bento-card">'
+            html_content += '<h3>🔥 Destaques PJ</h3>'
+            html_content += f'<div style="text-align: center; padding: 20px; background: linear-gradient(135deg, rgba(16, 185, 129, 0.15), rgba(6, 182, 212, 0.15)); border-radius: 14px; margin-bottom: 16px; border: 1px solid rgba(16, 185, 129, 0.3);">'
+            html_content += f'<div style="font-size: 2.2rem; font-weight: 900; color: #10b981;">{int(vip["frequencia_media"])}</div>'
+            html_content += '<div style="color: #a0a0a0; font-size: 0.75rem; margin-top: 4px; letter-spacing: 1px;">COMPRAS MÉDIAS<br>EMPRESA VIP</div>'
+            html_content += '</div>'
+            html_content += f'<div style="text-align: center; padding: 20px; background: linear-gradient(135deg, rgba(20, 184, 166, 0.15), rgba(6, 182, 212, 0.15)); border-radius: 14px; border: 1px solid rgba(20, 184, 166, 0.3);">'
+            html_content += f'<div style="font-size: 2.2rem; font-weight: 900; color: #14b8a6;">R$ {formatar_numero(vip["gasto_medio_total"])}</div>'
+            html_content += '<div style="color: #a0a0a0; font-size: 0.75rem; margin-top: 4px; letter-spacing: 1px;">VALOR MÉDIO<br>EMPRESA VIP</div>'
+            html_content += '</div>'
+            html_content += '</div>'
+            return html_content
+
+        exibir_html('destaques_pj', card_destaques_pj, versao)
 
     st.markdown("<div style='margin-top: 24px;'></div>", unsafe_allow_html=True)
 
-    df_pessoa['valor_total'] = df_pessoa['quantidade'] * df_pessoa['gasto_medio_total']
-    
-    fig_treemap_pf = px.treemap(
-        df_pessoa,
-        path=[px.Constant("Clientes PF"), df_pessoa['cluster'].str.replace('Pessoa - ', '')],
-        values='valor_total',
-        color='gasto_medio_total',
-        color_continuous_scale=[[0, tema_atual['accent1']], [0.5, tema_atual['accent2']], [1, tema_atual['accent3']]],
-        hover_data={'quantidade': ':.0f', 'gasto_medio_total': ':.2f', 'valor_total': ':.2f'},
-        custom_data=['quantidade', 'gasto_medio_total', 'valor_total']
-    )
-    
-    fig_treemap_pf.update_traces(
-        texttemplate="<b>%{label}</b><br>R$ %{value:,.2s}",
-        textfont=dict(color='white', size=13, family='Inter'),
-        hovertemplate="<b>%{label}</b><br><br>Valor Total: R$ %{customdata[2]:,.2f}<br>Clientes: %{customdata[0]:,.0f}<br>Gasto Médio: R$ %{customdata[1]:,.2f}<extra></extra>"
-    )
-    
-    fig_treemap_pf.update_layout(
-        title=dict(
-            text='💸 Impacto Financeiro Total por Cluster PF',
-            font=dict(color='#fafafa', size=16, family='Inter'),
-            x=0.05, y=0.95, xanchor='left', yanchor='top'
-        ),
-        height=400,
-        margin=dict(l=5, r=5, t=60, b=5),
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        font=dict(color='white', family='Inter'),
-        coloraxis_colorbar=dict(
-            title="Gasto<br>Médio", titleside="right",
-            titlefont=dict(color='white', size=10), tickfont=dict(color='white', size=9),
-            bgcolor='rgba(255,255,255,0.05)',
-            bordercolor='rgba(255,255,255,0.1)', borderwidth=1,
-            len=0.7
-        ),
-        autosize=True
-    )
-    
-    st.plotly_chart(fig_treemap_pf, use_container_width=True)
-
-with col2:
-    badges_cores = ['cyan', 'blue', 'purple', 'orange']
-    
-    html_content = '<div class="bento-card"><h3>🎯 Top Oportunidades PF</h3>'
-    
-    for idx, (index, row) in enumerate(df_pessoa.head(4).iterrows()):
-        html_content += f'<div class="insight-card" style="border-left-color: {cores_pf[idx]}; margin-bottom: 12px;">'
-        html_content += f'{criar_badge(row["cluster"].replace("Pessoa - ", ""), badges_cores[idx])}'
-        html_content += '<div style="margin-top: 10px;">'
-        html_content += f'<span style="color: {cores_pf[idx]}; font-weight: bold; font-size: 1.3rem;">{formatar_numero(row["quantidade"])}</span>'
-        html_content += '<span style="color: #888; margin-left: 8px; font-size: 0.9rem;">clientes</span>'
-        html_content += '</div>'
-        html_content += f'<div style="margin-top: 6px; color: {tema_atual["accent1"]}; font-size: 0.85rem;">💰 R$ {formatar_numero(row["gasto_medio_total"])} médio</div>'
-        html_content += '</div>'
-    
-    html_content += '</div>'
-    st.markdown(html_content, unsafe_allow_html=True)
-
-st.markdown("<br><br>", unsafe_allow_html=True)
+    col_map_pj, col_quantis_pj = st.columns([2, 1], gap="small")
+
+    with col_map_pj:
+        def grafico_impacto_pj():
+            fig_treemap_pj = px.treemap(
+                df_empresa,
+                path=[px.Constant("Empresas PJ"), df_empresa['rotulo']],
+                values='valor_total',
+                color='gasto_medio_total',
+                color_continuous_scale=[[0, '#10b981'], [0.5, '#14b8a6'], [1, '#0ea5e9']],
+                hover_data={'quantidade': ':.0f', 'gasto_medio_total': ':.2f', 'valor_total': ':.2f'},
+                custom_data=['quantidade', 'gasto_medio_total', 'valor_total']
+            )
+
+            fig_treemap_pj.update_traces(
+                texttemplate="<b>%{label}</b><br>R$ %{value:,.2s}",
+                textfont=dict(color='white', size=13, family='Inter'),
+                hovertemplate="<b>%{label}</b><br><br>Valor Total: R$ %{customdata[2]:,.2f}<br>Empresas: %{customdata[0]:,.0f}<br>Gasto Médio: R$ %{customdata[1]:,.2f}<extra></extra>"
+            )
+
+            fig_treemap_pj.update_layout(
+                title=dict(
+                    text='💸 Impacto Financeiro Total por Cluster PJ',
+                    font=dict(color='#fafafa', size=16, family='Inter'),
+                    x=0.05, y=0.95, xanchor='left', yanchor='top'
+                ),
+                height=400,
+                margin=dict(l=5, r=5, t=60, b=5),
+                paper_bgcolor='rgba(0,0,0,0)',
+                plot_bgcolor='rgba(0,0,0,0)',
+                font=dict(color='white', family='Inter'),
+                coloraxis_colorbar=dict(
+                    title="Gasto<br>Médio", titleside="right",
+                    titlefont=dict(color='white', size=10), tickfont=dict(color='white', size=9),
+                    bgcolor='rgba(255,255,255,0.05)',
+                    bordercolor='rgba(255,255,255,0.1)', borderwidth=1,
+                    len=0.7
+                ),
+                autosize=True
+            )
+            return fig_treemap_pj
+
+        exibir_grafico('impacto_pj', grafico_impacto_pj, versao)
+
+    with col_quantis_pj:
+        if recorte['tem_quantis']:
+            exibir_html('quantis_pj', lambda: criar_card_quantis(df_empresa, '📐 Distribuição do Gasto PJ', cores_pj), versao)
+
+    st.markdown("<br><br>", unsafe_allow_html=True)
 
 # ============================================================================
-# ALERT
+# FILTROS E SEÇÕES PF / PJ
 # ============================================================================
 
-df_empresa = df_clusters[df_clusters['tipo'] == 'Empresa'].sort_values('quantidade', ascending=False)
-
-st.markdown(f"""
-<div class="alert-box">
-    <strong>⚠️ ATENÇÃO:</strong> Dados de empresas são extremamente discrepantes de PF. 
-    Total: <strong>{df_empresa['quantidade'].sum()} empresas</strong> vs 
-    <strong>{formatar_numero(df_pessoa['quantidade'].sum())} pessoas</strong>. 
-    Visualizações separadas para melhor análise e compreensão.
-</div>
-""", unsafe_allow_html=True)
-
-# ============================================================================
-# SEÇÃO EMPRESA
-# ============================================================================
-
-st.markdown(f"""
-## 🏢 Análise: Pessoa Jurídica {criar_tooltip("Análise de empresas com alto volume de compras e transações recorrentes")}
-""", unsafe_allow_html=True)
-
-col1, col2, col3 = st.columns([2, 2, 2], gap="small")
-
-with col1:
-    cores_pj = ['#10b981', '#14b8a6', tema_atual['accent1'], '#0ea5e9']
-    
-    fig = px.pie(
-        df_empresa,
-        values='quantidade',
-        names=df_empresa['cluster'].str.replace('Empresa - ', ''),
-        color_discrete_sequence=cores_pj,
-        hole=0.5
-    )
-    
-    fig.update_traces(
-        textposition='inside',
-        textinfo='percent+label',
-        textfont=dict(color='white', size=11, family='Inter'),
-        marker=dict(line=dict(color='#0a0e27', width=3))
-    )
-    
-    fig.update_layout(
-        title=dict(
-            text='📊 Distribuição PJ',
-            font=dict(color='#fafafa', size=16, family='Inter'),
-            x=0.05, y=0.95, xanchor='left', yanchor='top'
-        ),
-        height=320,
-        margin=dict(l=5, r=5, t=60, b=5),
-        paper_bgcolor='rgba(0,0,0,0)',
-        showlegend=False,
-        font=dict(color='white', family='Inter'),
-        autosize=True
-    )
-    
-    st.plotly_chart(fig, use_container_width=True)
-
-with col2:
-    fig = go.Figure()
-    
-    for idx, (index, row) in enumerate(df_empresa.iterrows()):
-        fig.add_trace(go.Bar(
-            y=[row['cluster'].replace('Empresa - ', '')],
-            x=[row['gasto_medio_total']],
-            orientation='h',
-            marker=dict(color=cores_pj[idx], line=dict(color='white', width=2)),
-            text=f"R$ {formatar_numero(row['gasto_medio_total'])}",
-            textposition='auto',
-            textfont=dict(color='white', size=11, family='Inter'),
-            showlegend=False
-        ))
-    
-    fig.update_layout(
-        title=dict(
-            text='💎 Valor Médio PJ',
-            font=dict(color='#fafafa', size=16, family='Inter'),
-            x=0.05, y=0.95, xanchor='left', yanchor='top'
-        ),
-        height=320,
-        margin=dict(l=5, r=5, t=60, b=5),
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        xaxis=dict(showgrid=False, color='white'),
-        yaxis=dict(showgrid=False, color='white'),
-        font=dict(color='white', family='Inter'),
-        autosize=True
-    )
-    
-    st.plotly_chart(fig, use_container_width=True)
-
-with col3:
-    vip = df_empresa[df_empresa['cluster'].str.contains('VIP')].iloc[0] if len(df_empresa[df_empresa['cluster'].str.contains('VIP')]) > 0 else df_empresa.iloc[0]
-    
-    html_content = f'<div class="bento-card">'
-    html_content += '<h3>🔥 Destaques PJ</h3>'
-    html_content += f'<div style="text-align: center; padding: 20px; background: linear-gradient(135deg, rgba(16, 185, 129, 0.15), rgba(6, 182, 212, 0.15)); border-radius: 14px; margin-bottom: 16px; border: 1px solid rgba(16, 185, 129, 0.3);">'
-    html_content += f'<div style="font-size: 2.2rem; font-weight: 900; color: #10b981;">{int(vip["frequencia_media"])}</div>'
-    html_content += '<div style="color: #a0a0a0; font-size: 0.75rem; margin-top: 4px; letter-spacing: 1px;">COMPRAS MÉDIAS<br>EMPRESA VIP</div>'
-    html_content += '</div>'
-    html_content += f'<div style="text-align: center; padding: 20px; background: linear-gradient(135deg, rgba(20, 184, 166, 0.15), rgba(6, 182, 212, 0.15)); border-radius: 14px; border: 1px solid rgba(20, 184, 166, 0.3);">'
-    html_content += f'<div style="font-size: 2.2rem; font-weight: 900; color: #14b8a6;">R$ {formatar_numero(vip["gasto_medio_total"])}</div>'
-    html_content += '<div style="color: #a0a0a0; font-size: 0.75rem; margin-top: 4px; letter-spacing: 1px;">VALOR MÉDIO<br>EMPRESA VIP</div>'
-    html_content += '</div>'
-    html_content += '</div>'
-    
-    st.markdown(html_content, unsafe_allow_html=True)
-
-st.markdown("<div style='margin-top: 24px;'></div>", unsafe_allow_html=True)
-
-col_map_pj, _ = st.columns([2, 1], gap="small")
-
-with col_map_pj:
-    df_empresa['valor_total'] = df_empresa['quantidade'] * df_empresa['gasto_medio_total']
-    
-    fig_treemap_pj = px.treemap(
-        df_empresa,
-        path=[px.Constant("Empresas PJ"), df_empresa['cluster'].str.replace('Empresa - ', '')],
-        values='valor_total',
-        color='gasto_medio_total',
-        color_continuous_scale=[[0, '#10b981'], [0.5, '#14b8a6'], [1, '#0ea5e9']],
-        hover_data={'quantidade': ':.0f', 'gasto_medio_total': ':.2f', 'valor_total': ':.2f'},
-        custom_data=['quantidade', 'gasto_medio_total', 'valor_total']
-    )
-    
-    fig_treemap_pj.update_traces(
-        texttemplate="<b>%{label}</b><br>R$ %{value:,.2s}",
-        textfont=dict(color='white', size=13, family='Inter'),
-        hovertemplate="<b>%{label}</b><br><br>Valor Total: R$ %{customdata[2]:,.2f}<br>Empresas: %{customdata[0]:,.0f}<br>Gasto Médio: R$ %{customdata[1]:,.2f}<extra></extra>"
-    )
-    
-    fig_treemap_pj.update_layout(
-        title=dict(
-            text='💸 Impacto Financeiro Total por Cluster PJ',
-            font=dict(color='#fafafa', size=16, family='Inter'),
-            x=0.05, y=0.95, xanchor='left', yanchor='top'
-        ),
-        height=400,
-        margin=dict(l=5, r=5, t=60, b=5),
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        font=dict(color='white', family='Inter'),
-        coloraxis_colorbar=dict(
-            title="Gasto<br>Médio", titleside="right",
-            titlefont=dict(color='white', size=10), tickfont=dict(color='white', size=9),
-            bgcolor='rgba(255,255,255,0.05)',
-            bordercolor='rgba(255,255,255,0.1)', borderwidth=1,
-            len=0.7
-        ),
-        autosize=True
-    )
-    
-    st.plotly_chart(fig_treemap_pj, use_container_width=True)
-
-st.markdown("<br><br>", unsafe_allow_html=True)
+# Os filtros recortam as seções PF e PJ; o trecho roda como fragmento (uma
+# mudança de filtro não reexecuta a página) e mede as próprias seções
+secoes.encerrar()
+
+@st.fragment
+def secoes_filtradas(indice_filtros):
+    """Filtros por tipo, cluster e recência e as seções PF/PJ do recorte escolhido."""
+    partes = telemetria.SecoesEmSequencia()
+    partes.iniciar('filtros')
+
+    st.markdown(f"""
+    ## 🎛️ Filtros {criar_tooltip("Seções PF e PJ recalculadas por tipo, cluster e faixa de recência")}
+    """, unsafe_allow_html=True)
+
+    # Faixas de recência vêm do cliente.csv (histórico completo): sem ele ou com um período, ficam desligadas
+    sem_faixas = indice_filtros is None or bool(snap.get('periodo'))
+    col1, col2, col3 = st.columns([1, 2, 2], gap="small")
+    with col1:
+        tipo_filtro = st.radio('Tipo', ['Todos', 'PF', 'PJ'], horizontal=True, key='filtro_tipo')
+    with col2:
+        opcoes_clusters = clusters_do_snapshot(snap, tipo_filtro)
+        if 'filtro_clusters' in st.session_state:
+            st.session_state.filtro_clusters = [c for c in st.session_state.filtro_clusters if c in opcoes_clusters]
+        clusters_filtro = st.multiselect(
+            'Clusters', opcoes_clusters, key='filtro_clusters', placeholder='Todos os clusters',
+        )
+    with col3:
+        faixas_filtro = st.multiselect(
+            'Recência', FAIXAS_RECENCIA, key='filtro_recencia', placeholder='Todas as faixas',
+            disabled=sem_faixas,
+        )
+    if sem_faixas:
+        faixas_filtro = []
+
+    recorte = snap
+    if tipo_filtro in TIPOS_FILTRO or clusters_filtro or faixas_filtro:
+        recorte = snapshot_filtrado(snap, tipo_filtro, clusters_filtro, faixas_filtro, indice_filtros)
+    kpis_filtro = recorte['kpis']
+
+    col1, col2, col3, col4 = st.columns(4, gap="small")
+    with col1:
+        st.markdown(criar_metric_card(formatar_numero(kpis_filtro['total_clientes']), "CLIENTES NO FILTRO"), unsafe_allow_html=True)
+    with col2:
+        st.markdown(criar_metric_card(f"R$ {formatar_numero(kpis_filtro['ticket_medio_geral'])}", "GASTO MÉDIO"), unsafe_allow_html=True)
+    with col3:
+        st.markdown(criar_metric_card(f"{kpis_filtro['freq_media_geral']:.1f}", "COMPRAS / CLIENTE"), unsafe_allow_html=True)
+    with col4:
+        st.markdown(criar_metric_card(f"{kpis_filtro['recencia_media_geral']:.0f}d", "RECÊNCIA MÉDIA"), unsafe_allow_html=True)
+    st.markdown("<br>", unsafe_allow_html=True)
+
+    if not kpis_filtro['total_clientes']:
+        st.info("Nenhum cliente dentro dos filtros escolhidos.")
+    if len(recorte['df_pessoa']):
+        partes.iniciar('pessoa_fisica')
+        secao_pessoa_fisica(recorte)
+    if len(recorte['df_empresa']):
+        partes.iniciar('pessoa_juridica')
+        secao_pessoa_juridica(recorte)
+    partes.encerrar()
+
+indice_filtros = None
+if os.path.exists(os.path.join(CSV, ARQUIVO_CLIENTES)):
+    df_clientes_filtros, = registro.requer('clientes')
+    indice_filtros = obter_indice_filtros(versao_dados, df_clientes_filtros)
+secoes_filtradas(indice_filtros)
 
 # ============================================================================
 # COMPARAÇÃO PF vs PJ
 # ============================================================================
 
+secoes.iniciar('pf_vs_pj')
+
 st.markdown(f"""
 ## ⚖️ Comparação: PF vs PJ {criar_tooltip("Análise comparativa entre perfis de pessoa física e jurídica")}
 """, unsafe_allow_html=True)
 
-total_pf = df_pessoa['quantidade'].sum()
-total_pj = df_empresa['quantidade'].sum()
-gasto_medio_pf = (df_pessoa['quantidade'] * df_pessoa['gasto_medio_total']).sum() / total_pf
-gasto_medio_pj = (df_empresa['quantidade'] * df_empresa['gasto_medio_total']).sum() / total_pj
-freq_media_pf = (df_pessoa['quantidade'] * df_pessoa['frequencia_media']).sum() / total_pf
-freq_media_pj = (df_empresa['quantidade'] * df_empresa['frequencia_media']).sum() / total_pj
+total_pf = kpis['total_pf']
+total_pj = kpis['total_pj']
+gasto_medio_pf = kpis['gasto_medio_pf']
+gasto_medio_pj = kpis['gasto_medio_pj']
+freq_media_pf = kpis['freq_media_pf']
+freq_media_pj = kpis['freq_media_pj']
 
 col1, col2 = st.columns(2, gap="small")
 
 with col1:
-    html_content = f'<div class="bento-card" style="border: 2px solid {tema_atual["accent2"]};">'
-    html_content += '<h3>👥 PESSOA FÍSICA</h3>'
-    html_content += '<div style="text-align: center; margin: 20px 0;">'
-    html_content += f'<div style="font-size: 2.8rem; font-weight: 900; background: linear-gradient(90deg, {tema_atual["accent1"]}, {tema_atual["accent2"]}, {tema_atual["accent3"]}); -webkit-background-clip: text; -webkit-text-fill-color: transparent; background-clip: text; color: transparent; display: inline-block;">{formatar_numero(total_pf)}</div>'
-    html_content += '<div style="color: #888; font-size: 0.85rem; margin-top: 8px; letter-spacing: 1px;">CLIENTES TOTAIS</div>'
-    html_content += '</div>'
-    html_content += '<hr style="border: 1px solid rgba(255,255,255,0.1); margin: 20px 0;">'
-    html_content += '<div style="display: grid; grid-template-columns: 1fr 1fr; gap: 16px; margin-top: 20px;">'
-    html_content += f'<div style="text-align: center; padding: 16px; background: rgba(59, 130, 246, 0.1); border-radius: 12px;">'
-    html_content += f'<div style="font-size: 1.5rem; color: {tema_atual["accent2"]}; font-weight: 700;">R$ {formatar_numero(gasto_medio_pf)}</div>'
-    html_content += '<div style="color: #888; font-size: 0.75rem; margin-top: 4px;">GASTO MÉDIO</div>'
-    html_content += '</div>'
-    html_content += f'<div style="text-align: center; padding: 16px; background: rgba(124, 58, 237, 0.1); border-radius: 12px;">'
-    html_content += f'<div style="font-size: 1.5rem; color: {tema_atual["accent3"]}; font-weight: 700;">{freq_media_pf:.1f}</div>'
-    html_content += '<div style="color: #888; font-size: 0.75rem; margin-top: 4px;">FREQ. MÉDIA</div>'
-    html_content += '</div>'
-    html_content += '</div>'
-    html_content += '</div>'
-    
-    st.markdown(html_content, unsafe_allow_html=True)
+    def card_comparacao_pf():
+        html_content = f'<div class="bento-card" style="border: 2px solid {tema_atual["accent2"]};">'
+        html_content += '<h3>👥 PESSOA FÍSICA</h3>'
+        html_content += '<div style="text-align: center; margin: 20px 0;">'
+        html_content += f'<div style="font-size: 2.8rem; font-weight: 900; background: linear-gradient(90deg, {tema_atual["accent1"]}, {tema_atual["accent2"]}, {tema_atual["accent3"]}); -webkit-background-clip: text; -webkit-text-fill-color: transparent; background-clip: text; color: transparent; display: inline-block;">{formatar_numero(total_pf)}</div>'
+        html_content += '<div style="color: #888; font-size: 0.85rem; margin-top: 8px; letter-spacing: 1px;">CLIENTES TOTAIS</div>'
+        html_content += '</div>'
+        html_content += '<hr style="border: 1px solid rgba(255,255,255,0.1); margin: 20px 0;">'
+        html_content += '<div style="display: grid; grid-template-columns: 1fr 1fr; gap: 16px; margin-top: 20px;">'
+        html_content += f'<div style="text-align: center; padding: 16px; background: rgba(59, 130, 246, 0.1); border-radius: 12px;">'
+        html_content += f'<div style="font-size: 1.5rem; color: {tema_atual["accent2"]}; font-weight: 700;">R$ {formatar_numero(gasto_medio_pf)}</div>'
+        html_content += '<div style="color: #888; font-size: 0.75rem; margin-top: 4px;">GASTO MÉDIO</div>'
+        html_content += '</div>'
+        html_content += f'<div style="text-align: center; padding: 16px; background: rgba(124, 58, 237, 0.1); border-radius: 12px;">'
+        html_content += f'<div style="font-size: 1.5rem; color: {tema_atual["accent3"]}; font-weight: 700;">{freq_media_pf:.1f}</div>'
+        html_content += '<div style="color: #888; font-size: 0.75rem; margin-top: 4px;">FREQ. MÉDIA</div>'
+        html_content += '</div>'
+        html_content += '</div>'
+        html_content += '</div>'
+        return html_content
+
+    exibir_html('comparacao_pf', card_comparacao_pf)
 
 with col2:
-    html_content = f'<div class="bento-card" style="border: 2px solid #10b981;">'
-    html_content += '<h3>🏢 PESSOA JURÍDICA</h3>'
-    html_content += '<div style="text-align: center; margin: 20px 0;">'
-    html_content += f'<div style="font-size: 2.8rem; font-weight: 900; background: linear-gradient(90deg, #10b981, #14b8a6, {tema_atual["accent1"]}); -webkit-background-clip: text; -webkit-text-fill-color: transparent; background-clip: text; color: transparent; display: inline-block;">{total_pj}</div>'
-    html_content += '<div style="color: #888; font-size: 0.85rem; margin-top: 8px; letter-spacing: 1px;">EMPRESAS TOTAIS</div>'
-    html_content += '</div>'
-    html_content += '<hr style="border: 1px solid rgba(255,255,255,0.1); margin: 20px 0;">'
-    html_content += '<div style="display: grid; grid-template-columns: 1fr 1fr; gap: 16px; margin-top: 20px;">'
-    html_content += '<div style="text-align: center; padding: 16px; background: rgba(16, 185, 129, 0.1); border-radius: 12px;">'
-    html_content += f'<div style="font-size: 1.5rem; color: #10b981; font-weight: 700;">R$ {formatar_numero(gasto_medio_pj)}</div>'
-    html_content += '<div style="color: #888; font-size: 0.75rem; margin-top: 4px;">GASTO MÉDIO</div>'
-    html_content += '</div>'
-    html_content += '<div style="text-align: center; padding: 16px; background: rgba(20, 184, 166, 0.1); border-radius: 12px;">'
-    html_content += f'<div style="font-size: 1.5rem; color: #14b8a6; font-weight: 700;">{freq_media_pj:.1f}</div>'
-    html_content += '<div style="color: #888; font-size: 0.75rem; margin-top: 4px;">FREQ. MÉDIA</div>'
-    html_content += '</div>'
-    html_content += '</div>'
-    html_content += '</div>'
-    
-    st.markdown(html_content, unsafe_allow_html=True)
+    def card_comparacao_pj():
+        html_content = f'<div class="bento-card" style="border: 2px solid #10b981;">'
+        html_content += '<h3>🏢 PESSOA JURÍDICA</h3>'
+        html_content += '<div style="text-align: center; margin: 20px 0;">'
+        html_content += f'<div style="font-size: 2.8rem; font-weight: 900; background: linear-gradient(90deg, #10b981, #14b8a6, {tema_atual["accent1"]}); -webkit-background-clip: text; -webkit-text-fill-color: transparent; background-clip: text; color: transparent; display: inline-block;">{total_pj}</div>'
+        html_content += '<div style="color: #888; font-size: 0.85rem; margin-top: 8px; letter-spacing: 1px;">EMPRESAS TOTAIS</div>'
+        html_content += '</div>'
+        html_content += '<hr style="border: 1px solid rgba(255,255,255,0.1); margin: 20px 0;">'
+        html_content += '<div style="display: grid; grid-template-columns: 1fr 1fr; gap: 16px; margin-top: 20px;">'
+        html_content += '<div style="text-align: center; padding: 16px; background: rgba(16, 185, 129, 0.1); border-radius: 12px;">'
+        html_content += f'<div style="font-size: 1.5rem; color: #10b981; font-weight: 700;">R$ {formatar_numero(gasto_medio_pj)}</div>'
+        html_content += '<div style="color: #888; font-size: 0.75rem; margin-top: 4px;">GASTO MÉDIO</div>'
+        html_content += '</div>'
+        html_content += '<div style="text-align: center; padding: 16px; background: rgba(20, 184, 166, 0.1); border-radius: 12px;">'
+        html_content += f'<div style="font-size: 1.5rem; color: #14b8a6; font-weight: 700;">{freq_media_pj:.1f}</div>'
+        html_content += '<div style="color: #888; font-size: 0.75rem; margin-top: 4px;">FREQ. MÉDIA</div>'
+        html_content += '</div>'
+        html_content += '</div>'
+        html_content += '</div>'
+        return html_content
+
+    exibir_html('comparacao_pj', card_comparacao_pj)
 
 st.markdown("<br><br>", unsafe_allow_html=True)
 
@@ -1317,55 +911,146 @@ st.markdown("<br><br>", unsafe_allow_html=True)
 # INSIGHTS FINAIS
 # ============================================================================
 
+secoes.iniciar('insights')
+
 st.markdown(f"""
 ## 💡 Insights Principais {criar_tooltip("Principais descobertas e oportunidades identificadas na análise")}
 """, unsafe_allow_html=True)
 
 col1, col2, col3, col4 = st.columns(4, gap="small")
 
-potencial_qtd = df_pessoa[df_pessoa['cluster'].str.contains('Potencial')]['quantidade'].sum()
-dormindo_qtd = df_pessoa[df_pessoa['cluster'].str.contains('Dormindo')]['quantidade'].sum()
-quase_dormindo = df_pessoa[df_pessoa['cluster'].str.contains('Quase dormindo')]
-quase_dormindo_qtd = quase_dormindo['quantidade'].sum()
-quase_dormindo_pct = (quase_dormindo_qtd / total_pf) * 100
-quase_dormindo_recencia = quase_dormindo['recencia_media'].iloc[0]
+potencial_qtd = kpis['potencial_qtd']
+dormindo_qtd = kpis['dormindo_qtd']
+quase_dormindo_qtd = kpis['quase_dormindo_qtd']
+quase_dormindo_pct = kpis['quase_dormindo_pct']
+quase_dormindo_recencia = kpis['quase_dormindo_recencia']
 
 with col1:
-    html_content = f'<div class="insight-card" style="border-left-color: {tema_atual["accent2"]}; height: 100%;">'
-    html_content += f'<h3 style="color: {tema_atual["accent2"]};">🎯 Oportunidade</h3>'
-    html_content += f'<p style="color: #c0c0c0; line-height: 1.6; font-size: 0.9rem;"><strong>{formatar_numero(potencial_qtd)}</strong> clientes no grupo <strong>Potencial</strong> são compradores recentes e representam a maior chance de cross-sell.</p>'
-    html_content += f'<div style="margin-top: 12px;">{criar_badge("HIGH PRIORITY", "blue")}</div>'
-    html_content += '</div>'
-    st.markdown(html_content, unsafe_allow_html=True)
+    def card_insight_oportunidade():
+        html_content = f'<div class="insight-card" style="border-left-color: {tema_atual["accent2"]}; height: 100%;">'
+        html_content += f'<h3 style="color: {tema_atual["accent2"]};">🎯 Oportunidade</h3>'
+        html_content += f'<p style="color: #c0c0c0; line-height: 1.6; font-size: 0.9rem;"><strong>{formatar_numero(potencial_qtd)}</strong> clientes no grupo <strong>Potencial</strong> são compradores recentes e representam a maior chance de cross-sell.</p>'
+        html_content += f'<div style="margin-top: 12px;">{criar_badge("HIGH PRIORITY", "blue")}</div>'
+        html_content += '</div>'
+        return html_content
+
+    exibir_html('insight_oportunidade', card_insight_oportunidade)
 
 with col2:
-    html_content = f'<div class="insight-card" style="border-left-color: #f59e0b; height: 100%;">'
-    html_content += '<h3 style="color: #f59e0b;">🔔 Risco de Churn</h3>'
-    html_content += f'<p style="color: #c0c0c0; line-height: 1.6; font-size: 0.9rem;"><strong>{formatar_numero(quase_dormindo_qtd)}</strong> clientes ({quase_dormindo_pct:.0f}% da base PF) estão há <strong>{quase_dormindo_recencia:.0f} dias</strong> sem comprar.</p>'
-    html_content += f'<div style="margin-top: 12px;">{criar_badge("RETENTION", "orange")}</div>'
-    html_content += '</div>'
-    st.markdown(html_content, unsafe_allow_html=True)
+    def card_insight_churn():
+        html_content = f'<div class="insight-card" style="border-left-color: #f59e0b; height: 100%;">'
+        html_content += '<h3 style="color: #f59e0b;">🔔 Risco de Churn</h3>'
+        html_content += f'<p style="color: #c0c0c0; line-height: 1.6; font-size: 0.9rem;"><strong>{formatar_numero(quase_dormindo_qtd)}</strong> clientes ({quase_dormindo_pct:.0f}% da base PF) estão há <strong>{quase_dormindo_recencia:.0f} dias</strong> sem comprar.</p>'
+        html_content += f'<div style="margin-top: 12px;">{criar_badge("RETENTION", "orange")}</div>'
+        html_content += '</div>'
+        return html_content
+
+    exibir_html('insight_churn', card_insight_churn)
 
 with col3:
-    html_content = f'<div class="insight-card" style="border-left-color: #10b981; height: 100%;">'
-    html_content += '<h3 style="color: #10b981;">💎 Alto Valor</h3>'
-    html_content += f'<p style="color: #c0c0c0; line-height: 1.6; font-size: 0.9rem;">Empresas <strong>VIP</strong> gastam em média <strong>R$ {formatar_numero(gasto_medio_pj)}</strong>, representando <strong>{gasto_medio_pj/gasto_medio_pf:.0f}x</strong> o valor de PF.</p>'
-    html_content += f'<div style="margin-top: 12px;">{criar_badge("PREMIUM", "cyan")}</div>'
-    html_content += '</div>'
-    st.markdown(html_content, unsafe_allow_html=True)
+    def card_insight_alto_valor():
+        html_content = f'<div class="insight-card" style="border-left-color: #10b981; height: 100%;">'
+        html_content += '<h3 style="color: #10b981;">💎 Alto Valor</h3>'
+        html_content += f'<p style="color: #c0c0c0; line-height: 1.6; font-size: 0.9rem;">Empresas <strong>VIP</strong> gastam em média <strong>R$ {formatar_numero(gasto_medio_pj)}</strong>, representando <strong>{gasto_medio_pj/gasto_medio_pf:.0f}x</strong> o valor de PF.</p>'
+        html_content += f'<div style="margin-top: 12px;">{criar_badge("PREMIUM", "cyan")}</div>'
+        html_content += '</div>'
+        return html_content
+
+    exibir_html('insight_alto_valor', card_insight_alto_valor)
 
 with col4:
-    html_content = f'<div class="insight-card" style="border-left-color: #ef4444; height: 100%;">'
-    html_content += '<h3 style="color: #ef4444;">⚠️ Reativação</h3>'
-    html_content += f'<p style="color: #c0c0c0; line-height: 1.6; font-size: 0.9rem;"><strong>{formatar_numero(dormindo_qtd)}</strong> clientes dormindo há <strong>+950 dias</strong> precisam de campanhas win-back urgentes.</p>'
-    html_content += f'<div style="margin-top: 12px;">{criar_badge("ACTION NEEDED", "red")}</div>'
-    html_content += '</div>'
-    st.markdown(html_content, unsafe_allow_html=True)
+    def card_insight_reativacao():
+        html_content = f'<div class="insight-card" style="border-left-color: #ef4444; height: 100%;">'
+        html_content += '<h3 style="color: #ef4444;">⚠️ Reativação</h3>'
+        html_content += f'<p style="color: #c0c0c0; line-height: 1.6; font-size: 0.9rem;"><strong>{formatar_numero(dormindo_qtd)}</strong> clientes dormindo há <strong>+950 dias</strong> precisam de campanhas win-back urgentes.</p>'
+        html_content += f'<div style="margin-top: 12px;">{criar_badge("ACTION NEEDED", "red")}</div>'
+        html_content += '</div>'
+        return html_content
+
+    exibir_html('insight_reativacao', card_insight_reativacao)
+
+# ============================================================================
+# DRILL-DOWN POR CLUSTER
+# ============================================================================
+
+secoes.iniciar('drilldown')
+
+if os.path.exists(os.path.join(CSV, ARQUIVO_CLIENTES)):
+    st.markdown("<br><br>", unsafe_allow_html=True)
+
+    st.markdown(f"""
+    ## 🔎 Drill-down por Cluster {criar_tooltip("Clientes de um cluster, paginados e ordenados no servidor")}
+    """, unsafe_allow_html=True)
+
+    df_recomendacoes = None
+    if os.path.exists(os.path.join(CSV, ARQUIVO_RECOMENDACOES)):
+        df_clientes, df_recomendacoes = registro.requer('clientes', 'recomendacoes')
+    else:
+        df_clientes, = registro.requer('clientes')
+
+    indice = obter_indice_clusters(versao_dados, df_clientes)
+    if indice is not None:
+        col1, col2, col3, col4 = st.columns([3, 2, 1, 1], gap="small")
+        with col1:
+            cluster_drill = st.selectbox('Cluster', indice.clusters, key='drill_cluster')
+        with col2:
+            ordenar_drill = st.selectbox('Ordenar por', ['—'] + indice.colunas, key='drill_ordem')
+        with col3:
+            decrescente_drill = st.toggle('Decrescente', value=True, key='drill_decrescente')
+        with col4:
+            paginas_drill = indice.paginas(cluster_drill)
+            pagina_drill = st.number_input('Página', min_value=1, max_value=paginas_drill, value=1, key='drill_pagina')
+
+        colunas_drill = st.multiselect('Colunas', indice.colunas, default=indice.colunas, key='drill_colunas')
+        st.dataframe(
+            indice.pagina(
+                cluster_drill, min(pagina_drill, paginas_drill) - 1, TAMANHO_PAGINA,
+                ordenar_por=None if ordenar_drill == '—' else ordenar_drill,
+                decrescente=decrescente_drill,
+                colunas=colunas_drill,
+            ),
+            use_container_width=True,
+            hide_index=True,
+        )
+        st.caption(f"{formatar_numero(indice.total(cluster_drill))} clientes · página {min(pagina_drill, paginas_drill)} de {paginas_drill}")
+
+    # ============================================================================
+    # BUSCA DE CLIENTE
+    # ============================================================================
+
+    st.markdown("<br><br>", unsafe_allow_html=True)
+
+    st.markdown(f"""
+    ## 🔍 Busca de Cliente {criar_tooltip("Cluster, RFM e próximos trechos recomendados de um cliente")}
+    """, unsafe_allow_html=True)
+
+    chave_busca = st.text_input('ID do cliente (fk_contact)', key='busca_cliente')
+    if chave_busca:
+        versao_busca = obter_cache_dados().versao((ARQUIVO_CLIENTES, ARQUIVO_RECOMENDACOES))
+        cliente_busca, recomendacoes_busca = obter_busca(versao_busca, df_clientes, df_recomendacoes).buscar(chave_busca)
+        if cliente_busca is None or len(cliente_busca) == 0:
+            st.warning(f"Cliente {chave_busca} não encontrado.")
+        else:
+            linha = cliente_busca.iloc[0]
+            col1, col2, col3, col4 = st.columns(4, gap="small")
+            with col1:
+                st.markdown(criar_metric_card(str(linha['cluster']).split(' - ')[-1], str(linha['cluster']).split(' - ')[0].upper()), unsafe_allow_html=True)
+            with col2:
+                st.markdown(criar_metric_card(f"{int(linha['recency'])}d", "RECÊNCIA"), unsafe_allow_html=True)
+            with col3:
+                st.markdown(criar_metric_card(formatar_numero(linha['frequency']), "COMPRAS"), unsafe_allow_html=True)
+            with col4:
+                st.markdown(criar_metric_card(f"R$ {formatar_numero(linha['monetary'])}", "GASTO TOTAL"), unsafe_allow_html=True)
+            if recomendacoes_busca is not None and len(recomendacoes_busca):
+                st.markdown("<div style='margin-top: 16px;'></div>", unsafe_allow_html=True)
+                st.dataframe(recomendacoes_busca, use_container_width=True, hide_index=True)
 
 # ============================================================================
 # FOOTER
 # ============================================================================
 
+secoes.encerrar()
+
 st.markdown("<br><br>", unsafe_allow_html=True)
 
 st.markdown(f"""
@@ -1383,4 +1068,73 @@ st.markdown(f"""
         <span class="badge badge-purple">📊 ANALYTICS</span>
     </div>
 </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+# ============================================================================
+# PAINEL DE MEMÓRIA (ADMIN)
+# ============================================================================
+
+if TOKEN_ADMIN and st.query_params.get('admin') == TOKEN_ADMIN:
+    with st.expander("🛠️ Memória do processo (admin)", expanded=True):
+        tabela_memoria = medir_memoria()
+        totais_memoria = memoria.resumo(tabela_memoria, memoria.sessoes_ativas())
+
+        col1, col2, col3, col4 = st.columns(4, gap="small")
+        with col1:
+            st.markdown(criar_metric_card(
+                f"{totais_memoria['rss_bytes'] / 1e6:.0f} MB", "RSS DO PROCESSO"), unsafe_allow_html=True)
+        with col2:
+            st.markdown(criar_metric_card(
+                f"{totais_memoria['compartilhado_bytes'] / 1e6:.1f} MB", "COMPARTILHADO", "cache_resource + cache_data"
+            ), unsafe_allow_html=True)
+        with col3:
+            st.markdown(criar_metric_card(
+                f"{totais_memoria['por_sessao_bytes'] / 1e6:.2f} MB", "CÓPIA POR SESSÃO", "cache_data por rerun"
+            ), unsafe_allow_html=True)
+        with col4:
+            st.markdown(criar_metric_card(
+                f"{totais_memoria['estimado_bytes'] / 1e6:.1f} MB", "ESTIMADO",
+                f"{totais_memoria['sessoes']} sessões (rerun recente)"
+            ), unsafe_allow_html=True)
+
+        st.dataframe(tabela_memoria, use_container_width=True, hide_index=True)
+        st.caption(f"Cache de figuras: {obter_cache_figuras().estatisticas()}")
+        st.caption(f"Cache de cards HTML: {obter_cache_fragmentos().estatisticas()}")
+        st.caption(f"Cache de recortes (figuras): {obter_caches_recortes()['figuras'].estatisticas()}")
+        st.caption(f"Cache de dados: {obter_cache_dados().estatisticas()}")
+        st.caption("Imports tardios: " + (', '.join(
+            f"{nome} {segundos * 1000:.0f} ms" for nome, segundos in TEMPOS_TARDIOS.items()) or "nenhum"))
+
+        rastrear = st.toggle("Rastrear alocações (tracemalloc)", value=memoria.rastreando(), key='admin_tracemalloc')
+        if rastrear and not memoria.rastreando():
+            memoria.iniciar_rastreamento()
+        elif not rastrear and memoria.rastreando():
+            memoria.parar_rastreamento()
+        if rastrear and st.button("Capturar maiores alocações", key='admin_capturar'):
+            st.dataframe(memoria.maiores_alocacoes(), use_container_width=True, hide_index=True)
+
+@st.cache_resource
+def iniciar_amostragem_memoria():
+    """Mede a memória do processo numa thread própria (fora do rerun) e atualiza os gauges."""
+    cache_dados, recursos = obter_cache_dados(), recursos_compartilhados()
+    return memoria.amostrar(lambda: {**cache_dados.carregados(), **recursos}, telemetria.METRICAS)
+
+def atualizar_metricas():
+    """Gauges dos caches e dos imports tardios, calculados só quando o arquivo de métricas é gravado."""
+    caches = telemetria.METRICAS.medidor(
+        'predictfy_cache', 'Acertos, falhas e itens dos caches do processo.', 'cache_estatistica')
+    recortes = obter_caches_recortes()
+    for nome, cache in (('figuras', obter_cache_figuras()), ('fragmentos', obter_cache_fragmentos()),
+                        ('recortes_figuras', recortes['figuras']),
+                        ('recortes_fragmentos', recortes['fragmentos']), ('dados', obter_cache_dados())):
+        for estatistica, valor in cache.estatisticas().items():
+            if isinstance(valor, int) and not isinstance(valor, bool):
+                caches.definir(valor, f'{nome}:{estatistica}')
+    tardios = telemetria.METRICAS.medidor(
+        'predictfy_import_tardio_segundos', 'Tempo do import tardio de cada módulo.', 'modulo')
+    for nome, segundos in list(TEMPOS_TARDIOS.items()):
+        tardios.definir(segundos, nome)
+
+iniciar_amostragem_memoria()
+medicao_rerun.encerrar()
+telemetria.METRICAS.exportar(ARQUIVO_METRICAS, atualizar=atualizar_metricas)
@@ -0,0 +1,6 @@
+"""
+Predictfy - camada de dados e processamento da dashboard ClickBus.
+
+Módulos usados pelo `app.py` e pelos scripts de linha de comando
+(`python -m predictfy.<modulo>`).
+"""
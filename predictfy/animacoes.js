@@ -0,0 +1,13 @@
+const observer = new IntersectionObserver((entries) => {
+    entries.forEach(entry => {
+        if (entry.isIntersecting) {
+            entry.target.classList.add('fade-in');
+        }
+    });
+}, { threshold: 0.1 });
+
+setTimeout(() => {
+    document.querySelectorAll('.metric-card, .bento-card, .stPlotlyChart').forEach(el => {
+        observer.observe(el);
+    });
+}, 100);
@@ -0,0 +1,179 @@
+"""
+CSS/JS da dashboard como assets estáticos, minificados e com hash no nome.
+
+O tema (`TEMA`) é aplicado sobre `estilo.css` e `animacoes.js` uma vez, no
+build, gerando em `static/` (servido pelo Streamlit com
+`server.enableStaticServing`):
+
+    static/predictfy-<hash>.css
+    static/predictfy-<hash>.js
+    static/fonts/Inter-*.woff2        (opcional, copiado de --fontes)
+    static/manifest.json
+
+O Streamlit (1.31 a 1.37) serve `static/` como `text/plain` com `nosniff`, então o
+navegador não aceita `<link rel="stylesheet">` para esses arquivos. O app
+envia um carregador mínimo (`html_carregador`) que busca o CSS/JS com
+`fetch` (o `?v=<hash>` faz o Tornado responder com cache de longa duração)
+e os injeta na página uma vez por aba. Sem o build, o app cai para o CSS
+minificado inline.
+
+A fonte Inter é servida pelo próprio app (nada de fonts.googleapis.com em
+tempo de execução); sem os arquivos, vale `local('Inter')` e depois
+`sans-serif`.
+
+Uso:
+    python -m predictfy.assets [--fontes pasta_com_Inter-*.woff2]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+from functools import lru_cache
+from pathlib import Path
+from string import Template
+
+from predictfy.config import RAIZ_PROJETO
+
+TEMA = {
+    'bg': 'linear-gradient(135deg, #050510 0%, #0a0a15 25%, #0f0f1f 50%, #0a0a15 75%, #050510 100%)',
+    'accent1': '#0891b2',
+    'accent2': '#2563eb',
+    'accent3': '#7c3aed',
+    'glow': 'rgba(37, 99, 235, 0.5)'
+}
+
+PASTA_STATIC = RAIZ_PROJETO / 'static'
+URL_STATIC = '/app/static'
+ARQUIVO_MANIFESTO = 'manifest.json'
+PESOS_FONTE = (400, 600, 700, 900)
+
+# Vai inline junto com as partículas: esconde o iframe do carregador antes
+# de o CSS completo chegar
+CSS_CRITICO = '.element-container:has(> iframe[height="0"]){display:none}'
+
+# ============================================================================
+# RENDERIZAÇÃO E MINIFICAÇÃO
+# ============================================================================
+
+def _fontes_css(url_fontes):
+    regras = []
+    for peso in PESOS_FONTE:
+        regras.append(
+            "@font-face{font-family:'Inter';font-style:normal;font-display:swap;"
+            f"font-weight:{peso};src:local('Inter'),url('{url_fontes}/Inter-{peso}.woff2') format('woff2')}}"
+        )
+    return '\n'.join(regras)
+
+def minificar_css(texto):
+    """Remove comentários e espaços desnecessários do CSS."""
+    texto = re.sub(r'/\*.*?\*/', '', texto, flags=re.S)
+    texto = re.sub(r'\s+', ' ', texto)
+    texto = re.sub(r'\s*([{};,>])\s*', r'\1', texto)
+    texto = re.sub(r':\s+', ':', texto)
+    return texto.replace(';}', '}').strip()
+
+def minificar_js(texto):
+    """Junta as linhas e tira a indentação (o script não tem comentários `//`)."""
+    return ' '.join(linha.strip() for linha in texto.splitlines() if linha.strip())
+
+def renderizar_css(tema=TEMA, url_fontes=f'{URL_STATIC}/fonts'):
+    modelo = Template((Path(__file__).parent / 'estilo.css').read_text(encoding='utf-8'))
+    return minificar_css(modelo.substitute(tema, fontes=_fontes_css(url_fontes)))
+
+def renderizar_js():
+    return minificar_js((Path(__file__).parent / 'animacoes.js').read_text(encoding='utf-8'))
+
+@lru_cache(maxsize=1)
+def css_inline():
+    """CSS minificado para ir inline quando os assets não foram gerados."""
+    return renderizar_css() + CSS_CRITICO
+
+def _hash(texto):
+    return hashlib.blake2b(texto.encode('utf-8'), digest_size=6).hexdigest()
+
+# ============================================================================
+# BUILD
+# ============================================================================
+
+def _gravar(caminho, texto):
+    temporario = caminho.with_name(f'{caminho.name}.{os.getpid()}.tmp')
+    temporario.write_text(texto, encoding='utf-8')
+    os.replace(temporario, caminho)
+
+def construir(pasta=PASTA_STATIC, tema=TEMA, pasta_fontes=None):
+    """Gera os assets com hash e o manifesto; remove os de builds anteriores."""
+    pasta = Path(pasta)
+    pasta.mkdir(parents=True, exist_ok=True)
+    fontes = []
+    if pasta_fontes:
+        (pasta / 'fonts').mkdir(exist_ok=True)
+        for peso in PESOS_FONTE:
+            origem = Path(pasta_fontes) / f'Inter-{peso}.woff2'
+            if origem.exists():
+                shutil.copyfile(origem, pasta / 'fonts' / origem.name)
+                fontes.append(origem.name)
+
+    manifesto = {}
+    for tipo, texto in (('css', renderizar_css(tema)), ('js', renderizar_js())):
+        versao = _hash(texto)
+        nome = f'predictfy-{versao}.{tipo}'
+        _gravar(pasta / nome, texto)
+        manifesto[tipo] = {'arquivo': nome, 'versao': versao, 'bytes': len(texto.encode('utf-8'))}
+        for antigo in pasta.glob(f'predictfy-*.{tipo}'):
+            if antigo.name != nome:
+                antigo.unlink()
+    manifesto['fontes'] = fontes
+    _gravar(pasta / ARQUIVO_MANIFESTO, json.dumps(manifesto, indent=2))
+    return manifesto
+
+def ler_manifesto(pasta=PASTA_STATIC):
+    """Manifesto do último build (None se os assets não foram gerados)."""
+    try:
+        manifesto = json.loads((Path(pasta) / ARQUIVO_MANIFESTO).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+    if not all((Path(pasta) / manifesto[t]['arquivo']).exists() for t in ('css', 'js')):
+        return None
+    return manifesto
+
+# ============================================================================
+# CARREGADOR
+# ============================================================================
+
+def html_carregador(manifesto, url_static=URL_STATIC):
+    """HTML do iframe (componente) que injeta CSS e JS na página uma vez por aba."""
+    css, js = manifesto['css'], manifesto['js']
+    return (
+        '<script>(function(){'
+        'var p=window.parent,d=p.document;'
+        f"if(!d.getElementById('predictfy-css-{css['versao']}')){{"
+        f"fetch('{url_static}/{css['arquivo']}?v={css['versao']}').then(function(r){{return r.text()}})"
+        ".then(function(t){var s=d.createElement('style');"
+        f"s.id='predictfy-css-{css['versao']}';s.textContent=t;d.head.appendChild(s)}})}}"
+        f"if(p.__predictfyJs!=='{js['versao']}'){{p.__predictfyJs='{js['versao']}';"
+        f"fetch('{url_static}/{js['arquivo']}?v={js['versao']}').then(function(r){{return r.text()}})"
+        ".then(function(t){new p.Function(t)()})}"
+        '})()</script>'
+    )
+
+# ============================================================================
+# LINHA DE COMANDO
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera os assets estáticos (CSS/JS com hash) da dashboard.")
+    parser.add_argument('--pasta', default=str(PASTA_STATIC), help="Pasta servida em /app/static.")
+    parser.add_argument('--fontes', default=None, help="Pasta com Inter-400/600/700/900.woff2.")
+    args = parser.parse_args(argv)
+
+    manifesto = construir(args.pasta, pasta_fontes=args.fontes)
+    for tipo in ('css', 'js'):
+        print(f"✅ {manifesto[tipo]['arquivo']} ({manifesto[tipo]['bytes'] / 1024:.1f} KB)")
+    if not manifesto['fontes']:
+        print("⚠️  Sem arquivos da fonte Inter: usando local('Inter') / sans-serif")
+
+if __name__ == '__main__':
+    main()
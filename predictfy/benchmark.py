@@ -0,0 +1,253 @@
+"""
+Benchmark da dashboard (cold start, reruns, seções, memória e payload).
+
+Para cada tamanho de base gera dados sintéticos (`predictfy.gerador`, com
+compras) e o cubo de compras (`predictfy.cubo`) em uma pasta temporária e
+roda o `app.py` sem navegador (Streamlit `AppTest`) em um subprocesso
+isolado, medindo:
+
+- cold start: primeira execução, com caches vazios;
+- rerun: execuções seguintes da mesma sessão (mediana e p95);
+- tempo por seção (métricas, comparação rápida, PF, PJ, PF vs PJ, insights,
+  drill-down, busca);
+- interações: troca de período (últimos `DIAS_PERIODO` dias do cubo, na
+  primeira vez e repetida) e filtros de tipo e cluster sobre esse período;
+- pico de RSS do processo;
+- bytes enviados (total e só das figuras).
+
+O resultado vai para um JSON que pode ser comparado com uma execução
+anterior para barrar regressões antes do deploy.
+
+Uso:
+    python -m predictfy.benchmark --tamanhos 1000 100000 --saida bench.json
+    python -m predictfy.benchmark --comparar bench_main.json --saida bench.json
+"""
+
+import argparse
+import datetime as dt
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from predictfy import cubo, gerador
+from predictfy.config import RAIZ_PROJETO
+
+TAMANHOS_PADRAO = (1_000, 100_000, 1_000_000)
+RERUNS_PADRAO = 5
+TOLERANCIA_PADRAO = 0.20
+# Período escolhido na interação de troca de período (fim do cubo para trás)
+DIAS_PERIODO = 90
+
+# Trecho de markdown que abre cada seção da página, na ordem em que aparecem
+MARCADORES_SECOES = (
+    ('metricas', 'TOTAL CLIENTES'),
+    ('comparacao_rapida', 'COMPARAÇÃO RÁPIDA'),
+    ('filtros', '🎛️ Filtros'),
+    ('pessoa_fisica', 'Análise: Pessoa Física'),
+    ('pessoa_juridica', 'ATENÇÃO:'),
+    ('pf_vs_pj', 'Comparação: PF vs PJ'),
+    ('insights', 'Insights Principais'),
+    ('drilldown', 'Drill-down por Cluster'),
+    ('busca', 'Busca de Cliente'),
+    ('rodape', 'DATA SCIENCE & ANALYTICS'),
+)
+
+METRICAS_REGRESSAO = (
+    'cold_start_s', 'rerun_mediana_s', 'periodo_s', 'periodo_rerun_s', 'filtros_s', 'pico_rss_mb', 'bytes_figuras',
+)
+
+# ============================================================================
+# MEDIÇÃO (SUBPROCESSO)
+# ============================================================================
+
+def _secoes(eventos, inicio, fim):
+    """Duração de cada seção a partir dos horários de envio dos elementos.
+
+    Uma seção começa quando o último elemento da seção anterior foi enviado
+    e termina quando a próxima começa.
+    """
+    inicios = []
+    pendentes = list(MARCADORES_SECOES)
+    for k, (_, tipo, proto) in enumerate(eventos):
+        if tipo != 'markdown':
+            continue
+        # Seções opcionais (ex.: drill-down sem cliente.csv) podem faltar
+        for marcador in pendentes:
+            if marcador[1] in proto.body:
+                inicios.append((marcador[0], eventos[k - 1][0] if k else inicio))
+                pendentes.remove(marcador)
+                break
+    limites = [t for _, t in inicios[1:]] + [fim]
+    duracoes = {nome: limite - t for (nome, t), limite in zip(inicios, limites)}
+    duracoes.pop('rodape', None)
+    return duracoes
+
+def _executar(app, eventos):
+    """Roda o app uma vez e devolve tempo, seções e bytes da execução."""
+    eventos.clear()
+    inicio = time.perf_counter()
+    app.run()
+    fim = time.perf_counter()
+    if app.exception:
+        raise RuntimeError(app.exception[0].message)
+    return {
+        'tempo_s': fim - inicio,
+        'secoes_s': _secoes(eventos, inicio, fim),
+        'bytes_total': sum(len(p.SerializeToString()) for _, _, p in eventos),
+        'bytes_figuras': sum(len(p.spec) for _, t, p in eventos if t == 'plotly_chart'),
+    }
+
+def _interagir(app, eventos):
+    """Troca o período para os últimos `DIAS_PERIODO` dias e aplica filtros de tipo e cluster."""
+    try:
+        periodo = app.date_input(key='periodo')
+    except KeyError:
+        raise RuntimeError("a página não mostrou o seletor de período (cubo ausente?)") from None
+    _, ultima = periodo.value
+    periodo.set_value((max(periodo.min, ultima - dt.timedelta(days=DIAS_PERIODO)), ultima))
+    primeira_vez = _executar(app, eventos)
+    repetida = _executar(app, eventos)
+
+    app.radio(key='filtro_tipo').set_value('PJ')
+    clusters = app.multiselect(key='filtro_clusters')
+    clusters.set_value(clusters.options[:1])
+    filtros = _executar(app, eventos)
+    return {
+        'periodo_s': primeira_vez['tempo_s'],
+        'periodo_rerun_s': repetida['tempo_s'],
+        'filtros_s': filtros['tempo_s'],
+        'secoes_periodo_s': repetida['secoes_s'],
+    }
+
+def medir(pasta, reruns):
+    """Roda o app na pasta de dados e devolve as medições (executado no subprocesso)."""
+    os.environ['PREDICTFY_CSV'] = str(pasta)
+    sys.path.insert(0, str(RAIZ_PROJETO))
+
+    from streamlit.delta_generator import DeltaGenerator
+    from streamlit.testing.v1 import AppTest
+
+    eventos = []
+    enqueue_original = DeltaGenerator._enqueue
+
+    def _enqueue(self, delta_type, element_proto, *args, **kwargs):
+        eventos.append((time.perf_counter(), delta_type, element_proto))
+        return enqueue_original(self, delta_type, element_proto, *args, **kwargs)
+
+    DeltaGenerator._enqueue = _enqueue
+
+    app = AppTest.from_file(str(RAIZ_PROJETO / 'app.py'), default_timeout=600)
+    execucoes = [_executar(app, eventos) for _ in range(reruns + 1)]
+    interacoes = _interagir(app, eventos)
+
+    frio, quentes = execucoes[0], execucoes[1:] or execucoes[:1]
+    tempos = sorted(e['tempo_s'] for e in quentes)
+    return {
+        'cold_start_s': frio['tempo_s'],
+        'rerun_mediana_s': statistics.median(tempos),
+        'rerun_p95_s': tempos[min(len(tempos) - 1, int(round(0.95 * (len(tempos) - 1))))],
+        'secoes_frio_s': frio['secoes_s'],
+        'secoes_s': {
+            nome: statistics.median(e['secoes_s'].get(nome, 0.0) for e in quentes)
+            for nome in frio['secoes_s']
+        },
+        **interacoes,
+        # ru_maxrss vem em KB no Linux e em bytes no macOS
+        'pico_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1e6 if sys.platform == 'darwin' else 1e3),
+        'bytes_total': quentes[-1]['bytes_total'],
+        'bytes_figuras': quentes[-1]['bytes_figuras'],
+    }
+
+# ============================================================================
+# ORQUESTRAÇÃO
+# ============================================================================
+
+def executar(tamanhos, reruns, semente=42):
+    """Gera cada base e mede o app em um subprocesso novo (caches e RSS isolados)."""
+    resultados = []
+    for n in tamanhos:
+        with tempfile.TemporaryDirectory(prefix='predictfy-bench-') as pasta:
+            gerador.gerar(pasta, n, semente)
+            cubo.atualizar(pasta)
+            saida = subprocess.run(
+                [sys.executable, '-m', 'predictfy.benchmark', '--medir', pasta, '--reruns', str(reruns)],
+                cwd=RAIZ_PROJETO, capture_output=True, text=True, check=False,
+            )
+        if saida.returncode != 0:
+            raise RuntimeError(f"Benchmark com {n} clientes falhou:\n{saida.stderr}")
+        medicao = json.loads(saida.stdout.strip().splitlines()[-1])
+        resultados.append({'n_clientes': n, **medicao})
+        print(f"  {n:>12,} clientes | cold {medicao['cold_start_s']:.2f}s | "
+              f"rerun {medicao['rerun_mediana_s'] * 1000:.0f}ms | "
+              f"período {medicao['periodo_s'] * 1000:.0f}/{medicao['periodo_rerun_s'] * 1000:.0f}ms | "
+              f"filtros {medicao['filtros_s'] * 1000:.0f}ms | "
+              f"RSS {medicao['pico_rss_mb']:.0f}MB | figuras {medicao['bytes_figuras'] / 1024:.0f}KB",
+              file=sys.stderr)
+    return resultados
+
+def comparar(atual, base, tolerancia):
+    """Lista as métricas que pioraram mais que `tolerancia` em relação à base."""
+    base_por_n = {r['n_clientes']: r for r in base['resultados']}
+    regressoes = []
+    for r in atual['resultados']:
+        anterior = base_por_n.get(r['n_clientes'])
+        if anterior is None:
+            continue
+        for metrica in METRICAS_REGRESSAO:
+            if anterior.get(metrica) and r[metrica] > anterior[metrica] * (1 + tolerancia):
+                regressoes.append(
+                    f"{r['n_clientes']} clientes: {metrica} {anterior[metrica]:.4g} -> {r[metrica]:.4g}"
+                )
+    return regressoes
+
+# ============================================================================
+# LINHA DE COMANDO
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de cold start, reruns e memória do app.py.")
+    parser.add_argument('--tamanhos', nargs='+', type=int, default=list(TAMANHOS_PADRAO),
+                        help="Números de clientes das bases geradas.")
+    parser.add_argument('--reruns', type=int, default=RERUNS_PADRAO)
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--saida', default=None, help="Arquivo JSON de resultados (padrão: stdout).")
+    parser.add_argument('--comparar', default=None, help="JSON de uma execução anterior para checar regressões.")
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA_PADRAO)
+    parser.add_argument('--medir', default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.medir:
+        print(json.dumps(medir(args.medir, args.reruns)))
+        return 0
+
+    relatorio = {
+        'data': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'reruns': args.reruns,
+        'resultados': executar(args.tamanhos, args.reruns, args.semente),
+    }
+    texto = json.dumps(relatorio, indent=2, ensure_ascii=False)
+    if args.saida:
+        Path(args.saida).write_text(texto, encoding='utf-8')
+    else:
+        print(texto)
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            regressoes = comparar(relatorio, json.load(f), args.tolerancia)
+        for r in regressoes:
+            print(f"❌ Regressão: {r}", file=sys.stderr)
+        return 1 if regressoes else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
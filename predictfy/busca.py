@@ -0,0 +1,176 @@
+"""
+Busca indexada de clientes (cluster, RFM e recomendações) por `fk_contact`.
+
+Cada tabela ganha um `IndiceChave`: as chaves em ordem crescente e a
+permutação que leva de volta às linhas do DataFrame. Uma busca são duas
+buscas binárias (`np.searchsorted`), sem varrer a tabela:
+
+    chaves_ordenadas[i:j] == chave  ->  linhas ordem[i:j]
+
+Chaves inteiras são usadas como estão; chaves texto (ids com hash na base
+real) viram um hash de 64 bits (`pd.util.hash_array`), e o resultado é
+conferido contra a chave original para descartar colisões.
+
+Os índices são gravados em `.cache/busca-<versão>.npz` e reaproveitados
+enquanto os CSVs não mudarem.
+
+Uso:
+    python -m predictfy.busca 12345 [--pasta Desafios/data/csv]
+"""
+
+import argparse
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from predictfy import dados
+from predictfy.cache_colunar import NOME_PASTA_CACHE
+from predictfy.config import (
+    ARQUIVO_CLIENTES,
+    ARQUIVO_RECOMENDACOES,
+    COLUNA_CLIENTE,
+    PASTA_CSV,
+)
+
+# ============================================================================
+# ÍNDICE
+# ============================================================================
+
+def chaves_pesquisaveis(valores):
+    """Chaves pesquisáveis (int64 ou hash uint64) de um array de ids."""
+    valores = np.asarray(valores)
+    if valores.dtype.kind in 'iu':
+        return valores.astype('int64')
+    return pd.util.hash_array(valores.astype(object))
+
+def converter_chave(chave, exemplo):
+    """Converte a chave digitada para o tipo dos ids da tabela (None se impossível)."""
+    if np.asarray(exemplo).dtype.kind in 'iu':
+        try:
+            return int(str(chave).strip())
+        except ValueError:
+            return None
+    return str(chave).strip()
+
+class IndiceChave:
+    """Chaves ordenadas + permutação das linhas de uma coluna de ids."""
+
+    def __init__(self, chaves_ordenadas, ordem):
+        self.chaves_ordenadas = chaves_ordenadas
+        self.ordem = ordem
+
+    @classmethod
+    def construir(cls, valores):
+        chaves = chaves_pesquisaveis(valores)
+        ordem = np.argsort(chaves, kind='stable')
+        return cls(chaves[ordem], ordem)
+
+    def linhas(self, chave):
+        """Posições das linhas cuja chave (já em `chaves_pesquisaveis`) é `chave`."""
+        i = np.searchsorted(self.chaves_ordenadas, chave, side='left')
+        j = np.searchsorted(self.chaves_ordenadas, chave, side='right')
+        return self.ordem[i:j]
+
+    def linhas_em_lote(self, chaves):
+        """Posições das linhas de várias chaves de uma vez (lista de arrays)."""
+        inicios = np.searchsorted(self.chaves_ordenadas, chaves, side='left')
+        fins = np.searchsorted(self.chaves_ordenadas, chaves, side='right')
+        return [self.ordem[i:j] for i, j in zip(inicios, fins)]
+
+class BuscaClientes:
+    """Busca de um cliente na tabela de clientes e nas recomendações."""
+
+    def __init__(self, df_clientes, df_recomendacoes, indices):
+        self.df_clientes = df_clientes
+        self.df_recomendacoes = df_recomendacoes
+        self.indices = indices
+
+    def _buscar(self, nome, df, chave):
+        if df is None or nome not in self.indices:
+            return None
+        ids = df[COLUNA_CLIENTE]
+        valor = converter_chave(chave, ids.to_numpy()[:1])
+        if valor is None:
+            return df.iloc[:0]
+        linhas = self.indices[nome].linhas(chaves_pesquisaveis(np.array([valor]))[0])
+        resultado = df.iloc[linhas]
+        # Chaves texto são hashes: confirma a chave original
+        return resultado[resultado[COLUNA_CLIENTE] == valor]
+
+    def buscar(self, chave):
+        """(linhas do cliente, recomendações ordenadas pelo ranking)."""
+        cliente = self._buscar('clientes', self.df_clientes, chave)
+        recomendacoes = self._buscar('recomendacoes', self.df_recomendacoes, chave)
+        if recomendacoes is not None and 'ranking' in recomendacoes.columns:
+            recomendacoes = recomendacoes.sort_values('ranking')
+        return cliente, recomendacoes
+
+# ============================================================================
+# PERSISTÊNCIA
+# ============================================================================
+
+def versao_indices(pasta=PASTA_CSV):
+    return dados.versao_dados(pasta, (ARQUIVO_CLIENTES, ARQUIVO_RECOMENDACOES))
+
+def caminho_indices(pasta, versao):
+    return Path(pasta) / NOME_PASTA_CACHE / f'busca-{versao}.npz'
+
+def carregar_indices(caminho):
+    with np.load(caminho) as npz:
+        nomes = {k.rsplit('__', 1)[0] for k in npz.files}
+        return {n: IndiceChave(npz[f'{n}__chaves'], npz[f'{n}__ordem']) for n in nomes}
+
+def salvar_indices(indices, caminho):
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    arrays = {}
+    for nome, indice in indices.items():
+        arrays[f'{nome}__chaves'] = indice.chaves_ordenadas
+        arrays[f'{nome}__ordem'] = indice.ordem
+    temporario = caminho.with_name(f'{caminho.stem}.{os.getpid()}.tmp.npz')
+    np.savez(temporario, **arrays)
+    os.replace(temporario, caminho)
+
+def abrir(pasta=PASTA_CSV, df_clientes=None, df_recomendacoes=None, versao=None):
+    """`BuscaClientes` com índices lidos do disco ou construídos.
+
+    `versao` é a dos DataFrames recebidos (ex.: `CacheDados.versao`); sem ela,
+    vale a dos arquivos na pasta (`versao_indices`). Com a do chamador, os
+    índices ficam presos aos dados que ele de fato carregou, mesmo que os
+    arquivos tenham mudado desde então.
+    """
+    caminho = caminho_indices(pasta, versao or versao_indices(pasta))
+    try:
+        indices = carregar_indices(caminho)
+    except (OSError, ValueError, KeyError):
+        indices = {}
+        for nome, df in (('clientes', df_clientes), ('recomendacoes', df_recomendacoes)):
+            if df is not None:
+                indices[nome] = IndiceChave.construir(df[COLUNA_CLIENTE].to_numpy())
+        try:
+            salvar_indices(indices, caminho)
+        except OSError:
+            pass
+    return BuscaClientes(df_clientes, df_recomendacoes, indices)
+
+# ============================================================================
+# LINHA DE COMANDO
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Busca um cliente por fk_contact.")
+    parser.add_argument('chaves', nargs='+')
+    parser.add_argument('--pasta', default=str(PASTA_CSV), help="Pasta com os CSVs.")
+    args = parser.parse_args(argv)
+
+    busca = abrir(args.pasta, dados.ler_clientes(args.pasta), dados.ler_recomendacoes(args.pasta))
+    for chave in args.chaves:
+        cliente, recomendacoes = busca.buscar(chave)
+        print(f"== {chave}")
+        print(cliente.to_string(index=False) if cliente is not None and len(cliente) else "cliente não encontrado")
+        if recomendacoes is not None and len(recomendacoes):
+            print(recomendacoes.to_string(index=False))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Cache colunar (Parquet) para os CSVs da dashboard.
+
+Na primeira leitura o CSV é convertido para Parquet em `.cache/` ao lado do
+arquivo original; as leituras seguintes usam o Parquet enquanto o CSV não
+mudar. A validação é em duas etapas:
+
+1. `mtime` + tamanho iguais aos registrados -> usa o cache direto;
+2. senão, compara o hash do conteúdo (o arquivo pode ter sido só "tocado").
+
+Um `preparar(df)` opcional (ex.: o plano de tipos de `predictfy.esquema`)
+é aplicado antes de gravar o Parquet, então o cache já guarda a versão
+preparada. A assinatura do cache inclui um hash do código-fonte do módulo
+de `preparar`: mudar o plano de tipos invalida os Parquets antigos. Sem `pyarrow` disponível a leitura cai para `pd.read_csv` normal.
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_DISPONIVEL = True
+except ImportError:
+    PARQUET_DISPONIVEL = False
+
+NOME_PASTA_CACHE = '.cache'
+VERSAO_FORMATO = 1
+TAMANHO_LEITURA_HASH = 1 << 20
+
+# ============================================================================
+# HASH E METADADOS
+# ============================================================================
+
+def hash_arquivo(caminho):
+    """Hash BLAKE2b do conteúdo do arquivo, lido em blocos de 1 MB."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(caminho, 'rb') as f:
+        while bloco := f.read(TAMANHO_LEITURA_HASH):
+            h.update(bloco)
+    return h.hexdigest()
+
+def _assinatura_leitura(kwargs):
+    """Identifica as opções de leitura (dtypes, colunas...) usadas no cache."""
+    return hashlib.blake2b(
+        json.dumps(kwargs, sort_keys=True, default=str).encode(), digest_size=8
+    ).hexdigest()
+
+@functools.lru_cache(maxsize=None)
+def _hash_fonte(modulo):
+    try:
+        fonte = inspect.getsource(modulo)
+    except (OSError, TypeError):
+        return None
+    return hashlib.blake2b(fonte.encode(), digest_size=8).hexdigest()
+
+def _versao_preparo(preparar):
+    """Nome e hash do código-fonte do módulo de `preparar` (pega mudanças nas funções que ele chama)."""
+    modulo = inspect.getmodule(preparar)
+    return f'{preparar.__qualname__}@{_hash_fonte(modulo) if modulo else None}'
+
+def caminhos_cache(caminho, kwargs=None):
+    """Retorna (parquet, metadados) do cache de um CSV."""
+    caminho = Path(caminho)
+    pasta = caminho.parent / NOME_PASTA_CACHE
+    base = f'{caminho.stem}-{_assinatura_leitura(kwargs or {})}'
+    return pasta / f'{base}.parquet', pasta / f'{base}.json'
+
+def _ler_metadados(caminho_meta):
+    try:
+        with open(caminho_meta, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _gravar_atomico(caminho, escrever):
+    """Escreve em arquivo temporário e troca de uma vez (leitores nunca veem meio arquivo)."""
+    temporario = caminho.with_name(f'{caminho.name}.{os.getpid()}.tmp')
+    escrever(temporario)
+    os.replace(temporario, caminho)
+
+# ============================================================================
+# LEITURA
+# ============================================================================
+
+def ler_csv(caminho, preparar=None, **kwargs):
+    """Lê um CSV através do cache Parquet (mesmos argumentos de `pd.read_csv`)."""
+    if not PARQUET_DISPONIVEL:
+        df = pd.read_csv(caminho, **kwargs)
+        return preparar(df) if preparar else df
+
+    caminho = Path(caminho)
+    assinatura = {**kwargs, 'preparar': _versao_preparo(preparar)} if preparar else kwargs
+    caminho_parquet, caminho_meta = caminhos_cache(caminho, assinatura)
+    stat = caminho.stat()
+    meta = _ler_metadados(caminho_meta)
+    cache_existe = meta is not None and meta.get('versao') == VERSAO_FORMATO and caminho_parquet.exists()
+
+    if cache_existe and meta['mtime_ns'] == stat.st_mtime_ns and meta['tamanho'] == stat.st_size:
+        return pd.read_parquet(caminho_parquet)
+
+    conteudo = hash_arquivo(caminho)
+    if cache_existe and meta['hash'] == conteudo:
+        df = pd.read_parquet(caminho_parquet)
+    else:
+        df = pd.read_csv(caminho, **kwargs)
+        if preparar:
+            df = preparar(df)
+        try:
+            caminho_parquet.parent.mkdir(exist_ok=True)
+            _gravar_atomico(caminho_parquet, lambda p: df.to_parquet(p, index=False))
+        except OSError:
+            # Pasta somente leitura: segue sem cache
+            return df
+
+    meta = {
+        'versao': VERSAO_FORMATO,
+        'fonte': caminho.name,
+        'mtime_ns': stat.st_mtime_ns,
+        'tamanho': stat.st_size,
+        'hash': conteudo,
+    }
+    try:
+        _gravar_atomico(caminho_meta, lambda p: p.write_text(json.dumps(meta), encoding='utf-8'))
+    except OSError:
+        pass
+    return df
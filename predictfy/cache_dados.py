@@ -0,0 +1,280 @@
+"""
+Cache de datasets do processo que acompanha os arquivos da pasta de dados.
+
+`VigiaArquivos` observa os arquivos da pasta (eventos do `watchdog`, se
+instalado, e polling em qualquer caso) e só considera uma mudança depois que
+o tamanho e o `mtime` ficam iguais em duas verificações seguidas: um CSV
+ainda sendo gravado pelo job noturno não é lido pela metade.
+
+`CacheDados` guarda um valor por dataset, marcado com a versão dos arquivos
+de que ele depende. Quando a vigia detecta uma mudança, os datasets em uso
+afetados são recarregados uma vez, na thread da vigia, enquanto as sessões
+continuam recebendo a versão anterior; depois a nova versão é publicada de
+uma vez (assinaturas e valores trocados sob a mesma trava). Se a recarga
+falhar, a versão anterior continua servindo e o erro vai para o log.
+
+Limites: `ttl` (segundos) força a releitura de um dataset antigo mesmo sem
+mudança nos arquivos, e `max_itens` despeja o dataset usado há mais tempo.
+
+Uso (acompanhar as trocas de versão de uma pasta):
+    python -m predictfy.cache_dados [--pasta Desafios/data/csv] [--intervalo 5]
+"""
+
+import argparse
+import logging
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from predictfy import dados
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+    WATCHDOG_DISPONIVEL = True
+except ImportError:
+    WATCHDOG_DISPONIVEL = False
+
+logger = logging.getLogger(__name__)
+
+INTERVALO_POLLING = 5.0
+INTERVALO_ESTABILIZACAO = 1.0
+MAX_ITENS = 8
+
+# ============================================================================
+# VIGIA
+# ============================================================================
+
+class VigiaArquivos:
+    """Detecta, em segundo plano, mudanças estáveis nos arquivos de uma pasta.
+
+    `ao_mudar(assinaturas, mudados)` é chamado na thread da vigia com as
+    novas assinaturas ({arquivo: (tamanho, mtime_ns)}) e os arquivos que mudaram.
+    """
+
+    def __init__(self, pasta, arquivos, ao_mudar, intervalo=INTERVALO_POLLING):
+        self.pasta = Path(pasta)
+        self.arquivos = tuple(arquivos)
+        self.ao_mudar = ao_mudar
+        self.intervalo = intervalo
+        self.assinaturas = dados.assinaturas_arquivos(self.pasta, self.arquivos)
+        self._candidatas = None
+        self._acordar = threading.Event()
+        self._parar = threading.Event()
+        self._thread = None
+        self._observador = None
+
+    def verificar(self):
+        """Compara com os arquivos no disco; True se uma mudança estável foi publicada."""
+        atuais = dados.assinaturas_arquivos(self.pasta, self.arquivos)
+        if atuais == self.assinaturas:
+            self._candidatas = None
+            return False
+        if atuais != self._candidatas:
+            # Mudou desde a última olhada: espera ficar igual na próxima
+            self._candidatas = atuais
+            return False
+        mudados = {n for n in set(atuais) | set(self.assinaturas) if atuais.get(n) != self.assinaturas.get(n)}
+        self._candidatas = None
+        self.ao_mudar(atuais, mudados)
+        self.assinaturas = atuais
+        return True
+
+    def _laco(self):
+        while not self._parar.is_set():
+            espera = INTERVALO_ESTABILIZACAO if self._candidatas is not None else self.intervalo
+            if self._acordar.wait(espera):
+                self._acordar.clear()
+                # Vários eventos chegam juntos numa troca de arquivo: dá tempo de terminarem
+                self._parar.wait(INTERVALO_ESTABILIZACAO)
+            try:
+                self.verificar()
+            except Exception:
+                logger.exception("falha ao verificar os arquivos de %s", self.pasta)
+
+    def _observar(self):
+        arquivos = set(self.arquivos)
+        acordar = self._acordar
+
+        class Eventos(FileSystemEventHandler):
+            def on_any_event(self, evento):
+                caminhos = (evento.src_path, getattr(evento, 'dest_path', ''))
+                if any(Path(c).name in arquivos for c in caminhos if c):
+                    acordar.set()
+
+        try:
+            observador = Observer()
+            observador.schedule(Eventos(), str(self.pasta), recursive=False)
+            observador.daemon = True
+            observador.start()
+        except OSError as e:
+            logger.warning("watchdog indisponível para %s (%s): só polling", self.pasta, e)
+            return None
+        return observador
+
+    def iniciar(self):
+        if self._thread is None:
+            if WATCHDOG_DISPONIVEL and self.pasta.is_dir():
+                self._observador = self._observar()
+            self._thread = threading.Thread(target=self._laco, name='predictfy-vigia', daemon=True)
+            self._thread.start()
+        return self
+
+    def parar(self):
+        self._parar.set()
+        self._acordar.set()
+        if self._observador is not None:
+            self._observador.stop()
+
+# ============================================================================
+# CACHE
+# ============================================================================
+
+class CacheDados:
+    """Datasets do processo, recarregados uma vez quando os arquivos de que dependem mudam."""
+
+    def __init__(self, pasta, ttl=None, max_itens=MAX_ITENS, intervalo=INTERVALO_POLLING):
+        self.pasta = Path(pasta)
+        self.ttl = ttl
+        self.max_itens = max_itens
+        self.intervalo = intervalo
+        self._fontes = {}
+        self._itens = OrderedDict()
+        self._travas = {}
+        self._trava = threading.Lock()
+        self._recarga = threading.local()
+        self._vigia = None
+        self.assinaturas = {}
+        self.acertos = 0
+        self.falhas = 0
+        self.recargas = 0
+        self.despejos = 0
+
+    def registrar(self, nome, carregar, arquivos):
+        """Registra `carregar()` como fonte de `nome`, dependente de `arquivos` da pasta."""
+        self._fontes[nome] = (carregar, tuple(arquivos))
+        self._travas[nome] = threading.Lock()
+
+    def iniciar(self):
+        """Começa a vigiar os arquivos de todos os datasets registrados."""
+        arquivos = dict.fromkeys(a for _, fonte in self._fontes.values() for a in fonte)
+        self._vigia = VigiaArquivos(self.pasta, arquivos, self._publicar, self.intervalo)
+        self.assinaturas = self._vigia.assinaturas
+        self._vigia.iniciar()
+        return self
+
+    def versao(self, arquivos):
+        """Versão publicada dos `arquivos` (mesmo valor de `dados.versao_dados`)."""
+        # Durante uma recarga, a thread da vigia já enxerga a versão nova
+        assinaturas = getattr(self._recarga, 'assinaturas', None) or self.assinaturas
+        return dados.versao_assinaturas(assinaturas, arquivos)
+
+    def _valido(self, item, versao):
+        return item is not None and item[0] == versao and (
+            self.ttl is None or time.monotonic() - item[1] < self.ttl)
+
+    def obter(self, nome):
+        """Valor atual do dataset, carregado na primeira vez (ou se venceu o TTL)."""
+        carregar, arquivos = self._fontes[nome]
+        novos = getattr(self._recarga, 'novos', None)
+        if novos and nome in novos:
+            return novos[nome][1]
+        with self._trava:
+            versao = self.versao(arquivos)
+            item = self._itens.get(nome)
+            if self._valido(item, versao):
+                self._itens.move_to_end(nome)
+                self.acertos += 1
+                return item[2]
+        # Uma carga por dataset no processo: as outras sessões esperam por ela
+        with self._travas[nome]:
+            with self._trava:
+                versao = self.versao(arquivos)
+                item = self._itens.get(nome)
+                if self._valido(item, versao):
+                    return item[2]
+                self.falhas += 1
+            valor = carregar()
+            with self._trava:
+                self._guardar(nome, versao, valor)
+        return valor
+
+    def _guardar(self, nome, versao, valor):
+        self._itens[nome] = (versao, time.monotonic(), valor)
+        self._itens.move_to_end(nome)
+        while len(self._itens) > self.max_itens:
+            self._itens.popitem(last=False)
+            self.despejos += 1
+
+    def _publicar(self, assinaturas, mudados):
+        """Recarrega os datasets em uso afetados e publica a nova versão (thread da vigia)."""
+        novos = {}
+        self._recarga.assinaturas, self._recarga.novos = assinaturas, novos
+        try:
+            # Na ordem de registro: um dataset derivado (ex.: snapshot) vem depois da sua fonte
+            for nome, (carregar, arquivos) in self._fontes.items():
+                if nome not in self._itens or not mudados & set(arquivos):
+                    continue
+                versao = dados.versao_assinaturas(assinaturas, arquivos)
+                inicio = time.perf_counter()
+                with self._travas[nome]:
+                    try:
+                        novos[nome] = (versao, carregar())
+                    except Exception:
+                        logger.exception("falha ao recarregar '%s': mantendo a versão anterior", nome)
+                        anterior = self._itens.get(nome)
+                        if anterior is not None:
+                            novos[nome] = (versao, anterior[2])
+                        continue
+                logger.info("dataset '%s' recarregado em %.3fs (%s)", nome, time.perf_counter() - inicio,
+                            ', '.join(sorted(mudados & set(arquivos))))
+        finally:
+            self._recarga.assinaturas = self._recarga.novos = None
+        with self._trava:
+            self.assinaturas = assinaturas
+            for nome, (versao, valor) in novos.items():
+                self._guardar(nome, versao, valor)
+            self.recargas += 1
+
+    def carregados(self):
+        """{nome: valor} dos datasets em memória."""
+        with self._trava:
+            return {nome: item[2] for nome, item in self._itens.items()}
+
+    def estatisticas(self):
+        with self._trava:
+            return {
+                'itens': list(self._itens),
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'recargas': self.recargas,
+                'despejos': self.despejos,
+                'watchdog': self._vigia is not None and self._vigia._observador is not None,
+            }
+
+# ============================================================================
+# LINHA DE COMANDO
+# ============================================================================
+
+def main(argv=None):
+    from predictfy.config import ARQUIVO_CLUSTERS, PASTA_CSV
+
+    parser = argparse.ArgumentParser(description="Acompanha a pasta de dados e recarrega o cluster.csv quando ele muda.")
+    parser.add_argument('--pasta', default=str(PASTA_CSV), help="Pasta com os CSVs.")
+    parser.add_argument('--intervalo', type=float, default=INTERVALO_POLLING, help="Segundos entre verificações.")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+
+    cache = CacheDados(args.pasta, intervalo=args.intervalo)
+    cache.registrar('clusters', lambda: dados.ler_clusters(args.pasta), (ARQUIVO_CLUSTERS,))
+    cache.iniciar()
+    print(f"✅ {len(cache.obter('clusters'))} clusters; vigiando {args.pasta} (Ctrl+C para sair)")
+    try:
+        while True:
+            time.sleep(args.intervalo)
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
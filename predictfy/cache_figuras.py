@@ -0,0 +1,148 @@
+"""
+Cache de figuras Plotly compartilhado entre sessões.
+
+Guarda o JSON já serializado de cada figura, por versão dos dados e nome do
+gráfico. Um acerto evita a construção da figura (agregações e Plotly
+Express); a página passa o JSON como dict ao `st.plotly_chart`. O cache é
+limitado em número de itens e em bytes, com despejo LRU (menos usado
+recentemente sai primeiro).
+
+Com `pasta`, as figuras também são gravadas em disco: um processo novo (ex.:
+réplica recém-criada pelo autoscaler) lê o JSON pronto sem construir a
+figura. A pasta guarda no máximo `max_arquivos` figuras; a cada gravação as
+mais antigas (por data de modificação) são apagadas.
+
+`CacheFragmentos` é o mesmo LRU para trechos de HTML (cards da página):
+cada card é montado uma vez por versão dos dados e o texto pronto é
+servido a todas as sessões.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+MAX_ITENS = 64
+MAX_ARQUIVOS = 64
+MAX_BYTES = 32 * 1024 * 1024
+MAX_FRAGMENTOS = 256
+MAX_BYTES_FRAGMENTOS = 4 * 1024 * 1024
+
+def serializar_figura(fig):
+    """JSON da figura, no mesmo formato que o `st.plotly_chart` envia ao navegador."""
+    import plotly.io
+
+    return plotly.io.to_json(fig, validate=False)
+
+class CacheFiguras:
+    """LRU de figuras serializadas, chaveado por (versão dos dados, nome)."""
+
+    def __init__(self, max_itens=MAX_ITENS, max_bytes=MAX_BYTES, pasta=None, max_arquivos=MAX_ARQUIVOS):
+        self.max_itens = max_itens
+        self.max_bytes = max_bytes
+        self.pasta = Path(pasta) if pasta else None
+        self.max_arquivos = max_arquivos
+        self._itens = OrderedDict()
+        self._bytes = 0
+        self._trava = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.despejos = 0
+        self.leituras_disco = 0
+        self.despejos_disco = 0
+
+    def _serializar(self, valor):
+        return serializar_figura(valor)
+
+    def _caminho(self, versao, nome):
+        return self.pasta / f'{versao}-{nome}.json'
+
+    def _ler_disco(self, versao, nome):
+        if self.pasta is None:
+            return None
+        try:
+            spec = self._caminho(versao, nome).read_text(encoding='utf-8')
+        except OSError:
+            return None
+        self.leituras_disco += 1
+        return spec
+
+    def _gravar_disco(self, versao, nome, spec):
+        if self.pasta is None:
+            return
+        caminho = self._caminho(versao, nome)
+        try:
+            self.pasta.mkdir(parents=True, exist_ok=True)
+            temporario = caminho.with_name(f'{caminho.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+            temporario.write_text(spec, encoding='utf-8')
+            os.replace(temporario, caminho)
+        except OSError:
+            return
+        self._podar_disco()
+
+    def _podar_disco(self):
+        """Apaga as figuras mais antigas da pasta além de `max_arquivos`."""
+        arquivos = []
+        for caminho in self.pasta.glob('*.json'):
+            try:
+                arquivos.append((caminho.stat().st_mtime, caminho))
+            except OSError:
+                pass
+        arquivos.sort(reverse=True)
+        for _, caminho in arquivos[self.max_arquivos:]:
+            try:
+                caminho.unlink()
+            except OSError:
+                continue
+            self.despejos_disco += 1
+
+    def obter(self, versao, nome, construir):
+        """JSON da figura `nome`; chama `construir()` só se ela não estiver em cache."""
+        chave = (versao, nome)
+        with self._trava:
+            spec = self._itens.get(chave)
+            if spec is not None:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+                return spec
+            self.falhas += 1
+
+        # Construção fora da trava: outras sessões não esperam por este gráfico
+        spec = self._ler_disco(versao, nome)
+        if spec is None:
+            spec = self._serializar(construir())
+            self._gravar_disco(versao, nome, spec)
+
+        with self._trava:
+            if chave not in self._itens:
+                self._itens[chave] = spec
+                self._bytes += len(spec)
+                self._despejar()
+        return spec
+
+    def _despejar(self):
+        while self._itens and (len(self._itens) > self.max_itens or self._bytes > self.max_bytes):
+            _, spec = self._itens.popitem(last=False)
+            self._bytes -= len(spec)
+            self.despejos += 1
+
+    def estatisticas(self):
+        with self._trava:
+            return {
+                'itens': len(self._itens),
+                'bytes': self._bytes,
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'despejos': self.despejos,
+                'leituras_disco': self.leituras_disco,
+                'despejos_disco': self.despejos_disco,
+            }
+
+class CacheFragmentos(CacheFiguras):
+    """LRU de fragmentos HTML prontos, chaveado por (versão, nome); só em memória."""
+
+    def __init__(self, max_itens=MAX_FRAGMENTOS, max_bytes=MAX_BYTES_FRAGMENTOS):
+        super().__init__(max_itens, max_bytes)
+
+    def _serializar(self, valor):
+        return valor
@@ -0,0 +1,394 @@
+"""
+Clusterização incremental (mini-batch k-means) dos clientes, separada por PF e PJ.
+
+Os centróides partem dos clusters atuais (nomes incluídos), refinados
+por k-means completo até nenhum cliente trocar de cluster, e são
+atualizados a cada lote de compras novas, sem refazer o ajuste sobre o
+histórico completo:
+
+1. o lote é reduzido por cliente (`predictfy.rfm`) e somado ao estado
+   salvo de cada cliente (última compra, frequência, gasto);
+2. os clientes tocados pelo lote formam o mini-batch que move os
+   centróides (taxa de aprendizado 1/n por centróide, como no mini-batch
+   k-means);
+3. todos os clientes são reatribuídos ao centróide mais próximo na nova
+   data de referência (só cálculo de distância, em blocos);
+4. o `cliente.csv` (pertença e RFM de cada cliente, lida pelo cubo, filtros
+   e busca), o `cluster.csv` e os esboços de quantis são regravados.
+
+Atributos: recência (dias), log(1 + frequência) e log(1 + gasto),
+padronizados com média/desvio fixados na inicialização.
+
+As compras não dizem se um cliente novo é PF ou PJ. O tipo vem de um CSV
+`fk_contact,tipo` (ex.: exportado do cadastro, `--tipos`); clientes sem
+tipo conhecido acumulam compras no estado, mas ficam fora dos clusters e
+são contados no log até o tipo aparecer em um lote seguinte.
+
+Uso:
+    python -m predictfy.clusterizacao iniciar --data-referencia 2024-04-01
+    python -m predictfy.clusterizacao atualizar compras_2024-04-02.csv --tipos cadastro.csv
+"""
+
+import argparse
+import json
+import logging
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from predictfy import quantis, rfm
+from predictfy.config import (
+    ARQUIVO_CLIENTES,
+    ARQUIVO_CLUSTERS,
+    ARQUIVO_QUANTIS,
+    COLUNA_CLIENTE,
+    COLUNA_CLUSTER,
+    METRICAS_RFM,
+    PASTA_COMPRAS,
+    PASTA_CSV,
+)
+from predictfy.esquema import TIPOS, tipo_do_cluster
+
+logger = logging.getLogger(__name__)
+
+PASTA_MODELO = 'modelo'
+ARQUIVO_CENTROIDES = 'centroides.npz'
+ARQUIVO_ESTADO = 'clientes.parquet'
+ARQUIVO_META = 'modelo.json'
+TAMANHO_BLOCO_ATRIBUICAO = 1_000_000
+# Limite de iterações do k-means que estabiliza os centróides iniciais
+MAX_ITERACOES_INICIAIS = 100
+
+# ============================================================================
+# MODELO
+# ============================================================================
+
+def atributos(recency, frequency, monetary):
+    """Matriz de atributos brutos (antes da padronização)."""
+    return np.column_stack([
+        np.asarray(recency, dtype='float64'),
+        np.log1p(np.asarray(frequency, dtype='float64')),
+        np.log1p(np.asarray(monetary, dtype='float64')),
+    ])
+
+class ModeloTipo:
+    """Centróides de um tipo de cliente (PF ou PJ) com a padronização usada."""
+
+    def __init__(self, nomes, centroides, contagens, media, desvio):
+        self.nomes = list(nomes)
+        self.centroides = np.asarray(centroides, dtype='float64')
+        self.contagens = np.asarray(contagens, dtype='float64')
+        self.media = np.asarray(media, dtype='float64')
+        self.desvio = np.asarray(desvio, dtype='float64')
+
+    @classmethod
+    def ajustar_inicial(cls, X, rotulos):
+        """Cria o modelo a partir de clientes já rotulados (centróide = média do cluster)."""
+        media = X.mean(axis=0)
+        desvio = X.std(axis=0)
+        desvio[desvio == 0] = 1.0
+        Z = (X - media) / desvio
+        nomes, codigos = np.unique(rotulos, return_inverse=True)
+        contagens = np.bincount(codigos, minlength=len(nomes)).astype('float64')
+        somas = np.zeros((len(nomes), X.shape[1]))
+        np.add.at(somas, codigos, Z)
+        return cls(nomes, somas / contagens[:, None], contagens, media, desvio)
+
+    def refinar(self, Z, max_iteracoes=MAX_ITERACOES_INICIAIS):
+        """Itera atribuição/média (k-means) até nenhum rótulo mudar; retorna os rótulos.
+
+        A média de cada cluster rotulado não é, em geral, ponto fixo da
+        atribuição ao centróide mais próximo: sem o refino, a primeira
+        atualização é que reescreveria a segmentação.
+        """
+        k = len(self.centroides)
+        idx = self.atribuir(Z)
+        for _ in range(max_iteracoes):
+            contagens = np.bincount(idx, minlength=k).astype('float64')
+            somas = np.column_stack([np.bincount(idx, weights=Z[:, j], minlength=k) for j in range(Z.shape[1])])
+            ocupados = contagens > 0
+            self.centroides[ocupados] = somas[ocupados] / contagens[ocupados, None]
+            self.contagens = contagens
+            novos = self.atribuir(Z)
+            if np.array_equal(novos, idx):
+                break
+            idx = novos
+        return idx
+
+    def padronizar(self, X):
+        return (X - self.media) / self.desvio
+
+    def atribuir(self, Z):
+        """Índice do centróide mais próximo de cada linha, em blocos para limitar memória."""
+        saida = np.empty(len(Z), dtype='int64')
+        normas = (self.centroides ** 2).sum(axis=1)
+        for i in range(0, len(Z), TAMANHO_BLOCO_ATRIBUICAO):
+            bloco = Z[i:i + TAMANHO_BLOCO_ATRIBUICAO]
+            # |z - c|² = |z|² - 2 z·c + |c|² (|z|² é constante por linha)
+            saida[i:i + len(bloco)] = np.argmin(normas - 2 * bloco @ self.centroides.T, axis=1)
+        return saida
+
+    def atualizar(self, Z):
+        """Passo de mini-batch k-means: move cada centróide para a média acumulada."""
+        if len(Z) == 0:
+            return np.empty(0, dtype='int64')
+        idx = self.atribuir(Z)
+        k = len(self.centroides)
+        novos = np.bincount(idx, minlength=k).astype('float64')
+        somas = np.zeros_like(self.centroides)
+        np.add.at(somas, idx, Z)
+        total = self.contagens + novos
+        movidos = novos > 0
+        self.centroides[movidos] = (
+            self.centroides[movidos] * self.contagens[movidos, None] + somas[movidos]
+        ) / total[movidos, None]
+        self.contagens = total
+        return idx
+
+# ============================================================================
+# PERSISTÊNCIA
+# ============================================================================
+
+def _pasta_modelo(pasta):
+    return Path(pasta) / PASTA_MODELO
+
+def salvar_modelo(modelos, data_referencia, pasta=PASTA_CSV):
+    destino = _pasta_modelo(pasta)
+    destino.mkdir(parents=True, exist_ok=True)
+    arrays = {}
+    for tipo, m in modelos.items():
+        arrays[f'{tipo}_nomes'] = np.asarray(m.nomes, dtype=str)
+        arrays[f'{tipo}_centroides'] = m.centroides
+        arrays[f'{tipo}_contagens'] = m.contagens
+        arrays[f'{tipo}_media'] = m.media
+        arrays[f'{tipo}_desvio'] = m.desvio
+    np.savez(destino / ARQUIVO_CENTROIDES, **arrays)
+    meta = {'data_referencia': str(pd.Timestamp(data_referencia).date()), 'tipos': list(modelos)}
+    (destino / ARQUIVO_META).write_text(json.dumps(meta), encoding='utf-8')
+
+def carregar_modelo(pasta=PASTA_CSV):
+    """Retorna ({tipo: ModeloTipo}, data de referência)."""
+    origem = _pasta_modelo(pasta)
+    meta = json.loads((origem / ARQUIVO_META).read_text(encoding='utf-8'))
+    with np.load(origem / ARQUIVO_CENTROIDES) as arrays:
+        modelos = {
+            tipo: ModeloTipo(
+                arrays[f'{tipo}_nomes'], arrays[f'{tipo}_centroides'], arrays[f'{tipo}_contagens'],
+                arrays[f'{tipo}_media'], arrays[f'{tipo}_desvio'],
+            )
+            for tipo in meta['tipos']
+        }
+    return modelos, pd.Timestamp(meta['data_referencia'])
+
+def salvar_estado(estado, pasta=PASTA_CSV, arquivo=ARQUIVO_ESTADO):
+    caminho = _pasta_modelo(pasta) / arquivo
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    temporario = caminho.with_suffix('.tmp')
+    estado.reset_index().to_parquet(temporario, index=False)
+    temporario.replace(caminho)
+
+def carregar_estado(pasta=PASTA_CSV, arquivo=ARQUIVO_ESTADO):
+    return pd.read_parquet(_pasta_modelo(pasta) / arquivo).set_index(COLUNA_CLIENTE)
+
+# ============================================================================
+# TIPO DOS CLIENTES NOVOS
+# ============================================================================
+
+def ler_tipos(caminho):
+    """Series fk_contact -> tipo (Pessoa/Empresa) de um CSV `fk_contact,tipo`.
+
+    Tipos fora de `TIPOS` viram desconhecidos; em ids repetidos vale a última linha.
+    """
+    df = pd.read_csv(caminho, usecols=[COLUNA_CLIENTE, 'tipo'], encoding='utf-8')
+    df = df.drop_duplicates(COLUNA_CLIENTE, keep='last')
+    return pd.Series(pd.Categorical(df['tipo'], categories=TIPOS), index=df[COLUNA_CLIENTE].to_numpy())
+
+def tipos_clientes(clientes, tipos=None):
+    """Tipo de cada id em `clientes` segundo `tipos` (de `ler_tipos`); NaN quando desconhecido."""
+    if tipos is None:
+        return pd.Categorical([None] * len(clientes), categories=TIPOS)
+    return pd.Categorical(tipos.reindex(clientes).astype(object), categories=TIPOS)
+
+# ============================================================================
+# PIPELINE
+# ============================================================================
+
+def atribuir_clusters(dados_rfm, tipos, modelos):
+    """Cluster de cada cliente pelo modelo do seu tipo (None sem tipo ou sem modelo)."""
+    clusters = np.full(len(dados_rfm), None, dtype=object)
+    tipos = np.asarray(tipos, dtype=object)
+    for tipo, modelo in modelos.items():
+        mascara = tipos == tipo
+        if not mascara.any():
+            continue
+        parte = dados_rfm[mascara]
+        Z = modelo.padronizar(atributos(parte['recency'], parte['frequency'], parte['monetary']))
+        clusters[mascara] = np.asarray(modelo.nomes, dtype=object)[modelo.atribuir(Z)]
+    return clusters
+
+def reatribuir(estado, modelos, data_referencia):
+    """Reatribui todos os clientes na data de referência; retorna o RFM com cluster.
+
+    Clientes sem tipo conhecido ficam sem cluster (fora do `cluster.csv`).
+    """
+    dados_rfm = rfm.calcular_rfm(estado, data_referencia)
+    estado['cluster'] = pd.Categorical(atribuir_clusters(dados_rfm, estado['tipo'], modelos))
+    dados_rfm[COLUNA_CLUSTER] = estado['cluster']
+    return dados_rfm
+
+def gravar_clientes(dados_rfm, pasta=PASTA_CSV):
+    """Regrava o `cliente.csv` com a pertença atual (clientes sem cluster ficam de fora)."""
+    caminho = Path(pasta) / ARQUIVO_CLIENTES
+    df = dados_rfm[dados_rfm[COLUNA_CLUSTER].notna()].reset_index()[[COLUNA_CLIENTE, COLUNA_CLUSTER, *METRICAS_RFM]]
+    temporario = caminho.with_name(f'{caminho.name}.{os.getpid()}.tmp')
+    df.to_csv(temporario, index=False, encoding='utf-8')
+    os.replace(temporario, caminho)
+    return caminho
+
+def gravar_clusters(dados_rfm, pasta=PASTA_CSV):
+    """Regrava o `cluster.csv` e os esboços de quantis com os clusters atuais."""
+    caminho = rfm.salvar_clusters(rfm.finalizar_clusters(rfm.parcial_clusters(dados_rfm)), Path(pasta) / ARQUIVO_CLUSTERS)
+    quantis.salvar_esbocos(quantis.esbocos_bloco(dados_rfm), Path(pasta) / ARQUIVO_QUANTIS, caminho)
+    return caminho
+
+def ler_estado_inicial(pasta=PASTA_CSV, data_referencia=None, tamanho_bloco=rfm.TAMANHO_BLOCO):
+    """Lê o `cliente.csv` segmentado e monta o estado por cliente.
+
+    A última compra de cada cliente é reconstruída como `data_referencia - recency`;
+    sem `data_referencia`, vale a data da compra mais recente em `compras/`.
+    Retorna (clientes, estado, data de referência).
+    """
+    if data_referencia is None:
+        caminhos = sorted((Path(pasta) / PASTA_COMPRAS).glob('*.csv'))
+        if not caminhos:
+            raise ValueError(
+                f"Sem compras em {Path(pasta) / PASTA_COMPRAS} para datar a recência; informe a data de referência."
+            )
+        data_referencia = rfm.ultima_data(caminhos, tamanho_bloco)
+
+    clientes = pd.concat(pd.read_csv(
+        Path(pasta) / ARQUIVO_CLIENTES,
+        usecols=[COLUNA_CLIENTE, COLUNA_CLUSTER, 'recency', 'frequency', 'monetary'],
+        dtype={COLUNA_CLUSTER: 'category'},
+        chunksize=tamanho_bloco,
+    ), ignore_index=True)
+    data_referencia = pd.Timestamp(data_referencia)
+
+    estado = pd.DataFrame({
+        'ultima_compra': data_referencia - pd.to_timedelta(clientes['recency'], unit='D'),
+        'frequency': clientes['frequency'].to_numpy(),
+        'monetary': clientes['monetary'].to_numpy(dtype='float64'),
+        'tipo': tipo_do_cluster(clientes[COLUNA_CLUSTER]),
+        'cluster': clientes[COLUNA_CLUSTER],
+    })
+    estado.index = pd.Index(clientes[COLUNA_CLIENTE].to_numpy(), name=COLUNA_CLIENTE)
+    return clientes, estado, data_referencia
+
+def iniciar(pasta=PASTA_CSV, data_referencia=None, tamanho_bloco=rfm.TAMANHO_BLOCO):
+    """Cria modelo e estado por cliente a partir do `cliente.csv` já segmentado.
+
+    Os centróides são refinados até a atribuição ficar estável; os clientes
+    que mudam de cluster nesse refino já saem no `cliente.csv` e no
+    `cluster.csv` regravados.
+    """
+    clientes, estado, data_referencia = ler_estado_inicial(pasta, data_referencia, tamanho_bloco)
+
+    modelos = {}
+    for tipo in TIPOS:
+        parte = clientes[(estado['tipo'] == tipo).to_numpy()]
+        if len(parte):
+            X = atributos(parte['recency'], parte['frequency'], parte['monetary'])
+            modelo = ModeloTipo.ajustar_inicial(X, parte[COLUNA_CLUSTER].astype(str).to_numpy())
+            modelo.refinar(modelo.padronizar(X))
+            modelos[tipo] = modelo
+
+    dados_rfm = reatribuir(estado, modelos, data_referencia)
+    _pasta_modelo(pasta).mkdir(parents=True, exist_ok=True)
+    salvar_modelo(modelos, data_referencia, pasta)
+    salvar_estado(estado, pasta)
+    gravar_clientes(dados_rfm, pasta)
+    gravar_clusters(dados_rfm, pasta)
+    return modelos, estado
+
+def atualizar(caminhos_compras, pasta=PASTA_CSV, data_referencia=None, tamanho_bloco=rfm.TAMANHO_BLOCO,
+              tipos=None):
+    """Incorpora um lote de compras: atualiza estado, centróides, atribuições e `cluster.csv`.
+
+    `tipos` (de `ler_tipos`) dá o tipo dos clientes novos e dos que ainda
+    estão sem tipo; os demais continuam fora dos clusters.
+    """
+    modelos, referencia_anterior = carregar_modelo(pasta)
+    estado = carregar_estado(pasta)
+    lote = rfm.agregar_compras(caminhos_compras, tamanho_bloco)
+
+    # 1. Soma o lote ao estado por cliente (só as linhas tocadas mudam)
+    existentes = lote.index.intersection(estado.index)
+    novos = lote.index.difference(estado.index)
+    estado.loc[existentes, 'ultima_compra'] = np.maximum(
+        estado.loc[existentes, 'ultima_compra'], lote.loc[existentes, 'ultima_compra']
+    )
+    estado.loc[existentes, 'frequency'] += lote.loc[existentes, 'frequency']
+    estado.loc[existentes, 'monetary'] += lote.loc[existentes, 'monetary']
+    if len(novos):
+        # Cluster fica vazio até a reatribuição abaixo
+        estado = pd.concat([estado, lote.loc[novos].assign(tipo=tipos_clientes(novos, tipos))])
+    estado['tipo'] = pd.Categorical(estado['tipo'], categories=TIPOS)
+    sem_tipo = estado['tipo'].isna().to_numpy()
+    if tipos is not None and sem_tipo.any():
+        estado.loc[sem_tipo, 'tipo'] = tipos_clientes(estado.index[sem_tipo], tipos)
+        sem_tipo = estado['tipo'].isna().to_numpy()
+    if sem_tipo.any():
+        logger.warning("%d clientes sem tipo (PF/PJ) conhecido ficam fora dos clusters", int(sem_tipo.sum()))
+
+    if data_referencia is None:
+        data_referencia = max(referencia_anterior, lote['ultima_compra'].max())
+    data_referencia = pd.Timestamp(data_referencia)
+
+    # 2. Mini-batch: os clientes tocados movem os centróides
+    tocados = rfm.calcular_rfm(estado.loc[lote.index], data_referencia)
+    tipos_tocados = estado.loc[lote.index, 'tipo'].to_numpy()
+    for tipo, modelo in modelos.items():
+        parte = tocados[tipos_tocados == tipo]
+        modelo.atualizar(modelo.padronizar(atributos(parte['recency'], parte['frequency'], parte['monetary'])))
+
+    # 3 e 4. Reatribui todo mundo e regrava os agregados
+    dados_rfm = reatribuir(estado, modelos, data_referencia)
+    salvar_modelo(modelos, data_referencia, pasta)
+    salvar_estado(estado, pasta)
+    gravar_clientes(dados_rfm, pasta)
+    gravar_clusters(dados_rfm, pasta)
+    return dados_rfm
+
+# ============================================================================
+# LINHA DE COMANDO
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Clusterização incremental (mini-batch k-means) de clientes.")
+    parser.add_argument('--pasta', default=str(PASTA_CSV), help="Pasta com os CSVs.")
+    sub = parser.add_subparsers(dest='comando', required=True)
+
+    p_iniciar = sub.add_parser('iniciar', help="Cria o modelo a partir do cliente.csv segmentado.")
+    p_iniciar.add_argument('--data-referencia', default=None)
+
+    p_atualizar = sub.add_parser('atualizar', help="Incorpora um lote de compras novas.")
+    p_atualizar.add_argument('compras', nargs='+')
+    p_atualizar.add_argument('--data-referencia', default=None)
+    p_atualizar.add_argument('--tipos', default=None, help="CSV fk_contact,tipo com o tipo dos clientes novos.")
+    args = parser.parse_args(argv)
+
+    if args.comando == 'iniciar':
+        modelos, estado = iniciar(args.pasta, args.data_referencia)
+        resumo = ', '.join(f'{t}: {len(m.nomes)} clusters' for t, m in modelos.items())
+        print(f"✅ Modelo criado com {len(estado):,} clientes ({resumo})")
+    else:
+        tipos = ler_tipos(args.tipos) if args.tipos else None
+        dados_rfm = atualizar(args.compras, args.pasta, args.data_referencia, tipos=tipos)
+        sem_cluster = int(dados_rfm[COLUNA_CLUSTER].isna().sum())
+        print(f"✅ {len(dados_rfm) - sem_cluster:,} clientes reatribuídos "
+              f"({sem_cluster:,} sem tipo conhecido); cluster.csv atualizado")
+
+if __name__ == '__main__':
+    main()
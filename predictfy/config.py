@@ -0,0 +1,42 @@
+"""
+Configuração compartilhada: caminhos e nomes de colunas dos dados.
+"""
+
+import os
+from pathlib import Path
+
+# ============================================================================
+# CAMINHOS
+# ============================================================================
+
+RAIZ_PROJETO = Path(__file__).resolve().parent.parent
+PASTA_CSV = Path(os.environ.get('PREDICTFY_CSV') or RAIZ_PROJETO / 'Desafios' / 'data' / 'csv')
+
+ARQUIVO_CLUSTERS = 'cluster.csv'
+ARQUIVO_CLIENTES = 'cliente.csv'
+ARQUIVO_RECOMENDACOES = 'recomendacoes_finais_desafio3.csv'
+ARQUIVO_QUANTIS = 'cluster_quantis.json'
+# Compras brutas, em vários arquivos CSV dentro da pasta de dados
+PASTA_COMPRAS = 'compras'
+
+# ============================================================================
+# COLUNAS
+# ============================================================================
+
+# Compras brutas (uma linha por pedido, layout do desafio ClickBus)
+COLUNA_CLIENTE = 'fk_contact'
+COLUNA_DATA = 'date_purchase'
+COLUNA_VALOR = 'gmv_success'
+COLUNA_ORIGEM = 'place_origin_departure'
+COLUNA_DESTINO = 'place_destination_departure'
+
+# Tabela de clientes (uma linha por cliente já segmentado)
+COLUNA_CLUSTER = 'cluster'
+METRICAS_RFM = ('recency', 'frequency', 'monetary')
+
+# Esquema do cluster.csv consumido por `carregar_dados_clusters`
+COLUNAS_CLUSTER = (
+    [COLUNA_CLUSTER]
+    + [f'{m}_{a}' for m in METRICAS_RFM for a in ('mean', 'min', 'max')]
+    + ['Qtd']
+)
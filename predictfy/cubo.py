@@ -0,0 +1,393 @@
+"""
+Cubo pré-agregado dia × cluster × tipo das compras brutas.
+
+O `cluster.csv` é uma foto de todo o histórico. Para comparar períodos
+("último trimestre x este trimestre") sem reler as compras, cada célula do
+cubo guarda, para as compras de um dia feitas por clientes de um cluster:
+
+    pedidos          número de compras
+    gasto            soma do valor das compras
+    esboco_clientes  esboço HyperLogLog dos clientes que compraram no dia
+
+Pedidos e gasto somam entre dias. Clientes distintos não somam (quem compra
+em dois dias contaria duas vezes), então cada célula guarda um esboço
+HyperLogLog: a união de vários dias é o máximo registrador a registrador, e
+a estimativa tem erro relativo de ~1.04 / sqrt(2^PRECISAO_CLIENTES) (≈3%).
+Com os clientes distintos do período, frequência (pedidos / cliente) e gasto
+por cliente voltam a ter o mesmo sentido da foto completa.
+
+A recência média até o fim do período também sai dos esboços: as uniões do
+fim para o começo dão quantos clientes compraram de cada dia em diante, e
+a soma das recências é a área entre esse total e a curva.
+
+O cubo fica em `.cache/cubo.parquet` (colunar, com cluster/tipo em
+dicionário e compressão zstd) e é atualizado de forma incremental: só os
+arquivos de `compras/` que ainda não entraram são agregados e unidos às
+células. Um arquivo já agregado que mudou, ou um `cliente.csv` novo (a
+pertença a cluster muda), refaz o cubo inteiro.
+
+`IndiceCubo` ordena as células por (cluster, dia) com somas acumuladas, e
+`snapshot_periodo` passa a fatia de um período pelo mesmo
+`snapshot.calcular_snapshot` da foto completa, então todos os KPIs da
+dashboard são recalculados para o período.
+
+Uso:
+    python -m predictfy.cubo [--pasta Desafios/data/csv] [--refazer]
+    python -m predictfy.cubo --de 2024-01-01 --ate 2024-03-31
+"""
+
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from predictfy import dados, esquema, rfm, snapshot
+from predictfy.cache_colunar import NOME_PASTA_CACHE, PARQUET_DISPONIVEL
+from predictfy.config import (
+    ARQUIVO_CLIENTES,
+    COLUNA_CLIENTE,
+    COLUNA_CLUSTER,
+    COLUNA_DATA,
+    COLUNA_VALOR,
+    PASTA_COMPRAS,
+    PASTA_CSV,
+)
+
+VERSAO_FORMATO = 2
+ARQUIVO_CUBO = 'cubo.parquet'
+ARQUIVO_MANIFESTO = 'cubo.json'
+MEDIDAS = ('pedidos', 'gasto')
+PRECISAO_CLIENTES = 10
+REGISTRADORES = 1 << PRECISAO_CLIENTES
+
+# ============================================================================
+# CLIENTES DISTINTOS (HYPERLOGLOG)
+# ============================================================================
+
+_POTENCIAS = np.ldexp(1.0, -np.arange(65))
+
+def _comprimento_bits(valores):
+    """Número de bits significativos de cada inteiro sem sinal de 64 bits."""
+    valores = valores.copy()
+    comprimento = np.zeros(len(valores), dtype='int64')
+    for passo in (32, 16, 8, 4, 2, 1):
+        maiores = valores >= (np.uint64(1) << np.uint64(passo))
+        comprimento[maiores] += passo
+        valores[maiores] >>= np.uint64(passo)
+    return comprimento + (valores > 0)
+
+def registradores_clientes(clientes, precisao=PRECISAO_CLIENTES):
+    """(registrador, posto) do HyperLogLog de cada id de cliente."""
+    h = pd.util.hash_array(np.asarray(clientes))
+    registrador = (h >> np.uint64(64 - precisao)).astype('int64')
+    resto = h & np.uint64((1 << (64 - precisao)) - 1)
+    posto = (64 - precisao) - _comprimento_bits(resto) + 1
+    return registrador, posto.astype('uint8')
+
+def estimar_clientes(somas, vazios, m=REGISTRADORES):
+    """Estimativa HyperLogLog a partir de sum(2^-registrador) e do número de registradores zerados."""
+    alfa = 0.7213 / (1 + 1.079 / m)
+    bruta = alfa * m * m / np.asarray(somas, dtype='float64')
+    vazios = np.asarray(vazios)
+    # Poucos clientes: contagem linear, bem mais precisa nessa faixa
+    linear = m * np.log(m / np.maximum(vazios, 1))
+    return np.where((bruta <= 2.5 * m) & (vazios > 0), linear, bruta)
+
+def estimar_registros(registros):
+    """Clientes distintos estimados de cada linha de `registros` (n × registradores)."""
+    return estimar_clientes(_POTENCIAS[registros].sum(axis=-1), (registros == 0).sum(axis=-1),
+                            registros.shape[-1])
+
+def _unir_registros(celula, registros, n):
+    """Máximo, registrador a registrador, das linhas de `registros` de cada célula (0..n-1)."""
+    ordem = np.argsort(celula, kind='stable')
+    celula = celula[ordem]
+    posicao = np.arange(len(celula)) - np.searchsorted(celula, celula)
+    unidos = np.zeros((n, registros.shape[1]), dtype='uint8')
+    # Uma passada por repetição: em cada uma, cada célula aparece no máximo uma vez
+    for k in range(int(posicao.max(initial=-1)) + 1):
+        selecao = posicao == k
+        alvo = celula[selecao]
+        unidos[alvo] = np.maximum(unidos[alvo], registros[ordem[selecao]])
+    return unidos
+
+def _preencher_registros(celula, registrador, posto, n):
+    """Registros de `n` células a partir de (célula, registrador, posto) de cada cliente."""
+    registros = np.zeros(n * REGISTRADORES, dtype='uint8')
+    chave = celula * REGISTRADORES + registrador
+    # Ordenado por (chave, posto), o último de cada chave é o maior posto
+    ordem = np.lexsort((posto, chave))
+    chave, posto = chave[ordem], posto[ordem]
+    ultimos = np.append(chave[1:] != chave[:-1], True)
+    registros[chave[ultimos]] = posto[ultimos]
+    return registros.reshape(n, REGISTRADORES)
+
+# ============================================================================
+# AGREGAÇÃO
+# ============================================================================
+
+def _dias(datas):
+    """Datas -> dias desde 1970-01-01 (inteiros)."""
+    return np.asarray(datas, dtype='datetime64[D]').astype('int64')
+
+def registros_cubo(cubo):
+    """Esboços do cubo como matriz células × registradores (uint8)."""
+    if not len(cubo):
+        return np.zeros((0, REGISTRADORES), dtype='uint8')
+    return np.frombuffer(b''.join(cubo['esboco_clientes']), dtype='uint8').reshape(len(cubo), -1)
+
+def _montar(celulas, registros):
+    """DataFrame do cubo: tipos compactos, `tipo` e os esboços como bytes."""
+    celulas = celulas.astype({'dia': 'int32', 'pedidos': 'int32'})
+    celulas[COLUNA_CLUSTER] = celulas[COLUNA_CLUSTER].astype(str).astype('category')
+    celulas['tipo'] = esquema.tipo_do_cluster(celulas[COLUNA_CLUSTER])
+    celulas['esboco_clientes'] = [r.tobytes() for r in registros]
+    colunas = ['dia', COLUNA_CLUSTER, 'tipo', *MEDIDAS, 'esboco_clientes']
+    return celulas[colunas].sort_values(['dia', COLUNA_CLUSTER]).reset_index(drop=True)
+
+def _agrupar(partes):
+    """Une partes (células, registros) com as mesmas chaves (dia, cluster)."""
+    celulas = pd.concat([c.astype({COLUNA_CLUSTER: str}) for c, _ in partes], ignore_index=True)
+    registros = np.concatenate([r for _, r in partes])
+    grupos = celulas.groupby(['dia', COLUNA_CLUSTER], sort=False)
+    somadas = grupos[list(MEDIDAS)].sum().reset_index()
+    return somadas, _unir_registros(grupos.ngroup().to_numpy(), registros, len(somadas))
+
+def agregar_arquivo(caminho, mapa_clusters, tamanho_bloco=rfm.TAMANHO_BLOCO):
+    """Células (dia, cluster, tipo) das compras de um arquivo.
+
+    `mapa_clusters`: Series fk_contact -> cluster (`rfm.ler_mapa_clusters`).
+    Compras de clientes sem cluster ficam de fora.
+    """
+    partes = []
+    for bloco in pd.read_csv(caminho, usecols=[COLUNA_CLIENTE, COLUNA_DATA, COLUNA_VALOR],
+                             chunksize=tamanho_bloco, encoding='utf-8'):
+        clusters = pd.Categorical(bloco[COLUNA_CLIENTE].map(mapa_clusters), categories=mapa_clusters.cat.categories)
+        dias = _dias(pd.to_datetime(bloco[COLUNA_DATA], errors='coerce'))
+        validos = ~pd.isna(clusters) & (dias >= 0)
+        if not validos.any():
+            continue
+        compras = pd.DataFrame({
+            'dia': dias[validos],
+            COLUNA_CLUSTER: clusters[validos],
+            'pedidos': 1,
+            'gasto': bloco[COLUNA_VALOR].to_numpy(dtype='float64')[validos],
+        })
+        registrador, posto = registradores_clientes(bloco[COLUNA_CLIENTE].to_numpy()[validos])
+        grupos = compras.groupby(['dia', COLUNA_CLUSTER], sort=False, observed=True)
+        celulas = grupos[list(MEDIDAS)].sum().reset_index()
+        registros = _preencher_registros(grupos.ngroup().to_numpy(), registrador, posto, len(celulas))
+        partes.append((celulas, registros))
+    if not partes:
+        return None
+    return _montar(*_agrupar(partes))
+
+def combinar(*cubos):
+    """Une as células de cubos de arquivos diferentes.
+
+    Pedidos e gasto são somados; os esboços de clientes são unidos, então um
+    cliente com compras no mesmo dia em arquivos diferentes (ou em vários
+    arquivos, como nos lotes por cliente do `predictfy.gerador`) conta uma vez.
+    """
+    cubos = [c for c in cubos if c is not None and len(c)]
+    if not cubos:
+        return None
+    return _montar(*_agrupar([(c, registros_cubo(c)) for c in cubos]))
+
+# ============================================================================
+# PERSISTÊNCIA E ATUALIZAÇÃO INCREMENTAL
+# ============================================================================
+
+def caminho_cubo(pasta=PASTA_CSV):
+    return Path(pasta) / NOME_PASTA_CACHE / ARQUIVO_CUBO
+
+def _caminho_manifesto(pasta):
+    return Path(pasta) / NOME_PASTA_CACHE / ARQUIVO_MANIFESTO
+
+def arquivos_compras(pasta=PASTA_CSV):
+    return sorted((Path(pasta) / PASTA_COMPRAS).glob('*.csv'))
+
+def _assinatura(caminho):
+    stat = Path(caminho).stat()
+    return [stat.st_size, stat.st_mtime_ns]
+
+def _gravar_atomico(caminho, escrever):
+    temporario = caminho.with_name(f'{caminho.name}.{os.getpid()}.tmp')
+    escrever(temporario)
+    os.replace(temporario, caminho)
+
+def ler_cubo(pasta=PASTA_CSV):
+    """Células do cubo gravado (None se não houver cubo ou Parquet)."""
+    if not PARQUET_DISPONIVEL:
+        return None
+    try:
+        return pd.read_parquet(caminho_cubo(pasta))
+    except OSError:
+        return None
+
+def atualizar(pasta=PASTA_CSV, refazer=False):
+    """Agrega os arquivos de compras novos no cubo e grava. Retorna (cubo, arquivos agregados)."""
+    if not PARQUET_DISPONIVEL:
+        raise RuntimeError("o cubo precisa do pyarrow (Parquet)")
+    pasta = Path(pasta)
+    try:
+        manifesto = json.loads(_caminho_manifesto(pasta).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        manifesto = {}
+    atuais = {c.name: _assinatura(c) for c in arquivos_compras(pasta)}
+    clientes = _assinatura(pasta / ARQUIVO_CLIENTES)
+    cubo = None if refazer else ler_cubo(pasta)
+
+    anteriores = manifesto.get('arquivos', {})
+    mudou = any(atuais.get(nome) != assinatura for nome, assinatura in anteriores.items())
+    if (cubo is None or mudou or manifesto.get('formato') != VERSAO_FORMATO
+            or manifesto.get('clientes') != clientes):
+        cubo, anteriores = None, {}
+    novos = [nome for nome in atuais if nome not in anteriores]
+    if not novos and cubo is not None:
+        return cubo, []
+
+    mapa = rfm.ler_mapa_clusters(pasta / ARQUIVO_CLIENTES)
+    cubo = combinar(cubo, *(agregar_arquivo(pasta / PASTA_COMPRAS / nome, mapa) for nome in novos))
+    if cubo is None:
+        raise ValueError(f"Nenhuma compra de cliente segmentado em {pasta / PASTA_COMPRAS}.")
+
+    caminho = caminho_cubo(pasta)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    _gravar_atomico(caminho, lambda p: cubo.to_parquet(p, index=False, compression='zstd'))
+    manifesto = {'formato': VERSAO_FORMATO, 'clientes': clientes, 'arquivos': atuais}
+    _gravar_atomico(_caminho_manifesto(pasta),
+                    lambda p: p.write_text(json.dumps(manifesto), encoding='utf-8'))
+    return cubo, novos
+
+# ============================================================================
+# FATIAS POR PERÍODO
+# ============================================================================
+
+class IndiceCubo:
+    """Células ordenadas por cluster e dia decrescente, com somas acumuladas de pedidos e gasto."""
+
+    def __init__(self, cubo):
+        clusters = cubo[COLUNA_CLUSTER].astype('category')
+        self.clusters = clusters.cat.categories
+        codigos = clusters.cat.codes.to_numpy()
+        dias = cubo['dia'].to_numpy().astype('int64')
+        self.primeiro_dia = int(dias.min())
+        self.ultimo_dia = int(dias.max())
+
+        # Dia decrescente: as uniões "deste dia até o fim" são acumulados para frente
+        ordem = np.lexsort((-dias, codigos))
+        self._dias = dias[ordem]
+        self._limites = np.searchsorted(codigos[ordem], np.arange(len(self.clusters) + 1))
+        self._registros = registros_cubo(cubo)[ordem]
+        # Posição 0 zerada: as linhas [i, j) somam acumulado[j] - acumulado[i]
+        self._acumulados = {
+            m: np.concatenate([[0.0], np.cumsum(cubo[m].to_numpy('float64')[ordem])]) for m in MEDIDAS
+        }
+
+    @property
+    def periodo(self):
+        """(primeira, última) data com compras no cubo."""
+        return (pd.Timestamp(self.primeiro_dia, unit='D').date(),
+                pd.Timestamp(self.ultimo_dia, unit='D').date())
+
+    def _dia(self, data, padrao):
+        return padrao if data is None else int(_dias([data])[0])
+
+    def _clientes_e_recencia(self, i, j, dia_inicio, dia_fim):
+        """Clientes distintos das linhas [i, j) de um cluster e a soma das recências até `dia_fim`."""
+        # Linhas do dia mais recente para o mais antigo: uniao[k] = quem comprou de dias[k] até o fim
+        uniao = self._registros[i:j].copy()
+        # Linha a linha: bem mais rápido que np.maximum.accumulate(axis=0) em uint8
+        for k in range(1, len(uniao)):
+            np.maximum(uniao[k - 1], uniao[k], out=uniao[k])
+        anteriores = np.vstack([np.zeros((1, uniao.shape[1]), dtype='uint8'), uniao[:-1]])
+        # sum(2^-registrador) de cada união, somando só os registradores que mudam
+        linhas, colunas = np.nonzero(uniao != anteriores)
+        variacao = _POTENCIAS[uniao[linhas, colunas]] - _POTENCIAS[anteriores[linhas, colunas]]
+        somas = REGISTRADORES + np.cumsum(np.bincount(linhas, variacao, minlength=j - i))
+        preenchidos = np.cumsum(np.bincount(linhas, anteriores[linhas, colunas] == 0, minlength=j - i))
+        ativos = np.maximum.accumulate(estimar_clientes(somas, REGISTRADORES - preenchidos))
+        # Soma das recências: total × duração menos a área sob "clientes ativos de u até o fim"
+        dias = self._dias[i:j]
+        duracoes = np.diff(np.concatenate([[dia_inicio], dias[::-1]]))[::-1]
+        recencias = ativos[-1] * (dia_fim - dia_inicio) - float(np.dot(ativos, duracoes))
+        return ativos[-1], recencias
+
+    def fatia(self, inicio=None, fim=None):
+        """Tabela por cluster das compras em [inicio, fim], no formato de `dados.ler_clusters`.
+
+        A recência é contada até `fim` (padrão e limite: a última data do
+        cubo). Um período fora das datas do cubo devolve a tabela vazia.
+        """
+        dia_inicio = max(self._dia(inicio, self.primeiro_dia), self.primeiro_dia)
+        dia_fim = min(self._dia(fim, self.ultimo_dia), self.ultimo_dia)
+        linhas = []
+        for c, cluster in enumerate(self.clusters):
+            inicio_cluster, fim_cluster = self._limites[c], self._limites[c + 1]
+            # Dias do cluster em ordem decrescente: busca nos negativos
+            dias = -self._dias[inicio_cluster:fim_cluster]
+            i = inicio_cluster + np.searchsorted(dias, -dia_fim, 'left')
+            j = inicio_cluster + np.searchsorted(dias, -dia_inicio, 'right')
+            if j <= i:
+                continue
+            clientes, recencias = self._clientes_e_recencia(i, j, dia_inicio, dia_fim)
+            somas = {m: a[j] - a[i] for m, a in self._acumulados.items()}
+            # A recência média fica entre a da compra mais recente e a da mais antiga
+            recencia = min(max(recencias / clientes, dia_fim - self._dias[i]), dia_fim - self._dias[j - 1])
+            linhas.append({
+                'cluster': cluster,
+                'quantidade': max(int(round(clientes)), 1),
+                'recencia_media': recencia,
+                'frequencia_media': somas['pedidos'] / clientes,
+                'gasto_medio_total': somas['gasto'] / clientes,
+            })
+        df = pd.DataFrame(linhas, columns=['cluster', 'quantidade', 'recencia_media',
+                                           'frequencia_media', 'gasto_medio_total'])
+        df['tipo'] = esquema.tipo_do_cluster(df['cluster'])
+        return df
+
+def abrir(pasta=PASTA_CSV):
+    """`IndiceCubo` do cubo gravado na pasta (None se não houver cubo)."""
+    cubo = ler_cubo(pasta)
+    return None if cubo is None or not len(cubo) else IndiceCubo(cubo)
+
+def snapshot_periodo(indice, inicio, fim, versao_dados):
+    """Snapshot da dashboard (KPIs e recortes PF/PJ) das compras em [inicio, fim]."""
+    snap = snapshot.calcular_snapshot(indice.fatia(inicio, fim), f'{versao_dados}-{inicio}-{fim}')
+    snap['periodo'] = (inicio, fim)
+    return snap
+
+# ============================================================================
+# LINHA DE COMANDO
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Atualiza o cubo dia × cluster × tipo e fatia um período.")
+    parser.add_argument('--pasta', default=str(PASTA_CSV), help="Pasta com os CSVs.")
+    parser.add_argument('--refazer', action='store_true', help="Reagrega todos os arquivos de compras.")
+    parser.add_argument('--de', default=None, help="Início do período (AAAA-MM-DD).")
+    parser.add_argument('--ate', default=None, help="Fim do período (AAAA-MM-DD).")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    cubo, novos = atualizar(args.pasta, args.refazer)
+    tamanho_kb = caminho_cubo(args.pasta).stat().st_size / 1024
+    print(f"✅ Cubo com {len(cubo):,} células ({tamanho_kb:.1f} KB); "
+          f"{len(novos)} arquivo(s) agregado(s) em {time.perf_counter() - inicio:.2f}s")
+
+    indice = IndiceCubo(cubo)
+    inicio = time.perf_counter()
+    snap = snapshot_periodo(indice, args.de, args.ate, dados.versao_dados(args.pasta))
+    duracao = time.perf_counter() - inicio
+    de, ate = args.de or indice.periodo[0], args.ate or indice.periodo[1]
+    print(f"\nPeríodo {de} a {ate} ({duracao * 1e3:.1f} ms):")
+    for nome, valor in snap['kpis'].items():
+        print(f"  {nome}: {valor:,.2f}" if isinstance(valor, float) else f"  {nome}: {valor:,}")
+
+if __name__ == '__main__':
+    main()
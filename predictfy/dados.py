@@ -0,0 +1,118 @@
+"""
+Leitura e preparação dos datasets da dashboard, sem dependência do Streamlit.
+
+O `app.py` as registra no `CacheDados` (`predictfy.cache_dados`), que
+mantém uma cópia por processo e recarrega quando os arquivos mudam; scripts
+e serviços (`python -m predictfy...`) as usam diretamente.
+"""
+
+import hashlib
+from pathlib import Path
+
+from predictfy import cache_colunar, esquema, particionado, quantis
+from predictfy.config import (
+    ARQUIVO_CLIENTES,
+    ARQUIVO_CLUSTERS,
+    ARQUIVO_QUANTIS,
+    ARQUIVO_RECOMENDACOES,
+    PASTA_CSV,
+)
+
+def _ler(pasta, arquivo):
+    """Lê um CSV da pasta com o plano de tipos do arquivo (via cache colunar)."""
+    return cache_colunar.ler_csv(
+        Path(pasta) / arquivo,
+        preparar=esquema.preparador(arquivo),
+        sep=',',
+        encoding='utf-8',
+        dtype=esquema.DTYPES_LEITURA[arquivo],
+    )
+
+def preparar_clusters(df):
+    """Adiciona `tipo` (Pessoa/Empresa) e renomeia as colunas usadas na dashboard."""
+    df['tipo'] = esquema.tipo_do_cluster(df['cluster'])
+    return df.rename(columns={
+        'Qtd': 'quantidade',
+        'recency_mean': 'recencia_media',
+        'frequency_mean': 'frequencia_media',
+        'monetary_mean': 'gasto_medio_total'
+    })
+
+def ler_clusters(pasta=PASTA_CSV, processos=None):
+    """Lê o cluster.csv (ou agrega o cliente.csv se ele não existir).
+
+    Na agregação, `processos=1` força o caminho serial (sem fork): é o que o
+    `app.py` usa, já que roda em threads do servidor. Os esboços de quantis
+    saem junto e são gravados se o arquivo faltar ou estiver desatualizado.
+    """
+    pasta = Path(pasta)
+    if not (pasta / ARQUIVO_CLUSTERS).exists() and (pasta / ARQUIVO_CLIENTES).exists():
+        df, esbocos = particionado.agregar_clientes(pasta / ARQUIVO_CLIENTES, processos)
+        df = esquema.compactar(df.astype({'cluster': 'category'}))
+        _gravar_quantis(pasta, esbocos)
+    else:
+        df = _ler(pasta, ARQUIVO_CLUSTERS)
+    return preparar_clusters(df)
+
+def _gravar_quantis(pasta, esbocos):
+    """Grava os esboços se o arquivo de quantis faltar ou estiver desatualizado."""
+    caminho = pasta / ARQUIVO_QUANTIS
+    try:
+        if (
+            caminho.exists()
+            and caminho.stat().st_mtime_ns >= (pasta / ARQUIVO_CLIENTES).stat().st_mtime_ns
+            and quantis.ler_esbocos(caminho) is not None
+        ):
+            return
+        quantis.salvar_esbocos(esbocos, caminho)
+    except OSError:
+        pass
+
+def ler_clientes(pasta=PASTA_CSV):
+    """Lê a tabela de clientes."""
+    return _ler(pasta, ARQUIVO_CLIENTES)
+
+def ler_recomendacoes(pasta=PASTA_CSV):
+    """Lê as recomendações finais do desafio 3."""
+    return _ler(pasta, ARQUIVO_RECOMENDACOES)
+
+def ler_quantis(pasta=PASTA_CSV):
+    """Tabela de p50/p90/p99 por cluster a partir dos esboços.
+
+    None se não houver esboços ou se eles não forem do `cluster.csv` atual.
+    """
+    try:
+        esbocos = quantis.ler_esbocos(Path(pasta) / ARQUIVO_QUANTIS)
+    except OSError:
+        return None
+    if esbocos is None:
+        return None
+    return quantis.tabela_quantis(esbocos)
+
+def assinaturas_arquivos(pasta=PASTA_CSV, arquivos=(ARQUIVO_CLUSTERS, ARQUIVO_CLIENTES, ARQUIVO_QUANTIS)):
+    """{arquivo: (tamanho, mtime_ns)} dos arquivos que existem na pasta."""
+    assinaturas = {}
+    for nome in arquivos:
+        try:
+            stat = (Path(pasta) / nome).stat()
+        except OSError:
+            continue
+        assinaturas[nome] = (stat.st_size, stat.st_mtime_ns)
+    return assinaturas
+
+def versao_assinaturas(assinaturas, arquivos=(ARQUIVO_CLUSTERS, ARQUIVO_CLIENTES, ARQUIVO_QUANTIS)):
+    """Versão (ver `versao_dados`) a partir de assinaturas já coletadas."""
+    h = hashlib.blake2b(digest_size=8)
+    for nome in arquivos:
+        if nome in assinaturas:
+            tamanho, mtime_ns = assinaturas[nome]
+            h.update(f'{nome}:{tamanho}:{mtime_ns};'.encode())
+    return h.hexdigest()
+
+def versao_dados(pasta=PASTA_CSV, arquivos=(ARQUIVO_CLUSTERS, ARQUIVO_CLIENTES, ARQUIVO_QUANTIS)):
+    """Identificador barato da versão dos dados (nome, tamanho e mtime dos arquivos).
+
+    Usado como chave de caches derivados (snapshot, figuras...): muda sempre
+    que algum dos arquivos é substituído.
+    """
+    return versao_assinaturas(assinaturas_arquivos(pasta, arquivos), arquivos)
@@ -0,0 +1,185 @@
+"""
+Registro de datasets com carregamento preguiçoso.
+
+Cada dataset é registrado com a função que o carrega, mas só é lido no
+primeiro acesso (`obter` / `requer`). O registro guarda tempo de carga,
+memória e número de linhas de cada dataset para o relatório de startup.
+
+`requer` com vários datasets carrega os que faltam em paralelo, em um pool
+de threads (leitura de disco e decodificação Parquet/Arrow liberam o GIL):
+o tempo de parede tende ao da carga mais lenta, não à soma. Uma falha em um
+dataset não derruba os outros; ela fica no relatório.
+
+Uso (comparar carga sequencial e paralela de uma pasta de dados):
+    python -m predictfy.datasets [--pasta Desafios/data/csv] [--sequencial]
+"""
+
+import argparse
+import logging
+import sys
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+_memoria_conhecida = {}
+
+def memoria_dataset(df):
+    """Memória ocupada por um dataset (bytes, contando strings).
+
+    Aceita DataFrames e dicionários de DataFrames/valores (ex.: o snapshot).
+    """
+    if df is None:
+        return 0
+    if isinstance(df, (pd.DataFrame, pd.Series)):
+        # Tabelas em `cache_resource` voltam como o mesmo objeto a cada rerun:
+        # a contagem profunda (que visita cada string) é feita uma vez só
+        conhecida = _memoria_conhecida.get(id(df))
+        if conhecida is not None and conhecida[0]() is df:
+            return conhecida[1]
+        total = int(df.memory_usage(deep=True).sum()) if isinstance(df, pd.DataFrame) else int(df.memory_usage(deep=True))
+        _memoria_conhecida[id(df)] = (weakref.ref(df, lambda _, chave=id(df): _memoria_conhecida.pop(chave, None)), total)
+        return total
+    if isinstance(df, dict):
+        return sum(memoria_dataset(v) for v in df.values())
+    return sys.getsizeof(df)
+
+def linhas_dataset(df):
+    """Número de linhas de um dataset; num dicionário, a soma das tabelas dele."""
+    if isinstance(df, (pd.DataFrame, pd.Series)):
+        return len(df)
+    if isinstance(df, dict):
+        return sum(linhas_dataset(v) for v in df.values())
+    return 0
+
+class RegistroDatasets:
+    """Datasets nomeados, carregados sob demanda e mantidos em memória."""
+
+    def __init__(self, preparar_thread=None, max_threads=None):
+        """`preparar_thread()` roda no início de cada carga feita em uma thread do pool
+        (ex.: anexar o contexto do script Streamlit)."""
+        self._carregadores = {}
+        self._dados = {}
+        self._estatisticas = {}
+        self._travas = {}
+        self._preparar_thread = preparar_thread
+        self._max_threads = max_threads
+
+    def registrar(self, nome, carregador):
+        """Registra `carregador()` como a fonte do dataset `nome` (não carrega nada)."""
+        self._carregadores[nome] = carregador
+        self._travas[nome] = threading.Lock()
+
+    def carregado(self, nome):
+        return nome in self._dados
+
+    def carregados(self):
+        """{nome: dataset} dos datasets já carregados (sem os que falharam)."""
+        return {nome: df for nome, df in self._dados.items() if df is not None}
+
+    def obter(self, nome):
+        """Retorna o dataset, carregando-o no primeiro acesso."""
+        if nome in self._dados:
+            return self._dados[nome]
+        if nome not in self._carregadores:
+            raise KeyError(f"Dataset não registrado: {nome}")
+
+        with self._travas[nome]:
+            if nome not in self._dados:
+                inicio = time.perf_counter()
+                df = self._carregadores[nome]()
+                duracao = time.perf_counter() - inicio
+                self._estatisticas[nome] = {
+                    'tempo_s': duracao,
+                    'memoria_bytes': memoria_dataset(df),
+                    'linhas': linhas_dataset(df),
+                }
+                logger.info(
+                    "dataset '%s' carregado em %.3fs (%.2f MB, %d linhas)",
+                    nome, duracao, self._estatisticas[nome]['memoria_bytes'] / 1e6,
+                    self._estatisticas[nome]['linhas'],
+                )
+                self._dados[nome] = df
+        return self._dados[nome]
+
+    def _obter_no_pool(self, nome):
+        if self._preparar_thread is not None:
+            self._preparar_thread()
+        return self.obter(nome)
+
+    def carregar(self, nomes):
+        """Carrega em paralelo os datasets ainda não carregados.
+
+        Falhas são registradas por dataset (`erro` no relatório) e o dataset
+        fica como None; os demais seguem normalmente.
+        """
+        pendentes = [n for n in dict.fromkeys(nomes) if n not in self._dados]
+        if not pendentes:
+            return
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self._max_threads or len(pendentes),
+                                thread_name_prefix='predictfy-carga') as pool:
+            futuros = {nome: pool.submit(self._obter_no_pool, nome) for nome in pendentes}
+        for nome, futuro in futuros.items():
+            erro = futuro.exception()
+            if erro is not None:
+                logger.error("falha ao carregar o dataset '%s': %s", nome, erro)
+                self._estatisticas[nome] = {'erro': f'{type(erro).__name__}: {erro}'}
+                self._dados[nome] = None
+        tempos = [self._estatisticas[n].get('tempo_s', 0.0) for n in pendentes]
+        logger.info(
+            "carga de %s: %.3fs de parede (soma %.3fs, mais lenta %.3fs)",
+            ', '.join(pendentes), time.perf_counter() - inicio, sum(tempos), max(tempos),
+        )
+
+    def requer(self, *nomes):
+        """Declara os datasets de uma seção e os retorna na mesma ordem.
+
+        Com mais de um dataset pendente, a carga é feita em paralelo.
+        """
+        if len([n for n in nomes if n not in self._dados]) > 1:
+            self.carregar(nomes)
+        return [self.obter(nome) for nome in nomes]
+
+    def relatorio(self):
+        """Tempo e memória de cada dataset registrado (não carregados ficam zerados)."""
+        linhas = []
+        for nome in self._carregadores:
+            est = self._estatisticas.get(nome, {})
+            linhas.append({
+                'dataset': nome,
+                'carregado': nome in self._dados and 'erro' not in est,
+                'tempo_s': est.get('tempo_s', 0.0),
+                'memoria_mb': est.get('memoria_bytes', 0) / 1e6,
+                'linhas': est.get('linhas', 0),
+                'erro': est.get('erro'),
+            })
+        return pd.DataFrame(linhas, columns=['dataset', 'carregado', 'tempo_s', 'memoria_mb', 'linhas', 'erro'])
+
+# ============================================================================
+# LINHA DE COMANDO
+# ============================================================================
+
+def main(argv=None):
+    from predictfy import dados
+    from predictfy.config import PASTA_CSV
+
+    parser = argparse.ArgumentParser(description="Tempo de carga dos datasets (sequencial x paralelo).")
+    parser.add_argument('--pasta', default=str(PASTA_CSV), help="Pasta com os CSVs.")
+    parser.add_argument('--sequencial', action='store_true', help="Carrega um dataset por vez.")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    registro = RegistroDatasets(max_threads=1 if args.sequencial else None)
+    for nome, ler in (('clusters', dados.ler_clusters), ('clientes', dados.ler_clientes),
+                      ('recomendacoes', dados.ler_recomendacoes)):
+        registro.registrar(nome, lambda ler=ler: ler(args.pasta))
+    registro.requer('clusters', 'clientes', 'recomendacoes')
+    print(registro.relatorio().to_string(index=False))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Drill-down de cluster para clientes, com paginação no servidor.
+
+`IndiceClusters` guarda, para a tabela de clientes, uma permutação das
+linhas agrupada por cluster e o deslocamento onde cada cluster começa nela:
+
+    ordem = [linhas do cluster 0 | linhas do cluster 1 | ...]
+    deslocamentos[c] .. deslocamentos[c + 1]  -> linhas do cluster c
+
+Uma página é só uma fatia dessa permutação, então cada pedido lê apenas as
+linhas (e colunas) que vai mostrar. Para ordenar por uma coluna, a
+permutação ordenada por (cluster, coluna) é calculada uma vez e reaproveitada
+(a ordem decrescente é a mesma fatia lida de trás para frente).
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+from predictfy.config import COLUNA_CLUSTER
+
+TAMANHO_PAGINA = 50
+
+class IndiceClusters:
+    """Índice cluster -> faixa de linhas de um DataFrame de clientes."""
+
+    def __init__(self, df, coluna_cluster=COLUNA_CLUSTER):
+        self.df = df
+        clusters = df[coluna_cluster].astype('category')
+        self.clusters = [str(c) for c in clusters.cat.categories]
+        self._codigos = clusters.cat.codes.to_numpy()
+        contagens = np.bincount(self._codigos[self._codigos >= 0], minlength=len(self.clusters))
+        self.deslocamentos = np.concatenate([[0], np.cumsum(contagens)])
+        self._posicao = {c: i for i, c in enumerate(self.clusters)}
+        self._ordens = {None: self._sem_cluster_fora(np.argsort(self._codigos, kind='stable'))}
+        self._trava = threading.Lock()
+
+    @property
+    def colunas(self):
+        return list(self.df.columns)
+
+    def total(self, cluster):
+        """Número de clientes do cluster."""
+        i = self._posicao[cluster]
+        return int(self.deslocamentos[i + 1] - self.deslocamentos[i])
+
+    def _sem_cluster_fora(self, ordem):
+        # Linhas sem cluster (código -1) ficam no início da ordem e saem do índice
+        return ordem[len(ordem) - int(self.deslocamentos[-1]):]
+
+    def _ordem(self, coluna):
+        """Permutação agrupada por cluster e ordenada por `coluna` dentro de cada um."""
+        if coluna not in self._ordens:
+            with self._trava:
+                if coluna not in self._ordens:
+                    valores = self.df[coluna]
+                    if isinstance(valores.dtype, pd.CategoricalDtype):
+                        valores = valores.cat.codes
+                    ordem = np.lexsort((valores.to_numpy(), self._codigos))
+                    self._ordens[coluna] = self._sem_cluster_fora(ordem)
+        return self._ordens[coluna]
+
+    def pagina(self, cluster, numero=0, tamanho=TAMANHO_PAGINA, ordenar_por=None,
+               decrescente=False, colunas=None):
+        """Linhas da página `numero` (a partir de 0) do cluster, só com `colunas`."""
+        i = self._posicao[cluster]
+        inicio, fim = int(self.deslocamentos[i]), int(self.deslocamentos[i + 1])
+        ordem = self._ordem(ordenar_por)
+        if decrescente and ordenar_por is not None:
+            a, b = max(fim - (numero + 1) * tamanho, inicio), max(fim - numero * tamanho, inicio)
+            linhas = ordem[a:b][::-1]
+        else:
+            a, b = min(inicio + numero * tamanho, fim), min(inicio + (numero + 1) * tamanho, fim)
+            linhas = ordem[a:b]
+        posicoes = [self.df.columns.get_loc(c) for c in (colunas or self.colunas)]
+        return self.df.iloc[linhas, posicoes]
+
+    def paginas(self, cluster, tamanho=TAMANHO_PAGINA):
+        return max(1, -(-self.total(cluster) // tamanho))
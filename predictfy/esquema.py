@@ -0,0 +1,143 @@
+"""
+Plano de tipos compacto para as tabelas carregadas.
+
+Sem plano, o `pd.read_csv` deixa `cluster`/`tipo` como strings Python (um
+objeto por linha) e todo número em 64 bits. Aqui:
+
+- colunas de rótulo (`cluster`, `tipo`) e strings de baixa cardinalidade
+  viram `category` (códigos inteiros + uma cópia de cada rótulo);
+- inteiros são reduzidos ao menor tipo com sinal que comporta os valores;
+- floats só são reduzidos onde o esquema declara (`score`): valores em
+  reais continuam em float64 para não perder centavos;
+- `tipo` é derivado das categorias do `cluster`, sem `.apply` por linha.
+
+`relatorio_memoria` compara a memória de cada tabela com o que ela ocuparia
+lida sem o plano.
+
+Uso:
+    python -m predictfy.esquema [--pasta Desafios/data/csv]
+"""
+
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from predictfy.config import (
+    ARQUIVO_CLIENTES,
+    ARQUIVO_CLUSTERS,
+    ARQUIVO_RECOMENDACOES,
+    COLUNA_CLUSTER,
+    PASTA_CSV,
+)
+
+TIPOS = ('Pessoa', 'Empresa')
+# Strings com menos valores distintos que esta fração das linhas viram category
+LIMITE_CARDINALIDADE = 0.5
+
+# dtypes passados ao `read_csv` (colunas ausentes no arquivo são ignoradas)
+DTYPES_LEITURA = {
+    ARQUIVO_CLUSTERS: {COLUNA_CLUSTER: 'category'},
+    ARQUIVO_CLIENTES: {COLUNA_CLUSTER: 'category'},
+    ARQUIVO_RECOMENDACOES: {},
+}
+
+# Colunas float que toleram float32
+FLOAT32 = {
+    ARQUIVO_RECOMENDACOES: ('score',),
+}
+
+# ============================================================================
+# PLANO DE TIPOS
+# ============================================================================
+
+def tipo_do_cluster(clusters):
+    """`tipo` (Pessoa/Empresa) de cada cluster, como Categorical.
+
+    A checagem de texto roda uma vez por categoria, não por linha.
+    """
+    clusters = pd.Series(clusters).astype('category')
+    por_categoria = np.where(clusters.cat.categories.str.contains('Empresa', regex=False), 1, 0)
+    codigos = np.where(clusters.cat.codes.to_numpy() >= 0, por_categoria[clusters.cat.codes.to_numpy()], -1)
+    return pd.Categorical.from_codes(codigos, categories=TIPOS)
+
+def compactar(df, float32=()):
+    """Aplica o plano de tipos em `df` (modifica e retorna o próprio DataFrame)."""
+    for coluna in df.columns:
+        serie = df[coluna]
+        if pd.api.types.is_integer_dtype(serie.dtype) and not isinstance(serie.dtype, pd.CategoricalDtype):
+            df[coluna] = pd.to_numeric(serie, downcast='integer')
+        elif pd.api.types.is_float_dtype(serie.dtype) and coluna in float32:
+            df[coluna] = serie.astype('float32')
+        elif serie.dtype == object and len(serie) and serie.nunique() < LIMITE_CARDINALIDADE * len(serie):
+            df[coluna] = serie.astype('category')
+    return df
+
+def preparador(arquivo):
+    """Função que aplica o plano de tipos de `arquivo` (para o cache colunar)."""
+    float32 = FLOAT32.get(arquivo, ())
+
+    def preparar(df):
+        return compactar(df, float32)
+
+    preparar.__qualname__ = f'compactar[{arquivo}]'
+    return preparar
+
+# ============================================================================
+# RELATÓRIO DE MEMÓRIA
+# ============================================================================
+
+def _memoria_sem_plano(serie):
+    """Bytes que a coluna ocuparia lida sem o plano (strings como objetos, números em 64 bits)."""
+    n = len(serie)
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        categorias = serie.cat.categories
+        if categorias.dtype != object:
+            return 8 * n
+        tamanhos = np.array([sys.getsizeof(c) for c in categorias] + [sys.getsizeof(np.nan)])
+        return 8 * n + int(tamanhos[serie.cat.codes.to_numpy()].sum())
+    if pd.api.types.is_numeric_dtype(serie.dtype) or pd.api.types.is_bool_dtype(serie.dtype):
+        return 8 * n
+    return int(serie.memory_usage(deep=True, index=False))
+
+def relatorio_memoria(tabelas):
+    """Memória por tabela, com e sem o plano de tipos ({nome: DataFrame} -> DataFrame)."""
+    linhas = []
+    for nome, df in tabelas.items():
+        if df is None:
+            continue
+        atual = int(df.memory_usage(deep=True).sum())
+        indice = int(df.index.memory_usage(deep=True))
+        sem_plano = indice + sum(_memoria_sem_plano(df[c]) for c in df.columns)
+        linhas.append({
+            'tabela': nome,
+            'linhas': len(df),
+            'memoria_mb': atual / 1024**2,
+            'sem_plano_mb': sem_plano / 1024**2,
+            'economia_pct': (1 - atual / sem_plano) * 100 if sem_plano else 0.0,
+        })
+    return pd.DataFrame(linhas, columns=['tabela', 'linhas', 'memoria_mb', 'sem_plano_mb', 'economia_pct'])
+
+# ============================================================================
+# LINHA DE COMANDO
+# ============================================================================
+
+def main(argv=None):
+    from predictfy import dados
+
+    parser = argparse.ArgumentParser(description="Relatório de memória das tabelas com o plano de tipos.")
+    parser.add_argument('--pasta', default=str(PASTA_CSV), help="Pasta com os CSVs.")
+    args = parser.parse_args(argv)
+
+    tabelas = {}
+    for nome, ler in (('clusters', dados.ler_clusters), ('clientes', dados.ler_clientes),
+                      ('recomendacoes', dados.ler_recomendacoes)):
+        try:
+            tabelas[nome] = ler(args.pasta)
+        except OSError:
+            print(f"⚠️  {nome}: arquivo não encontrado")
+    print(relatorio_memoria(tabelas).to_string(index=False, float_format=lambda x: f'{x:,.2f}'))
+
+if __name__ == '__main__':
+    main()
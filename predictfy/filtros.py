@@ -0,0 +1,170 @@
+"""
+Filtros interativos da dashboard (PF/PJ, clusters e faixa de recência).
+
+`IndiceFiltros` agrega a tabela de clientes uma vez, numa grade
+cluster × faixa de recência com a contagem e as somas de recência,
+frequência e gasto de cada célula:
+
+    contagem[c, f], somas['monetary'][c, f], ...
+
+Um filtro só escolhe linhas (clusters) e colunas (faixas) dessa grade e soma
+as células: o custo depende do número de clusters e faixas, não do número
+de clientes, e fica bem abaixo de 1 ms.
+
+`snapshot_filtrado` aplica os filtros ao snapshot da página (base completa
+ou período do cubo), que alimenta as seções PF e PJ da dashboard.
+
+Uso (tempo de montagem do índice e de um filtro):
+    python -m predictfy.filtros [--pasta Desafios/data/csv] [--tipo PJ] [--repeticoes 1000]
+"""
+
+import argparse
+import hashlib
+import time
+
+import numpy as np
+import pandas as pd
+
+from predictfy import snapshot
+from predictfy.config import COLUNA_CLUSTER, METRICAS_RFM
+from predictfy.esquema import tipo_do_cluster
+
+# Faixas de recência (dias desde a última compra), fechadas à direita
+LIMITES_RECENCIA = (90, 180, 365, 950)
+FAIXAS_RECENCIA = ('até 90 dias', '91–180 dias', '181–365 dias', '366–950 dias', '+950 dias')
+TIPOS_FILTRO = {'PF': 'Pessoa', 'PJ': 'Empresa'}
+COLUNAS_SNAPSHOT = ['cluster', 'tipo', 'quantidade', 'recencia_media', 'frequencia_media', 'gasto_medio_total']
+
+class IndiceFiltros:
+    """Contagens e somas RFM por (cluster, faixa de recência) de um DataFrame de clientes."""
+
+    def __init__(self, df, coluna_cluster=COLUNA_CLUSTER):
+        clusters = df[coluna_cluster].astype('category')
+        self.clusters = [str(c) for c in clusters.cat.categories]
+        self.tipos = np.asarray(tipo_do_cluster(pd.Series(self.clusters)).astype(str))
+        self.faixas = list(FAIXAS_RECENCIA)
+
+        recencia = df['recency'].to_numpy(dtype='float64')
+        codigos = clusters.cat.codes.to_numpy()
+        validos = (codigos >= 0) & ~np.isnan(recencia)
+        celulas = codigos[validos] * len(self.faixas) + np.searchsorted(LIMITES_RECENCIA, recencia[validos])
+        forma = (len(self.clusters), len(self.faixas))
+        n = forma[0] * forma[1]
+        self.contagem = np.bincount(celulas, minlength=n).reshape(forma)
+        self.somas = {
+            m: np.bincount(celulas, weights=np.nan_to_num(df[m].to_numpy(dtype='float64')[validos]),
+                           minlength=n).reshape(forma)
+            for m in METRICAS_RFM
+        }
+
+    def clusters_do_tipo(self, tipo=None):
+        """Clusters de `tipo` ('PF', 'PJ' ou None para todos)."""
+        if tipo not in TIPOS_FILTRO:
+            return list(self.clusters)
+        return [c for c, t in zip(self.clusters, self.tipos) if t == TIPOS_FILTRO[tipo]]
+
+    def filtrar(self, tipo=None, clusters=None, faixas=None):
+        """KPIs dos clientes dentro do filtro e a quebra por cluster.
+
+        Listas vazias (ou None) em `clusters`/`faixas` não restringem nada.
+        """
+        linhas = np.ones(len(self.clusters), dtype=bool)
+        if tipo in TIPOS_FILTRO:
+            linhas &= self.tipos == TIPOS_FILTRO[tipo]
+        if clusters:
+            linhas &= np.isin(self.clusters, list(clusters))
+        colunas = np.isin(self.faixas, list(faixas)) if faixas else np.ones(len(self.faixas), dtype=bool)
+
+        contagem = self.contagem[linhas][:, colunas].sum(axis=1)
+        somas = {m: s[linhas][:, colunas].sum(axis=1) for m, s in self.somas.items()}
+        total = int(contagem.sum())
+
+        def media(valores, quantidade):
+            return float(valores / quantidade) if quantidade else 0.0
+
+        por_cluster = pd.DataFrame({
+            'cluster': np.asarray(self.clusters, dtype=object)[linhas],
+            'clientes': contagem,
+            'recencia_media': np.divide(somas['recency'], contagem, out=np.zeros(len(contagem)), where=contagem > 0),
+            'frequencia_media': np.divide(somas['frequency'], contagem, out=np.zeros(len(contagem)), where=contagem > 0),
+            'gasto_medio': np.divide(somas['monetary'], contagem, out=np.zeros(len(contagem)), where=contagem > 0),
+            'gasto_total': somas['monetary'],
+        })
+        return {
+            'clientes': total,
+            'recencia_media': media(somas['recency'].sum(), total),
+            'frequencia_media': media(somas['frequency'].sum(), total),
+            'gasto_medio': media(somas['monetary'].sum(), total),
+            'gasto_total': float(somas['monetary'].sum()),
+            'por_cluster': por_cluster[por_cluster['clientes'] > 0].reset_index(drop=True),
+        }
+
+# ============================================================================
+# SNAPSHOT FILTRADO
+# ============================================================================
+
+def clusters_do_snapshot(snap, tipo=None):
+    """Clusters de `tipo` ('PF', 'PJ' ou None para todos) presentes no snapshot."""
+    recortes = {'PF': ('df_pessoa',), 'PJ': ('df_empresa',)}.get(tipo, ('df_pessoa', 'df_empresa'))
+    return [c for nome in recortes for c in snap[nome]['cluster']]
+
+def snapshot_filtrado(snap, tipo=None, clusters=None, faixas=None, indice=None):
+    """Snapshot `snap` restrito ao tipo, aos clusters e às faixas de recência.
+
+    Tipo e clusters só escolhem linhas dos recortes PF/PJ (vale também para o
+    snapshot de um período). Faixas precisam do `indice`: cada cluster é
+    re-somado só com as células das faixas escolhidas, e os quantis do
+    cluster inteiro deixam de valer.
+    """
+    df = pd.concat([snap['df_pessoa'], snap['df_empresa']], ignore_index=True)
+    linhas = np.ones(len(df), dtype=bool)
+    if tipo in TIPOS_FILTRO:
+        linhas &= (df['tipo'] == TIPOS_FILTRO[tipo]).to_numpy()
+    if clusters:
+        linhas &= df['cluster'].isin(list(clusters)).to_numpy()
+    df = df.loc[linhas, COLUNAS_SNAPSHOT + [c for c in df if c.endswith(('_p50', '_p90', '_p99'))]]
+
+    if faixas:
+        por_cluster = indice.filtrar(tipo, clusters, faixas)['por_cluster'].rename(
+            columns={'clientes': 'quantidade', 'gasto_medio': 'gasto_medio_total'})
+        df = df[['cluster', 'tipo']].merge(por_cluster[COLUNAS_SNAPSHOT[:1] + COLUNAS_SNAPSHOT[2:]], on='cluster')
+
+    chave = repr((tipo, sorted(clusters or ()), sorted(faixas or ())))
+    versao = f"{snap['versao_dados']}-f{hashlib.blake2b(chave.encode(), digest_size=6).hexdigest()}"
+    filtrado = snapshot.calcular_snapshot(df, versao)
+    filtrado['tem_quantis'] = snap['tem_quantis'] and not faixas
+    if snap.get('periodo'):
+        filtrado['periodo'] = snap['periodo']
+    return filtrado
+
+# ============================================================================
+# LINHA DE COMANDO
+# ============================================================================
+
+def main(argv=None):
+    from predictfy import dados
+    from predictfy.config import PASTA_CSV
+
+    parser = argparse.ArgumentParser(description="Tempo de montagem do índice de filtros e de um filtro.")
+    parser.add_argument('--pasta', default=str(PASTA_CSV), help="Pasta com os CSVs.")
+    parser.add_argument('--tipo', choices=sorted(TIPOS_FILTRO), default=None)
+    parser.add_argument('--faixa', action='append', choices=FAIXAS_RECENCIA, help="Faixa de recência (repetível).")
+    parser.add_argument('--repeticoes', type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    df = dados.ler_clientes(args.pasta)
+    inicio = time.perf_counter()
+    indice = IndiceFiltros(df)
+    montagem = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    for _ in range(args.repeticoes):
+        resultado = indice.filtrar(args.tipo, faixas=args.faixa)
+    por_filtro = (time.perf_counter() - inicio) / args.repeticoes
+
+    print(resultado['por_cluster'].to_string(index=False))
+    print(f"\n{resultado['clientes']} clientes · gasto médio R$ {resultado['gasto_medio']:.2f}")
+    print(f"✅ índice de {len(df)} clientes em {montagem * 1e3:.1f} ms; filtro em {por_filtro * 1e3:.3f} ms")
+
+if __name__ == '__main__':
+    main()
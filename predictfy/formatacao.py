@@ -0,0 +1,14 @@
+"""
+Formatação de números para cards e gráficos.
+"""
+
+def formatar_numero(n):
+    """Formata número de forma compacta."""
+    if abs(n) < 1000:
+        return f'{n:.0f}'
+    elif abs(n) < 1_000_000:
+        return f'{n/1000:.1f}k'.replace('.0k', 'k')
+    elif abs(n) < 1_000_000_000:
+        return f'{n/1_000_000:.1f}M'.replace('.0M', 'M')
+    else:
+        return f'{n/1_000_000_000:.1f}G'.replace('.0G', 'G')
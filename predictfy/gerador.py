@@ -0,0 +1,208 @@
+"""
+Gerador determinístico de dados sintéticos no layout da ClickBus.
+
+Gera, bloco a bloco e gravando direto em disco:
+
+- `cliente.csv`: um cliente por linha com cluster e RFM (recency, frequency,
+  monetary), sorteados a partir dos perfis (média/mín/máx) do `cluster.csv`;
+- `compras/compras_NNNNN.csv`: as compras brutas de cada cliente, coerentes
+  com o RFM dele (o motor `predictfy.rfm` reconstrói o `cliente.csv`);
+- `recomendacoes_finais_desafio3.csv`: top-k próximos trechos por cliente;
+- `cluster.csv` e `cluster_quantis.json`: agregados a partir do `cliente.csv`
+  (`predictfy.quantis`).
+
+A memória fica limitada ao tamanho do bloco, então a mesma chamada serve de
+milhares a centenas de milhões de linhas. Mesma semente e mesmo tamanho de
+bloco geram exatamente os mesmos arquivos.
+
+Uso:
+    python -m predictfy.gerador --pasta /tmp/dados --clientes 1000000
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from predictfy import quantis, rfm
+from predictfy.config import (
+    ARQUIVO_CLIENTES,
+    ARQUIVO_CLUSTERS,
+    ARQUIVO_QUANTIS,
+    ARQUIVO_RECOMENDACOES,
+    COLUNA_CLIENTE,
+    COLUNA_CLUSTER,
+    COLUNA_DATA,
+    COLUNA_DESTINO,
+    COLUNA_ORIGEM,
+    COLUNA_VALOR,
+    PASTA_COMPRAS,
+    RAIZ_PROJETO,
+)
+
+PERFIS_PADRAO = RAIZ_PROJETO / 'Desafios' / 'data' / 'csv' / ARQUIVO_CLUSTERS
+DATA_REFERENCIA = '2024-04-01'
+TAMANHO_BLOCO = 200_000
+N_CIDADES = 400
+TOP_K = 3
+# Quanto maior, mais concentrados em torno da média ficam os valores sorteados
+CONCENTRACAO = 4.0
+# Janela (dias) em que caem as compras anteriores à última
+JANELA_HISTORICO = 1500
+
+# ============================================================================
+# SORTEIOS
+# ============================================================================
+
+def ler_perfis(caminho=PERFIS_PADRAO):
+    """Perfis dos clusters (média/mín/máx de RFM e proporção de clientes)."""
+    perfis = pd.read_csv(caminho)
+    perfis['proporcao'] = perfis['Qtd'] / perfis['Qtd'].sum()
+    return perfis
+
+def _sortear(rng, perfis, idx, metrica):
+    """Sorteia `metrica` entre mín e máx do cluster, com média próxima à do perfil.
+
+    Usa uma Beta escalada para o intervalo [mín, máx] cuja média é a média do
+    cluster: reproduz a assimetria dos dados reais (monetary de PJ etc.).
+    """
+    minimo = perfis[f'{metrica}_min'].to_numpy(dtype='float64')[idx]
+    maximo = perfis[f'{metrica}_max'].to_numpy(dtype='float64')[idx]
+    media = perfis[f'{metrica}_mean'].to_numpy(dtype='float64')[idx]
+    amplitude = np.maximum(maximo - minimo, 1e-9)
+    p = np.clip((media - minimo) / amplitude, 0.01, 0.99)
+    return minimo + amplitude * rng.beta(p * CONCENTRACAO, (1 - p) * CONCENTRACAO)
+
+def gerar_clientes(rng, perfis, inicio, n):
+    """Bloco de `n` clientes com ids a partir de `inicio`."""
+    idx = rng.choice(len(perfis), size=n, p=perfis['proporcao'].to_numpy())
+    if inicio == 0:
+        # Garante ao menos um cliente por cluster (PJ é raro em bases pequenas)
+        k = min(n, len(perfis))
+        idx[:k] = np.arange(k)
+    return pd.DataFrame({
+        COLUNA_CLIENTE: np.arange(inicio, inicio + n, dtype='int64'),
+        COLUNA_CLUSTER: perfis[COLUNA_CLUSTER].to_numpy()[idx],
+        'recency': np.rint(_sortear(rng, perfis, idx, 'recency')).astype('int64'),
+        'frequency': np.maximum(np.rint(_sortear(rng, perfis, idx, 'frequency')), 1).astype('int64'),
+        'monetary': np.round(_sortear(rng, perfis, idx, 'monetary'), 2),
+    })
+
+def gerar_compras(rng, clientes, data_referencia, primeiro_pedido):
+    """Compras brutas coerentes com o RFM de cada cliente do bloco.
+
+    A primeira compra de cada cliente é a mais recente (data de referência
+    menos a recência) e os valores somam exatamente o `monetary`, em centavos.
+    """
+    freq = clientes['frequency'].to_numpy()
+    total = int(freq.sum())
+    dono = np.repeat(np.arange(len(clientes)), freq)
+    inicio_cliente = np.cumsum(freq) - freq
+    primeira = np.zeros(total, dtype=bool)
+    primeira[inicio_cliente] = True
+
+    ultima = np.datetime64(data_referencia, 'D') - clientes['recency'].to_numpy()[dono].astype('timedelta64[D]')
+    atraso = np.where(primeira, 0, rng.integers(1, JANELA_HISTORICO, total))
+    datas = ultima - atraso.astype('timedelta64[D]')
+
+    # Divide o monetary do cliente entre as compras, em centavos inteiros
+    pesos = rng.random(total) + 0.1
+    soma_pesos = np.add.reduceat(pesos, inicio_cliente)[dono]
+    centavos_cliente = np.rint(clientes['monetary'].to_numpy() * 100).astype('int64')
+    centavos = np.floor(pesos / soma_pesos * centavos_cliente[dono]).astype('int64')
+    resto = centavos_cliente - np.add.reduceat(centavos, inicio_cliente)
+    centavos[inicio_cliente] += resto
+
+    origem = rng.integers(0, N_CIDADES, total)
+    destino = (origem + rng.integers(1, N_CIDADES, total)) % N_CIDADES
+    return pd.DataFrame({
+        'nk_ota_localizer_id': np.arange(primeiro_pedido, primeiro_pedido + total, dtype='int64'),
+        COLUNA_CLIENTE: clientes[COLUNA_CLIENTE].to_numpy()[dono],
+        COLUNA_DATA: datas,
+        COLUNA_ORIGEM: origem,
+        COLUNA_DESTINO: destino,
+        COLUNA_VALOR: centavos / 100,
+        'total_tickets_quantity_success': rng.integers(1, 4, total),
+    })
+
+def gerar_recomendacoes(rng, clientes, top_k=TOP_K):
+    """Top-k próximos trechos por cliente, com score decrescente."""
+    n = len(clientes)
+    origem = rng.integers(0, N_CIDADES, n * top_k)
+    destino = (origem + rng.integers(1, N_CIDADES, n * top_k)) % N_CIDADES
+    score = np.sort(rng.random((n, top_k)), axis=1)[:, ::-1].ravel()
+    return pd.DataFrame({
+        COLUNA_CLIENTE: np.repeat(clientes[COLUNA_CLIENTE].to_numpy(), top_k),
+        'ranking': np.tile(np.arange(1, top_k + 1), n),
+        COLUNA_ORIGEM: origem,
+        COLUNA_DESTINO: destino,
+        'score': score.round(4),
+    })
+
+# ============================================================================
+# GERAÇÃO EM DISCO
+# ============================================================================
+
+def gerar(pasta, n_clientes, semente=42, tamanho_bloco=TAMANHO_BLOCO, compras=True,
+          recomendacoes=True, cluster=True, perfis=PERFIS_PADRAO, data_referencia=DATA_REFERENCIA):
+    """Gera a base sintética em `pasta`, um bloco de clientes por vez."""
+    pasta = Path(pasta)
+    pasta.mkdir(parents=True, exist_ok=True)
+    perfis = ler_perfis(perfis)
+    if compras:
+        (pasta / PASTA_COMPRAS).mkdir(exist_ok=True)
+
+    # Uma semente independente por bloco: o bloco i não depende dos anteriores
+    sementes = np.random.SeedSequence(semente).spawn((n_clientes + tamanho_bloco - 1) // tamanho_bloco)
+    proximo_pedido = 0
+    for i, inicio in enumerate(range(0, n_clientes, tamanho_bloco)):
+        rng = np.random.default_rng(sementes[i])
+        clientes = gerar_clientes(rng, perfis, inicio, min(tamanho_bloco, n_clientes - inicio))
+        primeiro = i == 0
+
+        clientes.to_csv(pasta / ARQUIVO_CLIENTES, index=False, mode='w' if primeiro else 'a', header=primeiro)
+        if recomendacoes:
+            gerar_recomendacoes(rng, clientes).to_csv(
+                pasta / ARQUIVO_RECOMENDACOES, index=False, mode='w' if primeiro else 'a', header=primeiro
+            )
+        if compras:
+            df_compras = gerar_compras(rng, clientes, data_referencia, proximo_pedido)
+            df_compras.to_csv(pasta / PASTA_COMPRAS / f'compras_{i:05d}.csv', index=False)
+            proximo_pedido += len(df_compras)
+
+    if cluster:
+        df_clusters, esbocos = quantis.agregar_clientes(pasta / ARQUIVO_CLIENTES)
+        rfm.salvar_clusters(df_clusters, pasta / ARQUIVO_CLUSTERS)
+        quantis.salvar_esbocos(esbocos, pasta / ARQUIVO_QUANTIS)
+    return pasta
+
+# ============================================================================
+# LINHA DE COMANDO
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera dados sintéticos no layout da ClickBus.")
+    parser.add_argument('--pasta', required=True, help="Pasta de saída.")
+    parser.add_argument('--clientes', type=int, default=100_000)
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--tamanho-bloco', type=int, default=TAMANHO_BLOCO)
+    parser.add_argument('--perfis', default=str(PERFIS_PADRAO), help="cluster.csv usado como perfil.")
+    parser.add_argument('--data-referencia', default=DATA_REFERENCIA)
+    parser.add_argument('--sem-compras', action='store_true')
+    parser.add_argument('--sem-recomendacoes', action='store_true')
+    parser.add_argument('--sem-cluster', action='store_true')
+    args = parser.parse_args(argv)
+
+    pasta = gerar(
+        args.pasta, args.clientes, args.semente, args.tamanho_bloco,
+        compras=not args.sem_compras,
+        recomendacoes=not args.sem_recomendacoes,
+        cluster=not args.sem_cluster,
+        perfis=args.perfis,
+        data_referencia=args.data_referencia,
+    )
+    print(f"✅ {args.clientes:,} clientes gerados em {pasta}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Construtores de gráficos da dashboard.
+
+Cada gráfico é um único trace com arrays (cores, textos, hover por ponto),
+então o tamanho da figura cresce só com os dados, e não com um trace por
+cluster. As paletas são geradas sob demanda para qualquer número de
+segmentos, interpolando as cores base do tema.
+
+O `plotly` só é importado ao construir um gráfico, não no import do módulo.
+"""
+
+from predictfy.formatacao import formatar_numero
+
+# ============================================================================
+# PALETAS
+# ============================================================================
+
+def _hex_para_rgb(cor):
+    cor = cor.lstrip('#')
+    return tuple(int(cor[i:i + 2], 16) for i in (0, 2, 4))
+
+def _rgb_para_hex(rgb):
+    return '#' + ''.join(f'{round(c):02x}' for c in rgb)
+
+def gerar_paleta(cores_base, n):
+    """Retorna `n` cores: as cores base se bastarem, senão um degradê entre elas."""
+    if n <= len(cores_base):
+        return list(cores_base[:n])
+    if len(cores_base) == 1:
+        return list(cores_base) * n
+
+    rgb = [_hex_para_rgb(c) for c in cores_base]
+    trechos = len(rgb) - 1
+    paleta = []
+    for i in range(n):
+        pos = i / (n - 1) * trechos
+        j = min(int(pos), trechos - 1)
+        t = pos - j
+        paleta.append(_rgb_para_hex(a + (b - a) * t for a, b in zip(rgb[j], rgb[j + 1])))
+    return paleta
+
+# ============================================================================
+# LAYOUT
+# ============================================================================
+
+def titulo(texto):
+    """Título no padrão dos cards (canto superior esquerdo)."""
+    return dict(
+        text=texto,
+        font=dict(color='#fafafa', size=16, family='Inter'),
+        x=0.05, y=0.95, xanchor='left', yanchor='top'
+    )
+
+# ============================================================================
+# GRÁFICOS
+# ============================================================================
+
+def barras_horizontais(df, rotulo, valor, cores_base, texto_titulo, altura,
+                       margem, tamanho_texto=12, hover=None, eixo_x=None):
+    """Barras horizontais (um trace só) com um segmento por linha de `df`.
+
+    `hover` é a coluna exibida em negrito no tooltip; sem ela o tooltip
+    padrão do Plotly é usado.
+    """
+    import plotly.graph_objects as go
+
+    valores = df[valor].to_numpy()
+    barras = go.Bar(
+        y=df[rotulo].to_numpy(),
+        x=valores,
+        orientation='h',
+        marker=dict(color=gerar_paleta(cores_base, len(df)), line=dict(color='white', width=2)),
+        text=[f"R$ {formatar_numero(v)}" for v in valores],
+        textposition='auto',
+        textfont=dict(color='white', size=tamanho_texto, family='Inter'),
+        showlegend=False,
+    )
+    if hover is not None:
+        barras.customdata = df[hover].to_numpy()
+        barras.hovertemplate = "<b>%{customdata}</b><br>R$ %{x:.2f}<extra></extra>"
+
+    fig = go.Figure(barras)
+    fig.update_layout(
+        title=titulo(texto_titulo),
+        height=altura,
+        margin=margem,
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        xaxis=eixo_x or dict(showgrid=False, color='white'),
+        yaxis=dict(showgrid=False, color='white'),
+        font=dict(color='white', family='Inter'),
+        autosize=True
+    )
+    return fig
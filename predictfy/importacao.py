@@ -0,0 +1,139 @@
+"""
+Imports tardios e perfil de tempo de import.
+
+`tardio('plotly.express')` devolve um módulo substituto que só faz o import
+de verdade no primeiro acesso a um atributo. Com o cache de figuras, o
+`plotly.express` só é importado quando algum gráfico precisa ser construído
+(na maior parte dos processos, nunca). O tempo de cada import tardio fica em
+`TEMPOS_TARDIOS`, exportado pelo app como gauge.
+
+`perfil_importacao` roda `python -X importtime` em um processo novo e
+resume o custo de cada pacote, para acompanhar o cold start das réplicas.
+
+Uso:
+    python -m predictfy.importacao                # imports do topo do app.py
+    python -m predictfy.importacao plotly.express --top 15
+"""
+
+import argparse
+import ast
+import importlib
+import importlib.util
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+ARQUIVO_APP = Path(__file__).resolve().parent.parent / 'app.py'
+
+TEMPOS_TARDIOS = {}
+
+# ============================================================================
+# IMPORT TARDIO
+# ============================================================================
+
+class ModuloTardio:
+    """Substituto de um módulo que o importa no primeiro acesso."""
+
+    def __init__(self, nome):
+        self._nome = nome
+        self._modulo = None
+        self._trava = threading.Lock()
+
+    def _carregar(self):
+        if self._modulo is None:
+            with self._trava:
+                if self._modulo is None:
+                    inicio = time.perf_counter()
+                    modulo = importlib.import_module(self._nome)
+                    TEMPOS_TARDIOS[self._nome] = time.perf_counter() - inicio
+                    self._modulo = modulo
+        return self._modulo
+
+    def __getattr__(self, atributo):
+        return getattr(self._carregar(), atributo)
+
+    def __repr__(self):
+        estado = 'carregado' if self._modulo is not None else 'não carregado'
+        return f'<módulo tardio {self._nome!r} ({estado})>'
+
+def tardio(nome):
+    """Módulo `nome` importado só quando for usado."""
+    return sys.modules.get(nome) or ModuloTardio(nome)
+
+# ============================================================================
+# PERFIL
+# ============================================================================
+
+def _eh_submodulo(nome):
+    try:
+        return importlib.util.find_spec(nome) is not None
+    except (ImportError, ValueError):
+        return False
+
+def imports_do_app(caminho=ARQUIVO_APP):
+    """Módulos importados no topo de `caminho` (o que toda réplica paga ao subir), na ordem."""
+    arvore = ast.parse(Path(caminho).read_text(encoding='utf-8'))
+    modulos = []
+    for no in arvore.body:
+        if isinstance(no, ast.Import):
+            nomes = [alias.name for alias in no.names]
+        elif isinstance(no, ast.ImportFrom) and not no.level:
+            # `from predictfy import assets` importa o submódulo predictfy.assets
+            nomes = [no.module] + [f'{no.module}.{alias.name}' for alias in no.names
+                                   if _eh_submodulo(f'{no.module}.{alias.name}')]
+        else:
+            continue
+        modulos += [nome for nome in nomes if nome not in modulos]
+    return modulos
+
+def perfil_importacao(modulos=None):
+    """Tempo de import (próprio e acumulado, em ms) de cada módulo em um processo novo.
+
+    Retorna (total_ms, linhas) com linhas = [(módulo, próprio_ms, acumulado_ms, nível)].
+    Sem `modulos`, usa os imports do topo do app.py.
+    """
+    modulos = imports_do_app() if modulos is None else modulos
+    codigo = '; '.join(f'import {m}' for m in modulos)
+    inicio = time.perf_counter()
+    saida = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', codigo],
+        capture_output=True, text=True, check=True,
+    )
+    total_ms = (time.perf_counter() - inicio) * 1000
+    linhas = []
+    for linha in saida.stderr.splitlines():
+        if not linha.startswith('import time:') or 'self [us]' in linha:
+            continue
+        proprio, acumulado, nome = linha[len('import time:'):].split('|')
+        nivel = (len(nome) - len(nome.lstrip())) // 2
+        linhas.append((nome.strip(), int(proprio) / 1000, int(acumulado) / 1000, nivel))
+    return total_ms, linhas
+
+def relatorio(linhas, top=20, nivel_maximo=1):
+    """Texto com os módulos mais caros até `nivel_maximo` de profundidade."""
+    selecionadas = sorted((l for l in linhas if l[3] <= nivel_maximo), key=lambda l: -l[2])[:top]
+    largura = max((len(l[0]) for l in selecionadas), default=10)
+    texto = [f"{'módulo'.ljust(largura)}  {'próprio ms':>10}  {'acumulado ms':>12}"]
+    for nome, proprio, acumulado, nivel in selecionadas:
+        texto.append(f'{nome.ljust(largura)}  {proprio:>10.1f}  {acumulado:>12.1f}')
+    return '\n'.join(texto)
+
+# ============================================================================
+# LINHA DE COMANDO
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Perfil de tempo de import (python -X importtime).")
+    parser.add_argument('modulos', nargs='*', help="Padrão: imports do topo do app.py.")
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--nivel', type=int, default=1, help="Profundidade máxima de módulos listados.")
+    args = parser.parse_args(argv)
+
+    total_ms, linhas = perfil_importacao(args.modulos or None)
+    print(relatorio(linhas, args.top, args.nivel))
+    print(f"\nProcesso completo (interpretador + imports): {total_ms:.0f} ms")
+
+if __name__ == '__main__':
+    main()
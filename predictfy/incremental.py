@@ -0,0 +1,281 @@
+"""
+Agregados RFM incrementais e combináveis por cluster.
+
+Em vez de recalcular `recency_*`, `frequency_*` e `monetary_*` sobre todo o
+histórico, cada cluster guarda um estado pequeno:
+
+    Qtd, ultima_sum/min/max/min_qtd, frequency_sum/min/max/min_qtd, monetary_sum/min/max/min_qtd
+
+onde `ultima` é a data da última compra (em dias desde 1970-01-01). A
+recência só é calculada na hora de renderizar o `cluster.csv`, para a data
+de referência pedida, então o estado não "envelhece".
+
+- `combinar` une estados de partições diferentes (clientes disjuntos),
+  por exemplo calculados em workers separados: soma, mín e máx.
+- `aplicar_delta` incorpora as compras de um dia. Somas e máximos são
+  atualizados só com os clientes tocados (frequência, gasto e última compra
+  nunca diminuem). `<métrica>_min_qtd` conta quantos clientes detêm o
+  mínimo: um detentor tocado só desconta 1, e o cluster só é varrido de
+  novo quando o último detentor sai do mínimo (raro com mínimos muito
+  repetidos, como frequência 1), então o custo fica proporcional ao delta.
+
+A pertença a cluster é fixa entre deltas (modo complementar ao
+`predictfy.clusterizacao`, que reatribui todos os clientes). Clientes novos
+recebem cluster pelo modelo de `predictfy.clusterizacao` do seu tipo, que
+vem de um CSV `fk_contact,tipo` (`--tipos`); sem tipo conhecido, ficam fora
+dos agregados até um delta seguinte trazer o tipo.
+
+Uso:
+    python -m predictfy.incremental iniciar --data-referencia 2024-04-01
+    python -m predictfy.incremental aplicar compras_2024-04-02.csv --tipos cadastro.csv
+    python -m predictfy.incremental combinar parte_a.parquet parte_b.parquet --saida total.parquet
+    python -m predictfy.incremental renderizar --data-referencia 2024-04-02
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from predictfy import clusterizacao, rfm
+from predictfy.config import ARQUIVO_CLUSTERS, COLUNA_CLUSTER, PASTA_CSV
+
+METRICAS_ESTADO = ('ultima', 'frequency', 'monetary')
+ARQUIVO_AGREGADOS = 'agregados.parquet'
+# Estado por cliente próprio: o de `clusterizacao` (clientes.parquet) tem outra pertença
+ARQUIVO_ESTADO = 'clientes_incremental.parquet'
+
+# ============================================================================
+# ESTADO POR CLUSTER
+# ============================================================================
+
+def _dias(datas):
+    """Datas -> dias desde 1970-01-01 (inteiros)."""
+    return np.asarray(datas, dtype='datetime64[D]').astype('int64')
+
+def _metricas_clientes(estado_clientes):
+    """Colunas do estado por cliente usadas nos agregados."""
+    return pd.DataFrame({
+        COLUNA_CLUSTER: estado_clientes['cluster'],
+        'ultima': _dias(estado_clientes['ultima_compra']),
+        'frequency': estado_clientes['frequency'].to_numpy(),
+        'monetary': estado_clientes['monetary'].to_numpy(dtype='float64'),
+    }, index=estado_clientes.index)
+
+def _detentores_minimo(metricas, m):
+    """Quantos clientes de cada cluster têm o valor mínimo da métrica `m`."""
+    grupos = metricas.groupby(COLUNA_CLUSTER, sort=False, observed=True)[m]
+    detentores = (metricas[m] == grupos.transform('min')).groupby(metricas[COLUNA_CLUSTER], observed=True).sum()
+    detentores.index = detentores.index.astype(str)
+    return detentores
+
+def agregar(estado_clientes):
+    """Estado por cluster a partir do estado por cliente (uma partição)."""
+    metricas = _metricas_clientes(estado_clientes)
+    parcial = rfm.parcial_clusters(metricas, METRICAS_ESTADO)
+    for m in METRICAS_ESTADO:
+        parcial[f'{m}_min_qtd'] = _detentores_minimo(metricas, m).reindex(parcial.index).to_numpy()
+    return parcial
+
+def combinar(*estados):
+    """Une estados de partições com clientes disjuntos em um só.
+
+    Os detentores do mínimo somam só nas partições cujo mínimo é o do total.
+    """
+    estados = [e for e in estados if e is not None and len(e)]
+    total = rfm.combinar_parciais(estados, METRICAS_ESTADO)
+    if not estados:
+        return total
+    partes = pd.concat(estados)
+    for m in METRICAS_ESTADO:
+        coluna = f'{m}_min_qtd'
+        # Estados sem a contagem (gravados antes dela) contam 0: o cluster é varrido no próximo delta
+        detentores = partes[coluna].fillna(0) if coluna in partes else pd.Series(0, index=partes.index)
+        no_minimo = partes[f'{m}_min'].to_numpy() == total.loc[partes.index, f'{m}_min'].to_numpy()
+        total[coluna] = detentores.where(no_minimo, 0).groupby(level=0).sum().reindex(total.index).astype('int64')
+    return total
+
+def renderizar(agregados, data_referencia=None):
+    """Converte o estado no esquema do `cluster.csv` para a data de referência.
+
+    Sem data, usa a compra mais recente da base (como `rfm.calcular_rfm`).
+    """
+    referencia = agregados['ultima_max'].max() if data_referencia is None else _dias([data_referencia])[0]
+    parcial = pd.DataFrame({
+        'Qtd': agregados['Qtd'],
+        'recency_sum': referencia * agregados['Qtd'] - agregados['ultima_sum'],
+        'recency_min': referencia - agregados['ultima_max'],
+        'recency_max': referencia - agregados['ultima_min'],
+    }, index=agregados.index)
+    for m in ('frequency', 'monetary'):
+        for a in ('sum', 'min', 'max'):
+            parcial[f'{m}_{a}'] = agregados[f'{m}_{a}']
+    return rfm.finalizar_clusters(parcial)
+
+# ============================================================================
+# DELTAS
+# ============================================================================
+
+def atribuidor_do_modelo(pasta, data_referencia):
+    """Função que atribui cluster a clientes (com `tipo`) pelo modelo salvo (ou None).
+
+    Clientes sem tipo, ou de um tipo sem modelo, ficam sem cluster (None).
+    """
+    try:
+        modelos, _ = clusterizacao.carregar_modelo(pasta)
+    except OSError:
+        return None
+
+    def atribuir(clientes):
+        return clusterizacao.atribuir_clusters(rfm.calcular_rfm(clientes, data_referencia), clientes['tipo'], modelos)
+
+    return atribuir
+
+def aplicar_delta(agregados, estado_clientes, lote, atribuir_novos=None, tipos=None):
+    """Incorpora um lote (estado por cliente de `rfm.agregar_compras`).
+
+    Retorna (agregados, estado_clientes) atualizados. Clientes tocados ainda
+    sem cluster (novos, ou sem tipo até aqui) recebem o tipo de `tipos` (de
+    `clusterizacao.ler_tipos`) e o cluster de `atribuir_novos`; sem um dos
+    dois, ficam no estado por cliente, mas fora dos agregados.
+    """
+    agregados = agregados.copy()
+    existentes = lote.index.intersection(estado_clientes.index)
+    novos = lote.index.difference(estado_clientes.index)
+
+    # Clientes existentes: troca a contribuição antiga pela nova
+    antes = _metricas_clientes(estado_clientes.loc[existentes]).dropna(subset=[COLUNA_CLUSTER])
+    estado_clientes.loc[existentes, 'ultima_compra'] = np.maximum(
+        estado_clientes.loc[existentes, 'ultima_compra'], lote.loc[existentes, 'ultima_compra']
+    )
+    estado_clientes.loc[existentes, 'frequency'] += lote.loc[existentes, 'frequency']
+    estado_clientes.loc[existentes, 'monetary'] += lote.loc[existentes, 'monetary']
+    depois = _metricas_clientes(estado_clientes.loc[antes.index])
+
+    recalcular_minimo = set()
+    if len(antes):
+        clusters = antes[COLUNA_CLUSTER].astype(str)
+        for m in METRICAS_ESTADO:
+            diferenca = (depois[m] - antes[m]).groupby(clusters).sum()
+            agregados.loc[diferenca.index, f'{m}_sum'] += diferenca
+            maximo = depois[m].groupby(clusters).max()
+            agregados.loc[maximo.index, f'{m}_max'] = np.maximum(agregados.loc[maximo.index, f'{m}_max'], maximo)
+            # O mínimo só pode subir quando o último cliente que o detinha sai dele
+            saiu = (antes[m].to_numpy() == agregados.loc[clusters, f'{m}_min'].to_numpy()) & (
+                depois[m].to_numpy() != antes[m].to_numpy())
+            if saiu.any():
+                saidas = pd.Series(saiu, index=clusters.index).groupby(clusters).sum()
+                saidas = saidas[saidas > 0]
+                coluna = f'{m}_min_qtd'
+                if coluna not in agregados:
+                    agregados[coluna] = 0
+                agregados.loc[saidas.index, coluna] -= saidas
+                recalcular_minimo.update((c, m) for c in saidas.index[agregados.loc[saidas.index, coluna] <= 0])
+
+    # Clientes novos entram no estado por cliente, ainda sem cluster
+    if len(novos):
+        adicionados = lote.loc[novos].assign(
+            tipo=clusterizacao.tipos_clientes(novos, tipos),
+            cluster=pd.Categorical([None] * len(novos), categories=estado_clientes['cluster'].cat.categories),
+        )
+        estado_clientes = pd.concat([estado_clientes, adicionados])
+
+    # Tocados sem cluster: com tipo e modelo, entram nos agregados com tudo o que já compraram
+    pendentes = lote.index[estado_clientes.loc[lote.index, 'cluster'].isna().to_numpy()]
+    if len(pendentes) and tipos is not None:
+        sem_tipo = pendentes[estado_clientes.loc[pendentes, 'tipo'].isna().to_numpy()]
+        estado_clientes.loc[sem_tipo, 'tipo'] = clusterizacao.tipos_clientes(sem_tipo, tipos)
+    if len(pendentes) and atribuir_novos is not None:
+        clusters = pd.Series(atribuir_novos(estado_clientes.loc[pendentes]), index=pendentes).dropna()
+        if len(clusters):
+            estado_clientes['cluster'] = estado_clientes['cluster'].cat.add_categories(
+                pd.Index(clusters.unique()).difference(estado_clientes['cluster'].cat.categories))
+            estado_clientes.loc[clusters.index, 'cluster'] = clusters
+            agregados = combinar(agregados, agregar(estado_clientes.loc[clusters.index]))
+
+    if recalcular_minimo:
+        # Códigos da categoria: sem converter a pertença inteira para texto a cada varredura
+        pertenca = estado_clientes['cluster'].cat
+        codigos = pertenca.codes.to_numpy()
+    for cluster, m in recalcular_minimo:
+        valores = _metricas_clientes(estado_clientes[codigos == pertenca.categories.get_loc(cluster)])[m]
+        agregados.loc[cluster, f'{m}_min'] = valores.min()
+        agregados.loc[cluster, f'{m}_min_qtd'] = int((valores == valores.min()).sum())
+
+    return agregados, estado_clientes
+
+# ============================================================================
+# PERSISTÊNCIA
+# ============================================================================
+
+def caminho_agregados(pasta=PASTA_CSV):
+    return Path(pasta) / clusterizacao.PASTA_MODELO / ARQUIVO_AGREGADOS
+
+def salvar_agregados(agregados, caminho):
+    caminho = Path(caminho)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    temporario = caminho.with_suffix('.tmp')
+    agregados.rename_axis(COLUNA_CLUSTER).reset_index().to_parquet(temporario, index=False)
+    temporario.replace(caminho)
+
+def carregar_agregados(caminho):
+    return pd.read_parquet(caminho).set_index(COLUNA_CLUSTER)
+
+# ============================================================================
+# LINHA DE COMANDO
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Agregados RFM incrementais por cluster.")
+    parser.add_argument('--pasta', default=str(PASTA_CSV), help="Pasta com os CSVs.")
+    sub = parser.add_subparsers(dest='comando', required=True)
+
+    p_iniciar = sub.add_parser('iniciar', help="Cria o estado a partir do cliente.csv segmentado.")
+    p_iniciar.add_argument('--data-referencia', default=None)
+
+    p_aplicar = sub.add_parser('aplicar', help="Incorpora as compras de um dia e regrava o cluster.csv.")
+    p_aplicar.add_argument('compras', nargs='+')
+    p_aplicar.add_argument('--data-referencia', default=None)
+    p_aplicar.add_argument('--tipos', default=None, help="CSV fk_contact,tipo com o tipo dos clientes novos.")
+
+    p_combinar = sub.add_parser('combinar', help="Une estados de partições diferentes.")
+    p_combinar.add_argument('estados', nargs='+')
+    p_combinar.add_argument('--saida', required=True)
+
+    p_renderizar = sub.add_parser('renderizar', help="Grava o cluster.csv a partir do estado.")
+    p_renderizar.add_argument('--data-referencia', default=None)
+    args = parser.parse_args(argv)
+
+    saida_clusters = Path(args.pasta) / ARQUIVO_CLUSTERS
+    if args.comando == 'iniciar':
+        _, estado, _ = clusterizacao.ler_estado_inicial(args.pasta, args.data_referencia)
+        caminho_agregados(args.pasta).parent.mkdir(parents=True, exist_ok=True)
+        clusterizacao.salvar_estado(estado, args.pasta, ARQUIVO_ESTADO)
+        salvar_agregados(agregar(estado), caminho_agregados(args.pasta))
+        print(f"✅ Estado criado com {len(estado):,} clientes")
+    elif args.comando == 'aplicar':
+        agregados = carregar_agregados(caminho_agregados(args.pasta))
+        estado = clusterizacao.carregar_estado(args.pasta, ARQUIVO_ESTADO)
+        lote = rfm.agregar_compras(args.compras)
+        referencia = args.data_referencia or max(estado['ultima_compra'].max(), lote['ultima_compra'].max())
+        tipos = clusterizacao.ler_tipos(args.tipos) if args.tipos else None
+        agregados, estado = aplicar_delta(
+            agregados, estado, lote, atribuidor_do_modelo(args.pasta, referencia), tipos
+        )
+        clusterizacao.salvar_estado(estado, args.pasta, ARQUIVO_ESTADO)
+        salvar_agregados(agregados, caminho_agregados(args.pasta))
+        rfm.salvar_clusters(renderizar(agregados, referencia), saida_clusters)
+        sem_cluster = int(estado['cluster'].isna().sum())
+        print(f"✅ {len(lote):,} clientes tocados ({sem_cluster:,} clientes sem cluster); cluster.csv atualizado")
+    elif args.comando == 'combinar':
+        total = combinar(*(carregar_agregados(c) for c in args.estados))
+        salvar_agregados(total, args.saida)
+        print(f"✅ {len(args.estados)} estados combinados em {args.saida}")
+    else:
+        agregados = carregar_agregados(caminho_agregados(args.pasta))
+        rfm.salvar_clusters(renderizar(agregados, args.data_referencia), saida_clusters)
+        print(f"✅ cluster.csv gravado em {saida_clusters}")
+
+if __name__ == '__main__':
+    main()
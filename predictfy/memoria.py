@@ -0,0 +1,262 @@
+"""
+Contabilidade de memória da dashboard (caches, cópias por sessão e alocações).
+
+O Streamlit guarda uma cópia serializada de cada valor em `@st.cache_data` e
+entrega a cada sessão uma cópia nova a cada rerun; os valores em
+`@st.cache_resource` são o mesmo objeto para todas as sessões. Por isso a
+memória do processo é, aproximadamente:
+
+    compartilhado (recursos + cache_data serializado) + sessões × cópias por sessão
+
+`medir` separa esses termos. Objetos alcançados por mais de um recurso
+(ex.: a tabela de clientes dentro do índice de drill-down) são contados uma
+vez só. `maiores_alocacoes` usa o `tracemalloc` para listar as linhas que
+mais alocaram (e a diferença para a captura anterior, para achar
+vazamentos); o rastreamento só fica ligado sob demanda, porque deixa as
+alocações mais lentas.
+
+Percorrer os datasets custa caro demais para um rerun: `amostrar` mede em
+uma thread própria, a cada `INTERVALO_AMOSTRAGEM` segundos, e só atualiza
+os gauges que o rerun exporta.
+
+Uso:
+    python -m predictfy.memoria [--pasta Desafios/data/csv] [--top 15]
+"""
+
+import argparse
+import linecache
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+import types
+
+import numpy as np
+import pandas as pd
+
+from predictfy.datasets import memoria_dataset
+
+QUADROS_RASTREAMENTO = 1
+TOP_ALOCACOES = 15
+INTERVALO_AMOSTRAGEM = 60.0
+# Sessões com rerun nos últimos JANELA_SESSOES segundos contam como ativas
+JANELA_SESSOES = 300.0
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# TAMANHO DE OBJETOS
+# ============================================================================
+
+_NAO_PERCORRER = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+def tamanho_profundo(obj, vistos=None):
+    """Bytes de `obj` e do que ele referencia (DataFrames, arrays, coleções e atributos).
+
+    Objetos já em `vistos` (ids) não são contados de novo.
+    """
+    vistos = set() if vistos is None else vistos
+    total = 0
+    pendentes = [obj]
+    while pendentes:
+        atual = pendentes.pop()
+        if atual is None or id(atual) in vistos or isinstance(atual, _NAO_PERCORRER):
+            continue
+        vistos.add(id(atual))
+        if isinstance(atual, (pd.DataFrame, pd.Series)):
+            total += memoria_dataset(atual)
+        elif isinstance(atual, pd.Index):
+            total += int(atual.memory_usage(deep=True))
+        elif isinstance(atual, np.ndarray):
+            total += atual.nbytes
+        elif isinstance(atual, dict):
+            total += sys.getsizeof(atual)
+            pendentes.extend(atual.keys())
+            pendentes.extend(atual.values())
+        elif isinstance(atual, (list, tuple, set, frozenset)):
+            total += sys.getsizeof(atual)
+            pendentes.extend(atual)
+        else:
+            total += sys.getsizeof(atual)
+            if hasattr(atual, '__dict__'):
+                pendentes.append(vars(atual))
+    return total
+
+# ============================================================================
+# RELATÓRIO
+# ============================================================================
+
+def rss_bytes():
+    """Memória residente atual do processo (pico, onde /proc não existe)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pico if sys.platform == 'darwin' else pico * 1024
+
+def bytes_cache_data():
+    """{função: bytes serializados} guardados pelo `st.cache_data` do processo."""
+    from streamlit.runtime.caching import get_data_cache_stats_provider
+
+    totais = {}
+    for stat in get_data_cache_stats_provider().get_stats():
+        nome = stat.cache_name.rsplit('.', 1)[-1]
+        totais[nome] = totais.get(nome, 0) + stat.byte_length
+    return totais
+
+_sessoes = {}
+_trava_sessoes = threading.Lock()
+
+def marcar_sessao(id_sessao):
+    """Registra um rerun da sessão `id_sessao` (ex.: um id guardado no `st.session_state`)."""
+    with _trava_sessoes:
+        _sessoes[id_sessao] = time.monotonic()
+
+def sessoes_ativas(janela=JANELA_SESSOES):
+    """Sessões com rerun nos últimos `janela` segundos (pelo menos 1)."""
+    limite = time.monotonic() - janela
+    with _trava_sessoes:
+        for id_sessao in [s for s, visto in _sessoes.items() if visto < limite]:
+            del _sessoes[id_sessao]
+        return max(1, len(_sessoes))
+
+def medir(recursos, copias, cache_data=None):
+    """Tabela item/tipo/bytes da memória da dashboard.
+
+    `recursos`: {nome: objeto} compartilhados (`cache_resource`);
+    `copias`: {nome: objeto} que cada sessão recebe copiado (`cache_data`);
+    `cache_data`: {função: bytes serializados} (`bytes_cache_data()`).
+    """
+    vistos = set()
+    linhas = []
+    for nome, obj in recursos.items():
+        linhas.append({'item': nome, 'tipo': 'compartilhado', 'bytes': tamanho_profundo(obj, vistos)})
+    for nome, tamanho in (cache_data or {}).items():
+        linhas.append({'item': nome, 'tipo': 'cache_data (serializado)', 'bytes': tamanho})
+    for nome, obj in copias.items():
+        linhas.append({'item': nome, 'tipo': 'por sessão', 'bytes': tamanho_profundo(obj)})
+    df = pd.DataFrame(linhas, columns=['item', 'tipo', 'bytes'])
+    df['mb'] = df['bytes'] / 1e6
+    return df
+
+def resumo(tabela, sessoes=1):
+    """Totais da tabela de `medir`: compartilhado, por sessão e estimativa do processo."""
+    compartilhado = int(tabela.loc[tabela['tipo'] != 'por sessão', 'bytes'].sum())
+    por_sessao = int(tabela.loc[tabela['tipo'] == 'por sessão', 'bytes'].sum())
+    return {
+        'compartilhado_bytes': compartilhado,
+        'por_sessao_bytes': por_sessao,
+        'sessoes': sessoes,
+        'estimado_bytes': compartilhado + sessoes * por_sessao,
+        'rss_bytes': rss_bytes(),
+    }
+
+def registrar_metricas(tabela, sessoes, metricas):
+    """Grava a tabela de `medir` como gauges em um `telemetria.MetricasSecoes`."""
+    memoria = metricas.medidor(
+        'predictfy_memoria_bytes', 'Memória por item (compartilhado, cache_data e cópias por sessão).', 'item')
+    for linha in tabela.itertuples():
+        memoria.definir(linha.bytes, f'{linha.tipo}:{linha.item}')
+    totais = resumo(tabela, sessoes)
+    memoria.definir(totais['rss_bytes'], 'rss')
+    memoria.definir(totais['por_sessao_bytes'], 'por_sessao')
+    memoria.definir(totais['estimado_bytes'], 'estimado')
+    metricas.medidor('predictfy_sessoes_ativas', 'Sessões com rerun recente no processo.').definir(sessoes)
+
+def amostrar(recursos, metricas, intervalo=INTERVALO_AMOSTRAGEM):
+    """Thread (daemon) que registra `medir(recursos())` em `metricas` a cada `intervalo` segundos.
+
+    `recursos()` devolve os objetos compartilhados no momento da medição.
+    """
+    def laco():
+        while True:
+            try:
+                tabela = medir(recursos(), {}, bytes_cache_data())
+                registrar_metricas(tabela, sessoes_ativas(), metricas)
+            except Exception:
+                logger.exception("falha ao medir a memória do processo")
+            time.sleep(intervalo)
+
+    thread = threading.Thread(target=laco, name='predictfy-memoria', daemon=True)
+    thread.start()
+    return thread
+
+# ============================================================================
+# TRACEMALLOC
+# ============================================================================
+
+_trava = threading.Lock()
+_captura_anterior = None
+
+def rastreando():
+    return tracemalloc.is_tracing()
+
+def iniciar_rastreamento(quadros=QUADROS_RASTREAMENTO):
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(quadros)
+
+def parar_rastreamento():
+    global _captura_anterior
+    with _trava:
+        _captura_anterior = None
+    tracemalloc.stop()
+
+def maiores_alocacoes(top=TOP_ALOCACOES):
+    """Linhas que mais alocaram (memória viva) e o crescimento desde a captura anterior."""
+    global _captura_anterior
+    if not tracemalloc.is_tracing():
+        return None
+    captura = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, linecache.__file__),
+    ))
+    with _trava:
+        anterior, _captura_anterior = _captura_anterior, captura
+    if anterior is not None:
+        estatisticas = captura.compare_to(anterior, 'lineno')
+    else:
+        estatisticas = captura.statistics('lineno')
+    linhas = []
+    for est in estatisticas[:top]:
+        quadro = est.traceback[0]
+        linhas.append({
+            'local': f'{quadro.filename}:{quadro.lineno}',
+            'mb': est.size / 1e6,
+            'blocos': est.count,
+            'variacao_mb': getattr(est, 'size_diff', 0) / 1e6,
+        })
+    return pd.DataFrame(linhas, columns=['local', 'mb', 'blocos', 'variacao_mb'])
+
+# ============================================================================
+# LINHA DE COMANDO
+# ============================================================================
+
+def main(argv=None):
+    from predictfy import dados, snapshot
+    from predictfy.config import PASTA_CSV
+
+    parser = argparse.ArgumentParser(description="Memória dos datasets da dashboard e maiores alocações.")
+    parser.add_argument('--pasta', default=str(PASTA_CSV), help="Pasta com os CSVs.")
+    parser.add_argument('--top', type=int, default=TOP_ALOCACOES)
+    args = parser.parse_args(argv)
+
+    iniciar_rastreamento()
+    recursos = {}
+    for nome, ler in (('clientes', dados.ler_clientes), ('recomendacoes', dados.ler_recomendacoes)):
+        try:
+            recursos[nome] = ler(args.pasta)
+        except FileNotFoundError:
+            pass
+    copias = {'snapshot': snapshot.obter_snapshot(args.pasta)}
+    tabela = medir(recursos, copias)
+    print(tabela.to_string(index=False))
+    print(f"\nRSS: {rss_bytes() / 1e6:.1f} MB\n")
+    print(maiores_alocacoes(args.top).to_string(index=False))
+    parar_rastreamento()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Agregação particionada e multi-processo do `cliente.csv`.
+
+O arquivo é dividido em faixas de bytes alinhadas em quebras de linha; cada
+faixa é lida e agregada em um processo do pool pela mesma passada do
+`predictfy.quantis.agregar_parcial` (estado parcial do `predictfy.rfm` e
+esboços), e os parciais são combinados no processo principal. Como cada
+worker só lê a própria faixa, em blocos de linhas, a memória por processo
+fica limitada e a vazão cresce com o número de núcleos.
+
+Arquivos menores que `TAMANHO_MINIMO_PARTICAO` não abrem pool nenhum.
+
+Uso:
+    python -m predictfy.particionado [--clientes cliente.csv] [--processos 32]
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from predictfy import quantis, rfm
+from predictfy.config import (
+    ARQUIVO_CLIENTES,
+    ARQUIVO_CLUSTERS,
+    ARQUIVO_QUANTIS,
+    PASTA_CSV,
+)
+
+TAMANHO_MINIMO_PARTICAO = 32 * 1024 * 1024
+
+# ============================================================================
+# FAIXAS DE BYTES
+# ============================================================================
+
+def _alinhar(f, posicao):
+    """Primeira posição >= `posicao` que começa uma linha."""
+    if posicao == 0:
+        return 0
+    f.seek(posicao - 1)
+    f.readline()
+    return f.tell()
+
+def faixas(caminho, n, inicio=None, fim=None):
+    """Divide [inicio, fim) do arquivo em até `n` faixas alinhadas em linhas.
+
+    Sem `inicio`, começa logo depois do cabeçalho. Retorna [(inicio, fim), ...].
+    """
+    with open(caminho, 'rb') as f:
+        if inicio is None:
+            f.readline()
+            inicio = f.tell()
+        if fim is None:
+            fim = os.fstat(f.fileno()).st_size
+        passo = max((fim - inicio) // max(n, 1), 1)
+        cortes = sorted({inicio, fim, *(min(_alinhar(f, inicio + i * passo), fim) for i in range(1, n))})
+    return [(a, b) for a, b in zip(cortes, cortes[1:]) if b > a]
+
+# ============================================================================
+# WORKER
+# ============================================================================
+
+def agregar_faixa(caminho, inicio, fim, precisao=quantis.PRECISAO, tamanho_bloco=rfm.TAMANHO_BLOCO):
+    """Estado parcial por cluster e esboços de quantis de uma faixa do arquivo."""
+    return quantis.agregar_parcial(caminho, tamanho_bloco, precisao, faixa=(inicio, fim))
+
+# ============================================================================
+# ORQUESTRAÇÃO
+# ============================================================================
+
+def agregar_clientes(caminho_clientes, processos=None, precisao=quantis.PRECISAO):
+    """Agrega o `cliente.csv` em paralelo: (cluster.csv, esboços por cluster)."""
+    processos = processos or os.cpu_count() or 1
+    tamanho = os.path.getsize(caminho_clientes)
+    n = max(1, min(processos, tamanho // TAMANHO_MINIMO_PARTICAO))
+    lista = faixas(caminho_clientes, n)
+
+    if n == 1:
+        resultados = [agregar_faixa(caminho_clientes, a, b, precisao) for a, b in lista]
+    else:
+        with ProcessPoolExecutor(max_workers=n) as pool:
+            futuros = [pool.submit(agregar_faixa, caminho_clientes, a, b, precisao) for a, b in lista]
+            resultados = [f.result() for f in futuros]
+
+    parcial = rfm.combinar_parciais([p for p, _ in resultados])
+    esbocos = {}
+    for _, e in resultados:
+        esbocos = quantis.combinar_esbocos(esbocos, e)
+    return rfm.finalizar_clusters(parcial), esbocos
+
+# ============================================================================
+# LINHA DE COMANDO
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Agrega o cliente.csv em paralelo (cluster.csv + quantis).")
+    parser.add_argument('--clientes', default=str(PASTA_CSV / ARQUIVO_CLIENTES))
+    parser.add_argument('--pasta-saida', default=None, help="Padrão: a pasta do cliente.csv.")
+    parser.add_argument('--processos', type=int, default=None, help="Padrão: número de núcleos.")
+    args = parser.parse_args(argv)
+
+    pasta = Path(args.pasta_saida or Path(args.clientes).parent)
+    inicio = time.perf_counter()
+    df, esbocos = agregar_clientes(args.clientes, args.processos)
+    duracao = time.perf_counter() - inicio
+    rfm.salvar_clusters(df, pasta / ARQUIVO_CLUSTERS)
+    quantis.salvar_esbocos(esbocos, pasta / ARQUIVO_QUANTIS)
+    tamanho_mb = os.path.getsize(args.clientes) / 1e6
+    print(f"✅ {int(df['Qtd'].sum()):,} clientes em {duracao:.2f}s ({tamanho_mb / duracao:.0f} MB/s)")
+
+if __name__ == '__main__':
+    main()
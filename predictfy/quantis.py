@@ -0,0 +1,257 @@
+"""
+Quantis aproximados por cluster com esboços combináveis.
+
+O `cluster.csv` só traz média/mín/máx, o que esconde a cauda longa do gasto
+(o `monetary_max` de PJ é várias vezes a média). Aqui cada cluster e métrica
+ganha um esboço de quantis no estilo DDSketch: um histograma com baldes em
+escala logarítmica, em que qualquer quantil sai com erro relativo de no
+máximo `precisao` (1% por padrão).
+
+- Construção vetorizada (`np.log` + `np.bincount`), em uma única passada
+  em blocos pelo `cliente.csv`, junto com os agregados do `cluster.csv`.
+- Combinável: esboços de blocos/partições diferentes são somados balde a
+  balde, sem perda de precisão.
+- Tamanho fixo pela faixa de valores (algumas centenas de baldes), não pelo
+  número de clientes.
+
+Os esboços ficam em `cluster_quantis.json`, ao lado do `cluster.csv`, com
+a assinatura (tamanho, mtime) do `cluster.csv` que descrevem: quem regrava
+o `cluster.csv` sem refazer os esboços (ex.: `predictfy.rfm`,
+`predictfy.incremental`) os invalida, e `ler_esbocos` passa a ignorá-los.
+
+Uso:
+    python -m predictfy.quantis [--clientes cliente.csv]
+"""
+
+import argparse
+import json
+import math
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from predictfy import rfm
+from predictfy.config import (
+    ARQUIVO_CLIENTES,
+    ARQUIVO_CLUSTERS,
+    ARQUIVO_QUANTIS,
+    COLUNA_CLUSTER,
+    METRICAS_RFM,
+    PASTA_CSV,
+)
+
+PRECISAO = 0.01
+QUANTIS_PADRAO = (0.5, 0.9, 0.99)
+# Valores até este limite caem no balde do zero (recência 0, por exemplo)
+LIMIAR_ZERO = 1e-9
+
+# ============================================================================
+# ESBOÇO
+# ============================================================================
+
+class EsbocoQuantis:
+    """Esboço de quantis com erro relativo limitado, para valores não negativos."""
+
+    def __init__(self, precisao=PRECISAO):
+        self.precisao = precisao
+        self.gamma = (1 + precisao) / (1 - precisao)
+        self._log_gamma = math.log(self.gamma)
+        self.deslocamento = 0
+        self.contagens = np.zeros(0, dtype='int64')
+        self.zeros = 0
+        self.n = 0
+        self.minimo = math.inf
+        self.maximo = -math.inf
+
+    def _somar_baldes(self, deslocamento, contagens):
+        if not len(contagens):
+            return
+        if not len(self.contagens):
+            self.deslocamento, self.contagens = deslocamento, contagens.astype('int64').copy()
+            return
+        inicio = min(self.deslocamento, deslocamento)
+        fim = max(self.deslocamento + len(self.contagens), deslocamento + len(contagens))
+        novas = np.zeros(fim - inicio, dtype='int64')
+        novas[self.deslocamento - inicio:self.deslocamento - inicio + len(self.contagens)] += self.contagens
+        novas[deslocamento - inicio:deslocamento - inicio + len(contagens)] += contagens
+        self.deslocamento, self.contagens = inicio, novas
+
+    def adicionar(self, valores):
+        """Acrescenta um array de valores (NaN é ignorado)."""
+        valores = np.asarray(valores, dtype='float64')
+        valores = valores[~np.isnan(valores)]
+        if not len(valores):
+            return self
+        self.n += len(valores)
+        self.minimo = min(self.minimo, float(valores.min()))
+        self.maximo = max(self.maximo, float(valores.max()))
+
+        positivos = valores[valores > LIMIAR_ZERO]
+        self.zeros += len(valores) - len(positivos)
+        if len(positivos):
+            idx = np.ceil(np.log(positivos) / self._log_gamma).astype('int64')
+            base = int(idx.min())
+            self._somar_baldes(base, np.bincount(idx - base))
+        return self
+
+    def combinar(self, outro):
+        """Soma outro esboço (mesma precisão) a este."""
+        if outro.precisao != self.precisao:
+            raise ValueError("Esboços com precisões diferentes não podem ser combinados.")
+        self.n += outro.n
+        self.zeros += outro.zeros
+        self.minimo = min(self.minimo, outro.minimo)
+        self.maximo = max(self.maximo, outro.maximo)
+        self._somar_baldes(outro.deslocamento, outro.contagens)
+        return self
+
+    def quantis(self, qs=QUANTIS_PADRAO):
+        """Valores aproximados dos quantis `qs` (NaN se o esboço estiver vazio)."""
+        if self.n == 0:
+            return [math.nan for _ in qs]
+        acumulado = np.cumsum(self.contagens)
+        resultado = []
+        for q in qs:
+            posicao = q * (self.n - 1)
+            if posicao < self.zeros:
+                valor = 0.0
+            else:
+                j = int(np.searchsorted(acumulado, posicao - self.zeros, side='right'))
+                j = min(j, len(acumulado) - 1)
+                valor = 2 * self.gamma ** (self.deslocamento + j) / (self.gamma + 1)
+            resultado.append(min(max(valor, self.minimo), self.maximo))
+        return resultado
+
+    def para_dict(self):
+        return {
+            'precisao': self.precisao,
+            'deslocamento': self.deslocamento,
+            'contagens': self.contagens.tolist(),
+            'zeros': self.zeros,
+            'n': self.n,
+            'minimo': self.minimo if self.n else None,
+            'maximo': self.maximo if self.n else None,
+        }
+
+    @classmethod
+    def de_dict(cls, d):
+        esboco = cls(d['precisao'])
+        esboco.deslocamento = d['deslocamento']
+        esboco.contagens = np.asarray(d['contagens'], dtype='int64')
+        esboco.zeros = d['zeros']
+        esboco.n = d['n']
+        if esboco.n:
+            esboco.minimo, esboco.maximo = d['minimo'], d['maximo']
+        return esboco
+
+# ============================================================================
+# ESBOÇOS POR CLUSTER
+# ============================================================================
+
+def esbocos_bloco(df, metricas=METRICAS_RFM, precisao=PRECISAO):
+    """{cluster: {métrica: EsbocoQuantis}} de um bloco de clientes."""
+    esbocos = {}
+    for cluster, grupo in df.groupby(COLUNA_CLUSTER, sort=False, observed=True):
+        esbocos[str(cluster)] = {m: EsbocoQuantis(precisao).adicionar(grupo[m].to_numpy()) for m in metricas}
+    return esbocos
+
+def combinar_esbocos(a, b):
+    """Une dois dicionários {cluster: {métrica: esboço}} (modifica e retorna `a`)."""
+    for cluster, por_metrica in b.items():
+        if cluster not in a:
+            a[cluster] = por_metrica
+            continue
+        for m, esboco in por_metrica.items():
+            a[cluster][m].combinar(esboco)
+    return a
+
+def agregar_parcial(caminho_clientes, tamanho_bloco=rfm.TAMANHO_BLOCO, precisao=PRECISAO, faixa=None):
+    """Estado parcial do `predictfy.rfm` e esboços por cluster, na mesma leitura do `cliente.csv`.
+
+    `faixa` = (início, fim) em bytes restringe a leitura a um trecho (ver `rfm.blocos_clientes`).
+    """
+    esbocos = {}
+
+    def acumular(bloco):
+        combinar_esbocos(esbocos, esbocos_bloco(bloco, precisao=precisao))
+
+    return rfm.parcial_clientes(caminho_clientes, tamanho_bloco, acumular, faixa), esbocos
+
+def agregar_clientes(caminho_clientes, tamanho_bloco=rfm.TAMANHO_BLOCO, precisao=PRECISAO):
+    """Uma passada em blocos pelo `cliente.csv`: (cluster.csv, esboços por cluster)."""
+    parcial, esbocos = agregar_parcial(caminho_clientes, tamanho_bloco, precisao)
+    return rfm.finalizar_clusters(parcial), esbocos
+
+def tabela_quantis(esbocos, qs=QUANTIS_PADRAO):
+    """DataFrame com uma linha por cluster e colunas `<métrica>_p50`, `<métrica>_p90`..."""
+    linhas = []
+    for cluster, por_metrica in sorted(esbocos.items()):
+        linha = {COLUNA_CLUSTER: cluster}
+        for m, esboco in por_metrica.items():
+            for q, valor in zip(qs, esboco.quantis(qs)):
+                linha[f'{m}_p{round(q * 100)}'] = valor
+        linhas.append(linha)
+    return pd.DataFrame(linhas)
+
+# ============================================================================
+# PERSISTÊNCIA
+# ============================================================================
+
+def assinatura_clusters(caminho_clusters):
+    """[tamanho, mtime_ns] do `cluster.csv` (None se ele não existir)."""
+    try:
+        stat = os.stat(caminho_clusters)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+def salvar_esbocos(esbocos, caminho, caminho_clusters=None):
+    """Grava os esboços, presos ao `cluster.csv` em `caminho_clusters` (padrão: o da mesma pasta)."""
+    caminho = Path(caminho)
+    caminho_clusters = caminho_clusters or caminho.with_name(ARQUIVO_CLUSTERS)
+    conteudo = {
+        'cluster_csv': assinatura_clusters(caminho_clusters),
+        'esbocos': {c: {m: e.para_dict() for m, e in por_metrica.items()} for c, por_metrica in esbocos.items()},
+    }
+    temporario = caminho.with_name(f'{caminho.name}.{os.getpid()}.tmp')
+    temporario.write_text(json.dumps(conteudo), encoding='utf-8')
+    os.replace(temporario, caminho)
+    return caminho
+
+def ler_esbocos(caminho, caminho_clusters=None):
+    """Esboços gravados por `salvar_esbocos`, ou None se o `cluster.csv` mudou desde então."""
+    caminho = Path(caminho)
+    with open(caminho, encoding='utf-8') as f:
+        conteudo = json.load(f)
+    if 'esbocos' not in conteudo or conteudo['cluster_csv'] != assinatura_clusters(
+        caminho_clusters or caminho.with_name(ARQUIVO_CLUSTERS)
+    ):
+        return None
+    return {
+        c: {m: EsbocoQuantis.de_dict(d) for m, d in por_metrica.items()}
+        for c, por_metrica in conteudo['esbocos'].items()
+    }
+
+# ============================================================================
+# LINHA DE COMANDO
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera cluster.csv e esboços de quantis em uma passada.")
+    parser.add_argument('--clientes', default=str(PASTA_CSV / ARQUIVO_CLIENTES))
+    parser.add_argument('--pasta-saida', default=None, help="Padrão: a pasta do cliente.csv.")
+    parser.add_argument('--tamanho-bloco', type=int, default=rfm.TAMANHO_BLOCO)
+    parser.add_argument('--precisao', type=float, default=PRECISAO, help="Erro relativo máximo.")
+    args = parser.parse_args(argv)
+
+    pasta = Path(args.pasta_saida or Path(args.clientes).parent)
+    df, esbocos = agregar_clientes(args.clientes, args.tamanho_bloco, args.precisao)
+    rfm.salvar_clusters(df, pasta / ARQUIVO_CLUSTERS)
+    salvar_esbocos(esbocos, pasta / ARQUIVO_QUANTIS)
+    print(f"✅ {len(df)} clusters e esboços de quantis gravados em {pasta}")
+    print(tabela_quantis(esbocos).to_string(index=False))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,305 @@
+"""
+Motor de agregação RFM em blocos.
+
+Gera o `cluster.csv` consumido pela dashboard a partir de dados brutos,
+lendo os arquivos em blocos (`chunksize`) para manter a memória limitada:
+
+- compras brutas -> estado por cliente (última compra, frequência, gasto);
+- clientes segmentados -> estado parcial por cluster (Qtd, soma, mín, máx);
+- estado parcial -> colunas do `cluster.csv` (`recency_mean`, ..., `Qtd`).
+
+O estado parcial por cluster é combinável: blocos (ou arquivos) diferentes
+podem ser agregados separadamente e unidos com `combinar_parciais`.
+
+Uso:
+    python -m predictfy.rfm --clientes cliente.csv
+    python -m predictfy.rfm --compras compras_*.csv --clientes cliente.csv
+"""
+
+import argparse
+import glob
+import io
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from predictfy.config import (
+    ARQUIVO_CLIENTES,
+    ARQUIVO_CLUSTERS,
+    COLUNA_CLIENTE,
+    COLUNA_CLUSTER,
+    COLUNA_DATA,
+    COLUNA_VALOR,
+    COLUNAS_CLUSTER,
+    METRICAS_RFM,
+    PASTA_CSV,
+)
+
+TAMANHO_BLOCO = 1_000_000
+
+# ============================================================================
+# ESTADO POR CLIENTE (COMPRAS BRUTAS)
+# ============================================================================
+
+def _reduzir_clientes(estado):
+    """Combina estados por cliente repetidos em um único registro por cliente."""
+    return estado.groupby(level=0, sort=False).agg(
+        ultima_compra=('ultima_compra', 'max'),
+        frequency=('frequency', 'sum'),
+        monetary=('monetary', 'sum'),
+    )
+
+def _acumular_clientes(estado, parcial):
+    """Soma ao estado, no lugar, os clientes do bloco que ele já tem; retorna os demais.
+
+    A busca no índice é por hash: o custo é do tamanho do bloco, sem
+    reagrupar nem copiar o estado inteiro.
+    """
+    posicoes = estado.index.get_indexer(parcial.index)
+    vistos = posicoes >= 0
+    linhas, antigos = posicoes[vistos], parcial[vistos]
+    colunas = {coluna: estado.columns.get_loc(coluna) for coluna in estado.columns}
+    estado.iloc[linhas, colunas['ultima_compra']] = np.fmax(
+        estado['ultima_compra'].to_numpy()[linhas], antigos['ultima_compra'].to_numpy())
+    for coluna in ('frequency', 'monetary'):
+        estado.iloc[linhas, colunas[coluna]] = estado[coluna].to_numpy()[linhas] + antigos[coluna].to_numpy()
+    return parcial[~vistos]
+
+def _incorporar_novos(estado, novos):
+    """Anexa ao estado os blocos de clientes novos (reagrupados só entre si)."""
+    if not novos:
+        return estado
+    return pd.concat([estado, _reduzir_clientes(pd.concat(novos))])
+
+def agregar_compras(caminhos, tamanho_bloco=TAMANHO_BLOCO):
+    """Reduz compras brutas a um estado por cliente, bloco a bloco.
+
+    A memória fica limitada ao número de clientes distintos, não ao número
+    de linhas de compra. Clientes novos esperam numa lista e só entram no
+    estado quando passam do tamanho dele: cada cópia do estado é paga pelo
+    próprio crescimento, e o custo total fica linear no número de blocos.
+    """
+    estado, novos, n_novos = None, [], 0
+    for caminho in caminhos:
+        leitor = pd.read_csv(
+            caminho,
+            usecols=[COLUNA_CLIENTE, COLUNA_DATA, COLUNA_VALOR],
+            chunksize=tamanho_bloco,
+            encoding='utf-8',
+        )
+        for bloco in leitor:
+            parcial = pd.DataFrame({
+                'ultima_compra': pd.to_datetime(bloco[COLUNA_DATA], errors='coerce').to_numpy(),
+                'frequency': 1,
+                'monetary': bloco[COLUNA_VALOR].to_numpy(dtype='float64'),
+            }, index=bloco[COLUNA_CLIENTE].to_numpy())
+            parcial = _reduzir_clientes(parcial)
+            if estado is None:
+                estado = parcial
+                continue
+            ainda_nao_vistos = _acumular_clientes(estado, parcial)
+            if len(ainda_nao_vistos):
+                novos.append(ainda_nao_vistos)
+                n_novos += len(ainda_nao_vistos)
+            if n_novos > len(estado):
+                estado, novos, n_novos = _incorporar_novos(estado, novos), [], 0
+
+    if estado is None:
+        raise ValueError("Nenhuma compra encontrada nos arquivos informados.")
+    estado = _incorporar_novos(estado, novos)
+    estado.index.name = COLUNA_CLIENTE
+    return estado
+
+def ultima_data(caminhos, tamanho_bloco=TAMANHO_BLOCO):
+    """Data da compra mais recente nos arquivos (lê só a coluna de data, em blocos)."""
+    ultima = None
+    for caminho in caminhos:
+        for bloco in pd.read_csv(caminho, usecols=[COLUNA_DATA], chunksize=tamanho_bloco, encoding='utf-8'):
+            maior = pd.to_datetime(bloco[COLUNA_DATA], errors='coerce').max()
+            if pd.notna(maior) and (ultima is None or maior > ultima):
+                ultima = maior
+    if ultima is None:
+        raise ValueError("Nenhuma compra encontrada nos arquivos informados.")
+    return ultima
+
+def calcular_rfm(estado, data_referencia=None):
+    """Converte o estado por cliente em recency/frequency/monetary.
+
+    A recência é contada em dias até `data_referencia` (padrão: a compra
+    mais recente da base, como no `cluster.csv` original).
+    """
+    if data_referencia is None:
+        data_referencia = estado['ultima_compra'].max()
+    data_referencia = pd.Timestamp(data_referencia)
+    return pd.DataFrame({
+        'recency': (data_referencia - estado['ultima_compra']).dt.days,
+        'frequency': estado['frequency'],
+        'monetary': estado['monetary'],
+    }, index=estado.index)
+
+def ler_mapa_clusters(caminho_clientes, tamanho_bloco=TAMANHO_BLOCO):
+    """Lê o mapeamento cliente -> cluster em blocos, com cluster categórico."""
+    blocos = pd.read_csv(
+        caminho_clientes,
+        usecols=[COLUNA_CLIENTE, COLUNA_CLUSTER],
+        dtype={COLUNA_CLUSTER: 'category'},
+        chunksize=tamanho_bloco,
+        encoding='utf-8',
+    )
+    mapa = pd.concat([b.set_index(COLUNA_CLIENTE)[COLUNA_CLUSTER] for b in blocos])
+    return mapa.astype('category')
+
+# ============================================================================
+# ESTADO PARCIAL POR CLUSTER
+# ============================================================================
+
+def _especificacao_parcial(metricas=METRICAS_RFM):
+    """Como cada coluna do estado parcial é combinada."""
+    spec = {'Qtd': 'sum'}
+    for m in metricas:
+        spec[f'{m}_sum'] = 'sum'
+        spec[f'{m}_min'] = 'min'
+        spec[f'{m}_max'] = 'max'
+    return spec
+
+def parcial_clusters(df, metricas=METRICAS_RFM):
+    """Agrega clientes (cluster + métricas) em estado parcial por cluster."""
+    grupos = df.groupby(COLUNA_CLUSTER, sort=False, observed=True)[list(metricas)]
+    soma, minimo, maximo = grupos.sum(), grupos.min(), grupos.max()
+
+    parcial = pd.DataFrame({'Qtd': grupos.size()})
+    for m in metricas:
+        parcial[f'{m}_sum'] = soma[m].astype('float64')
+        parcial[f'{m}_min'] = minimo[m]
+        parcial[f'{m}_max'] = maximo[m]
+    parcial.index = parcial.index.astype(str)
+    return parcial
+
+def combinar_parciais(parciais, metricas=METRICAS_RFM):
+    """Une estados parciais de blocos/arquivos diferentes em um só."""
+    parciais = [p for p in parciais if p is not None and len(p)]
+    if not parciais:
+        return pd.DataFrame(columns=list(_especificacao_parcial(metricas)))
+    return pd.concat(parciais).groupby(level=0, sort=True).agg(_especificacao_parcial(metricas))
+
+def finalizar_clusters(parcial):
+    """Converte o estado parcial no esquema do `cluster.csv`."""
+    df = pd.DataFrame(index=parcial.index)
+    for m in METRICAS_RFM:
+        df[f'{m}_mean'] = parcial[f'{m}_sum'] / parcial['Qtd']
+        df[f'{m}_min'] = parcial[f'{m}_min']
+        df[f'{m}_max'] = parcial[f'{m}_max']
+    df['Qtd'] = parcial['Qtd'].astype('int64')
+    df.index.name = COLUNA_CLUSTER
+    return df.reset_index()[COLUNAS_CLUSTER].sort_values(COLUNA_CLUSTER, ignore_index=True)
+
+# ============================================================================
+# PIPELINES
+# ============================================================================
+
+class _Trecho(io.RawIOBase):
+    """No máximo `tamanho` bytes de um arquivo binário, a partir da posição atual."""
+
+    def __init__(self, arquivo, tamanho):
+        self._arquivo = arquivo
+        self._restante = tamanho
+
+    def readable(self):
+        return True
+
+    def readinto(self, destino):
+        n = min(len(destino), self._restante)
+        if n <= 0:
+            return 0
+        lidos = self._arquivo.readinto(memoryview(destino)[:n])
+        self._restante -= lidos
+        return lidos
+
+def blocos_clientes(caminho_clientes, tamanho_bloco=TAMANHO_BLOCO, faixa=None):
+    """Blocos (cluster + métricas RFM) do `cliente.csv`.
+
+    `faixa` = (início, fim) em bytes, alinhada em linhas e depois do
+    cabeçalho (`predictfy.particionado.faixas`), lê só esse trecho.
+    """
+    opcoes = {
+        'usecols': [COLUNA_CLUSTER, *METRICAS_RFM],
+        'dtype': {COLUNA_CLUSTER: 'category'},
+        'chunksize': tamanho_bloco,
+        'encoding': 'utf-8',
+    }
+    if faixa is None:
+        with pd.read_csv(caminho_clientes, **opcoes) as leitor:
+            yield from leitor
+        return
+    colunas = list(pd.read_csv(caminho_clientes, nrows=0, encoding='utf-8').columns)
+    inicio, fim = faixa
+    with open(caminho_clientes, 'rb') as f:
+        f.seek(inicio)
+        trecho = io.BufferedReader(_Trecho(f, fim - inicio))
+        with pd.read_csv(trecho, header=None, names=colunas, **opcoes) as leitor:
+            yield from leitor
+
+def parcial_clientes(caminho_clientes, tamanho_bloco=TAMANHO_BLOCO, acumular=None, faixa=None):
+    """Estado parcial por cluster do `cliente.csv` (ou de uma `faixa` dele), em uma passada em blocos.
+
+    `acumular(bloco)` recebe cada bloco lido, para outras agregações na mesma
+    leitura (ex.: os esboços de `predictfy.quantis`).
+    """
+    parcial = None
+    for bloco in blocos_clientes(caminho_clientes, tamanho_bloco, faixa):
+        parcial = combinar_parciais([parcial, parcial_clusters(bloco)])
+        if acumular is not None:
+            acumular(bloco)
+    return combinar_parciais([parcial])
+
+def agregar_clientes(caminho_clientes, tamanho_bloco=TAMANHO_BLOCO):
+    """Gera o `cluster.csv` a partir do `cliente.csv` (RFM já calculado)."""
+    return finalizar_clusters(parcial_clientes(caminho_clientes, tamanho_bloco))
+
+def agregar_compras_por_cluster(caminhos_compras, caminho_clientes,
+                                tamanho_bloco=TAMANHO_BLOCO, data_referencia=None):
+    """Gera o `cluster.csv` a partir das compras brutas e do mapa de clusters."""
+    rfm = calcular_rfm(agregar_compras(caminhos_compras, tamanho_bloco), data_referencia)
+    mapa = ler_mapa_clusters(caminho_clientes, tamanho_bloco)
+    rfm[COLUNA_CLUSTER] = mapa.reindex(rfm.index)
+    rfm = rfm.dropna(subset=[COLUNA_CLUSTER])
+    return finalizar_clusters(parcial_clusters(rfm))
+
+def salvar_clusters(df, caminho):
+    """Grava o `cluster.csv` de forma atômica (a dashboard nunca lê arquivo pela metade)."""
+    caminho = Path(caminho)
+    temporario = caminho.with_suffix(caminho.suffix + '.tmp')
+    df.to_csv(temporario, index=False, encoding='utf-8')
+    temporario.replace(caminho)
+    return caminho
+
+# ============================================================================
+# LINHA DE COMANDO
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera o cluster.csv a partir de dados brutos.")
+    parser.add_argument('--compras', nargs='*', default=[],
+                        help="Arquivos (ou padrões glob) de compras brutas.")
+    parser.add_argument('--clientes', default=str(PASTA_CSV / ARQUIVO_CLIENTES),
+                        help="cliente.csv com a coluna de cluster.")
+    parser.add_argument('--saida', default=str(PASTA_CSV / ARQUIVO_CLUSTERS))
+    parser.add_argument('--tamanho-bloco', type=int, default=TAMANHO_BLOCO)
+    parser.add_argument('--data-referencia', default=None,
+                        help="Data de referência da recência (AAAA-MM-DD).")
+    args = parser.parse_args(argv)
+
+    caminhos = sorted(c for padrao in args.compras for c in glob.glob(padrao))
+    if args.compras and not caminhos:
+        parser.error("nenhum arquivo de compras encontrado")
+
+    if caminhos:
+        df = agregar_compras_por_cluster(caminhos, args.clientes, args.tamanho_bloco, args.data_referencia)
+    else:
+        df = agregar_clientes(args.clientes, args.tamanho_bloco)
+
+    print(f"✅ {len(df)} clusters gravados em {salvar_clusters(df, args.saida)}")
+
+if __name__ == '__main__':
+    main()
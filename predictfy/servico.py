@@ -0,0 +1,313 @@
+"""
+Serviço HTTP assíncrono de recomendações por cliente.
+
+Servidor HTTP/1.1 mínimo em `asyncio` (só biblioteca padrão, com keep-alive)
+sobre os mesmos dados da dashboard (`dados.ler_recomendacoes`):
+
+    GET  /recomendacoes/<fk_contact>   próximos trechos de um cliente
+    POST /recomendacoes/lote           {"clientes": [...]} -> {id: [...]}
+    GET  /metricas                     latência, vazão e cache
+    GET  /saude
+
+A busca usa o índice ordenado de `predictfy.busca` e as colunas já extraídas
+para arrays; as respostas de cada cliente ficam em um cache LRU já
+serializadas em JSON. Clientes sem recomendações não entram no cache: ids
+inexistentes (varreduras, erros de digitação) não empurram para fora os
+clientes de verdade. Um lote busca todas as chaves fora do cache com uma
+única passada no índice (`IndiceChave.linhas_em_lote`).
+
+Corpos acima de `MAX_CORPO` bytes e lotes com mais de `MAX_LOTE` clientes
+recebem 413; uma falha inesperada ao atender vira 500 (e vai para o log),
+sem derrubar a conexão.
+
+Uso:
+    python -m predictfy.servico [--porta 8600] [--pasta Desafios/data/csv]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import time
+from collections import OrderedDict, deque
+from http import HTTPStatus
+from urllib.parse import unquote
+
+import numpy as np
+
+from predictfy import dados
+from predictfy.busca import IndiceChave, chaves_pesquisaveis, converter_chave
+from predictfy.config import COLUNA_CLIENTE, PASTA_CSV
+
+PORTA_PADRAO = 8600
+TAMANHO_CACHE = 100_000
+MAX_LOTE = 1_000
+MAX_CORPO = 1024 * 1024
+JANELA_LATENCIAS = 10_000
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# CACHE E MÉTRICAS
+# ============================================================================
+
+class CacheLRU:
+    """Cache LRU simples com contadores de acertos e falhas (valores None não são guardados)."""
+
+    def __init__(self, max_itens=TAMANHO_CACHE):
+        self.max_itens = max_itens
+        self._itens = OrderedDict()
+        self.acertos = 0
+        self.falhas = 0
+
+    def obter(self, chave, calcular):
+        if chave in self._itens:
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return self._itens[chave]
+        self.falhas += 1
+        valor = calcular()
+        if valor is not None:
+            self._itens[chave] = valor
+            if len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+        return valor
+
+    def obter_varios(self, chaves, calcular):
+        """{chave: valor} de várias chaves; `calcular(faltantes)` devolve os valores das que faltam, na ordem."""
+        valores = {}
+        faltantes = []
+        for chave in dict.fromkeys(chaves):
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+                valores[chave] = self._itens[chave]
+            else:
+                faltantes.append(chave)
+        self.falhas += len(faltantes)
+        if faltantes:
+            for chave, valor in zip(faltantes, calcular(faltantes)):
+                valores[chave] = valor
+                if valor is not None:
+                    self._itens[chave] = valor
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+        return valores
+
+    def estatisticas(self):
+        total = self.acertos + self.falhas
+        return {
+            'itens': len(self._itens),
+            'acertos': self.acertos,
+            'falhas': self.falhas,
+            'taxa_acerto': self.acertos / total if total else 0.0,
+        }
+
+class Metricas:
+    """Contagem de requisições e latências recentes por rota."""
+
+    def __init__(self):
+        self.inicio = time.monotonic()
+        self.requisicoes = {}
+        self.latencias = {}
+
+    def registrar(self, rota, duracao):
+        self.requisicoes[rota] = self.requisicoes.get(rota, 0) + 1
+        self.latencias.setdefault(rota, deque(maxlen=JANELA_LATENCIAS)).append(duracao)
+
+    def resumo(self):
+        decorrido = time.monotonic() - self.inicio
+        rotas = {}
+        for rota, latencias in self.latencias.items():
+            ordenadas = sorted(latencias)
+            n = len(ordenadas)
+            rotas[rota] = {
+                'requisicoes': self.requisicoes[rota],
+                'latencia_ms_p50': statistics.median(ordenadas) * 1000,
+                'latencia_ms_p95': ordenadas[min(n - 1, int(0.95 * n))] * 1000,
+                'latencia_ms_p99': ordenadas[min(n - 1, int(0.99 * n))] * 1000,
+            }
+        total = sum(self.requisicoes.values())
+        return {
+            'tempo_no_ar_s': decorrido,
+            'requisicoes': total,
+            'requisicoes_por_s': total / decorrido if decorrido else 0.0,
+            'rotas': rotas,
+        }
+
+# ============================================================================
+# RECOMENDAÇÕES
+# ============================================================================
+
+def _para_json(valores):
+    """Coluna pronta para serializar: float32 vira o float64 de mesma representação curta."""
+    if valores.dtype == np.float32:
+        # 0.9056 em float32 seria serializado como 0.9056000113487244
+        return valores.astype(str).astype('float64')
+    return valores
+
+class ServicoRecomendacoes:
+    """Recomendações por cliente a partir do DataFrame de recomendações."""
+
+    def __init__(self, df_recomendacoes, tamanho_cache=TAMANHO_CACHE):
+        if 'ranking' in df_recomendacoes.columns:
+            df_recomendacoes = df_recomendacoes.sort_values('ranking', kind='stable')
+        self.ids = df_recomendacoes[COLUNA_CLIENTE].to_numpy()
+        self.colunas = {
+            c: _para_json(df_recomendacoes[c].to_numpy()) for c in df_recomendacoes.columns if c != COLUNA_CLIENTE
+        }
+        # Índice estável: as linhas de cada cliente saem na ordem do ranking
+        self.indice = IndiceChave.construir(self.ids)
+        self.cache = CacheLRU(tamanho_cache)
+        self.metricas = Metricas()
+
+    def _json(self, valor, linhas):
+        """JSON das recomendações de `valor` nas `linhas` do índice (None se não houver)."""
+        linhas = linhas[self.ids[linhas] == valor]
+        itens = [{c: v[i].item() if hasattr(v[i], 'item') else v[i] for c, v in self.colunas.items()} for i in linhas]
+        return json.dumps(itens, ensure_ascii=False) if itens else None
+
+    def recomendacoes(self, chave):
+        """Lista de recomendações do cliente (JSON) ou None se ele não existir."""
+        valor = converter_chave(chave, self.ids[:1])
+        if valor is None:
+            return None
+        return self.cache.obter(
+            valor, lambda: self._json(valor, self.indice.linhas(chaves_pesquisaveis(np.array([valor]))[0]))
+        )
+
+    def lote(self, chaves):
+        """{chave: lista de recomendações} para várias chaves (ausentes ficam de fora).
+
+        Mais de `MAX_LOTE` chaves levanta ValueError.
+        """
+        if len(chaves) > MAX_LOTE:
+            raise ValueError(f'lote acima de {MAX_LOTE} clientes')
+        originais = {}
+        for chave in chaves:
+            valor = converter_chave(chave, self.ids[:1])
+            if valor is not None:
+                originais.setdefault(valor, str(chave))
+
+        def calcular(faltantes):
+            linhas = self.indice.linhas_em_lote(chaves_pesquisaveis(faltantes))
+            return [self._json(valor, l) for valor, l in zip(faltantes, linhas)]
+
+        textos = self.cache.obter_varios(list(originais), calcular)
+        return '{' + ','.join(f'{json.dumps(originais[v])}:{t}' for v, t in textos.items() if t is not None) + '}'
+
+# ============================================================================
+# HTTP
+# ============================================================================
+
+def _resposta(status, corpo, manter_conexao):
+    corpo = corpo.encode('utf-8')
+    cabecalho = (
+        f'HTTP/1.1 {status.value} {status.phrase}\r\n'
+        'Content-Type: application/json; charset=utf-8\r\n'
+        f'Content-Length: {len(corpo)}\r\n'
+        f'Connection: {"keep-alive" if manter_conexao else "close"}\r\n\r\n'
+    )
+    return cabecalho.encode('latin-1') + corpo
+
+def _erro(mensagem):
+    return json.dumps({'erro': mensagem}, ensure_ascii=False)
+
+class ServidorHTTP:
+    """Servidor HTTP/1.1 mínimo (keep-alive) para o `ServicoRecomendacoes`."""
+
+    def __init__(self, servico):
+        self.servico = servico
+
+    def rotear(self, metodo, caminho, corpo):
+        """(rota, status, corpo JSON) de uma requisição."""
+        if metodo == 'GET' and caminho.startswith('/recomendacoes/'):
+            texto = self.servico.recomendacoes(caminho[len('/recomendacoes/'):])
+            if texto is None:
+                return 'recomendacoes', HTTPStatus.NOT_FOUND, _erro('cliente sem recomendações')
+            return 'recomendacoes', HTTPStatus.OK, texto
+        if metodo == 'POST' and caminho == '/recomendacoes/lote':
+            try:
+                clientes = json.loads(corpo or b'{}')['clientes']
+                if not isinstance(clientes, list):
+                    raise TypeError
+            except (ValueError, KeyError, TypeError):
+                return 'lote', HTTPStatus.BAD_REQUEST, _erro('esperado {"clientes": [...]}')
+            if len(clientes) > MAX_LOTE:
+                return 'lote', HTTPStatus.REQUEST_ENTITY_TOO_LARGE, _erro(
+                    f'lote com {len(clientes)} clientes; o máximo é {MAX_LOTE}')
+            return 'lote', HTTPStatus.OK, self.servico.lote(clientes)
+        if metodo == 'GET' and caminho == '/metricas':
+            return 'metricas', HTTPStatus.OK, json.dumps({
+                **self.servico.metricas.resumo(),
+                'cache': self.servico.cache.estatisticas(),
+            })
+        if metodo == 'GET' and caminho == '/saude':
+            return 'saude', HTTPStatus.OK, '{"status":"ok"}'
+        return 'outras', HTTPStatus.NOT_FOUND, _erro('rota inexistente')
+
+    async def atender(self, reader, writer):
+        try:
+            while True:
+                linha = await reader.readline()
+                if not linha:
+                    break
+                metodo, alvo, versao = linha.decode('latin-1').split()
+                cabecalhos = {}
+                while (cabecalho := await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    nome, _, valor = cabecalho.decode('latin-1').partition(':')
+                    cabecalhos[nome.strip().lower()] = valor.strip()
+                tamanho = int(cabecalhos.get('content-length', 0))
+                if tamanho > MAX_CORPO:
+                    # O corpo não é lido: a conexão fecha depois da resposta
+                    writer.write(_resposta(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                           _erro(f'corpo acima de {MAX_CORPO} bytes'), False))
+                    await writer.drain()
+                    break
+                corpo = await reader.readexactly(tamanho)
+
+                inicio = time.perf_counter()
+                try:
+                    rota, status, resposta = self.rotear(metodo, unquote(alvo.split('?', 1)[0]), corpo)
+                except Exception:
+                    logger.exception("falha ao atender %s %s", metodo, alvo)
+                    rota, status, resposta = 'erro', HTTPStatus.INTERNAL_SERVER_ERROR, _erro('erro interno')
+                manter = versao == 'HTTP/1.1' and cabecalhos.get('connection', '').lower() != 'close'
+                writer.write(_resposta(status, resposta, manter))
+                self.servico.metricas.registrar(rota, time.perf_counter() - inicio)
+                await writer.drain()
+                if not manter:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def servir(self, host, porta):
+        servidor = await asyncio.start_server(self.atender, host, porta, backlog=1024)
+        print(f"✅ Servindo recomendações em http://{host}:{porta}")
+        async with servidor:
+            await servidor.serve_forever()
+
+# ============================================================================
+# LINHA DE COMANDO
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serviço HTTP de recomendações por cliente.")
+    parser.add_argument('--pasta', default=str(PASTA_CSV), help="Pasta com os CSVs.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=PORTA_PADRAO)
+    parser.add_argument('--tamanho-cache', type=int, default=TAMANHO_CACHE)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+    servico = ServicoRecomendacoes(dados.ler_recomendacoes(args.pasta), args.tamanho_cache)
+    try:
+        asyncio.run(ServidorHTTP(servico).servir(args.host, args.porta))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
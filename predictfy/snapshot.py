@@ -0,0 +1,151 @@
+"""
+Snapshot pré-calculado da dashboard.
+
+Calcula uma vez por versão dos dados todos os KPIs, os recortes PF/PJ e as
+entradas dos gráficos, e grava tudo em um único arquivo versionado
+(`.cache/snapshot.pkl`). A dashboard só desserializa esse arquivo.
+
+Uso (pré-aquecer uma réplica antes de colocá-la no ar):
+    python -m predictfy.snapshot [--pasta Desafios/data/csv]
+"""
+
+import argparse
+import os
+import pickle
+from pathlib import Path
+
+from predictfy import dados
+from predictfy.cache_colunar import NOME_PASTA_CACHE
+from predictfy.config import PASTA_CSV
+
+VERSAO_FORMATO = 3
+ARQUIVO_SNAPSHOT = 'snapshot.pkl'
+
+# ============================================================================
+# CÁLCULO
+# ============================================================================
+
+def _media_ponderada(df, coluna):
+    total = df['quantidade'].sum()
+    return float((df['quantidade'] * df[coluna]).sum() / total) if total else 0.0
+
+def _recorte(df_clusters, tipo, df_quantis=None):
+    """Clusters de um tipo, ordenados por quantidade, com rótulo curto e valor total.
+
+    Com `df_quantis` (de `dados.ler_quantis`), ganha também as colunas
+    `<métrica>_p50/_p90/_p99` de cada cluster.
+    """
+    df = df_clusters[df_clusters['tipo'] == tipo].sort_values('quantidade', ascending=False).copy()
+    df['rotulo'] = df['cluster'].str.replace(f'{tipo} - ', '')
+    df['valor_total'] = df['quantidade'] * df['gasto_medio_total']
+    if df_quantis is not None:
+        df = df.merge(df_quantis, on='cluster', how='left')
+    return df
+
+def calcular_snapshot(df_clusters, versao_dados, df_quantis=None):
+    """Calcula KPIs, recortes PF/PJ e destaques a partir do `df_clusters` preparado."""
+    df_pessoa = _recorte(df_clusters, 'Pessoa', df_quantis)
+    df_empresa = _recorte(df_clusters, 'Empresa', df_quantis)
+
+    total_clientes = int(df_clusters['quantidade'].sum())
+    total_pf = int(df_pessoa['quantidade'].sum())
+    total_pj = int(df_empresa['quantidade'].sum())
+
+    quase_dormindo = df_pessoa[df_pessoa['cluster'].str.contains('Quase dormindo')]
+    quase_dormindo_qtd = int(quase_dormindo['quantidade'].sum())
+
+    vips = df_empresa[df_empresa['cluster'].str.contains('VIP')]
+    vip = vips.iloc[0] if len(vips) > 0 else (df_empresa.iloc[0] if len(df_empresa) > 0 else None)
+
+    kpis = {
+        'total_clientes': total_clientes,
+        'total_clusters': len(df_clusters),
+        'ticket_medio_geral': _media_ponderada(df_clusters, 'gasto_medio_total'),
+        'freq_media_geral': _media_ponderada(df_clusters, 'frequencia_media'),
+        'recencia_media_geral': _media_ponderada(df_clusters, 'recencia_media'),
+        'clientes_pf': total_pf,
+        'pct_pf': total_pf / total_clientes * 100 if total_clientes else 0.0,
+        'total_pf': total_pf,
+        'total_pj': total_pj,
+        'gasto_medio_pf': _media_ponderada(df_pessoa, 'gasto_medio_total'),
+        'gasto_medio_pj': _media_ponderada(df_empresa, 'gasto_medio_total'),
+        'freq_media_pf': _media_ponderada(df_pessoa, 'frequencia_media'),
+        'freq_media_pj': _media_ponderada(df_empresa, 'frequencia_media'),
+        'potencial_qtd': int(df_pessoa[df_pessoa['cluster'].str.contains('Potencial')]['quantidade'].sum()),
+        'dormindo_qtd': int(df_pessoa[df_pessoa['cluster'].str.contains('Dormindo')]['quantidade'].sum()),
+        'quase_dormindo_qtd': quase_dormindo_qtd,
+        'quase_dormindo_pct': quase_dormindo_qtd / total_pf * 100 if total_pf else 0.0,
+        'quase_dormindo_recencia': float(quase_dormindo['recencia_media'].iloc[0]) if len(quase_dormindo) else 0.0,
+    }
+
+    return {
+        'formato': VERSAO_FORMATO,
+        'versao_dados': versao_dados,
+        'kpis': kpis,
+        'df_pessoa': df_pessoa.reset_index(drop=True),
+        'df_empresa': df_empresa.reset_index(drop=True),
+        'vip_pj': None if vip is None else vip.to_dict(),
+        'tem_quantis': df_quantis is not None,
+    }
+
+# ============================================================================
+# ARTEFATO
+# ============================================================================
+
+def caminho_snapshot(pasta=PASTA_CSV):
+    return Path(pasta) / NOME_PASTA_CACHE / ARQUIVO_SNAPSHOT
+
+def ler_snapshot(pasta=PASTA_CSV, versao_dados=None):
+    """Lê o snapshot; retorna None se não existir, for de outro formato ou de outra versão."""
+    try:
+        with open(caminho_snapshot(pasta), 'rb') as f:
+            snap = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+    if snap.get('formato') != VERSAO_FORMATO:
+        return None
+    if versao_dados is not None and snap.get('versao_dados') != versao_dados:
+        return None
+    return snap
+
+def gravar_snapshot(snap, pasta=PASTA_CSV):
+    """Grava o snapshot de forma atômica."""
+    caminho = caminho_snapshot(pasta)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    temporario = caminho.with_name(f'{caminho.name}.{os.getpid()}.tmp')
+    with open(temporario, 'wb') as f:
+        pickle.dump(snap, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporario, caminho)
+    return caminho
+
+def obter_snapshot(pasta=PASTA_CSV, carregar_clusters=None):
+    """Snapshot da versão atual dos dados, construído e gravado se necessário."""
+    versao = dados.versao_dados(pasta)
+    snap = ler_snapshot(pasta, versao)
+    if snap is None:
+        df_clusters = carregar_clusters() if carregar_clusters else dados.ler_clusters(pasta)
+        if df_clusters is None:
+            return None
+        snap = calcular_snapshot(df_clusters, versao, dados.ler_quantis(pasta))
+        try:
+            gravar_snapshot(snap, pasta)
+        except OSError:
+            pass
+    return snap
+
+# ============================================================================
+# LINHA DE COMANDO
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Constrói o snapshot pré-calculado da dashboard.")
+    parser.add_argument('--pasta', default=str(PASTA_CSV), help="Pasta com os CSVs.")
+    args = parser.parse_args(argv)
+
+    versao = dados.versao_dados(args.pasta)
+    snap = calcular_snapshot(dados.ler_clusters(args.pasta), versao, dados.ler_quantis(args.pasta))
+    caminho = gravar_snapshot(snap, args.pasta)
+    print(f"✅ Snapshot {versao} gravado em {caminho} ({caminho.stat().st_size / 1024:.1f} KB)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,279 @@
+"""
+Tempo de renderização por seção da dashboard, exportado para o Prometheus.
+
+Cada seção da página roda dentro de `Secao` (gerenciador de contexto ou
+decorador), que registra em histogramas do processo:
+
+    predictfy_secao_segundos{secao}          tempo de parede da seção
+    predictfy_secao_figuras_segundos{secao}  parte dele obtendo figuras
+    predictfy_secao_bytes{secao}             bytes de figuras e cards enviados
+
+Os bytes são os das figuras (JSON) e cards (HTML) que a página já tem
+prontos ao exibi-los, informados com `enviados(n)`. Para seções seguidas no
+corpo do script, `SecoesEmSequencia.iniciar(nome)`
+encerra a anterior e abre a próxima. A página inteira é medida como
+`secao="rerun"`; o p95 do rerun sai de
+
+    histogram_quantile(0.95, sum by (le) (
+        rate(predictfy_secao_segundos_bucket{secao="rerun"}[5m])))
+
+Os histogramas são gravados em formato texto do Prometheus em um arquivo
+(no máximo a cada `INTERVALO_EXPORTACAO` segundos), no formato que o
+textfile collector do node_exporter lê; o CLI serve o arquivo em /metrics.
+
+Uso:
+    python -m predictfy.telemetria --arquivo Desafios/data/csv/.cache/metricas.prom --porta 9464
+"""
+
+import argparse
+import bisect
+import functools
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+LIMITES_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LIMITES_BYTES = (1e3, 1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6, 1e7)
+INTERVALO_EXPORTACAO = 10.0
+PORTA_PADRAO = 9464
+
+# ============================================================================
+# HISTOGRAMAS
+# ============================================================================
+
+class Histograma:
+    """Histograma cumulativo do Prometheus, com um conjunto de contagens por rótulo."""
+
+    def __init__(self, nome, ajuda, limites):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.limites = tuple(limites)
+        self._series = {}
+        self._trava = threading.Lock()
+
+    def observar(self, rotulo, valor):
+        with self._trava:
+            contagens, soma = self._series.get(rotulo, ([0] * (len(self.limites) + 1), 0.0))
+            contagens[bisect.bisect_left(self.limites, valor)] += 1
+            self._series[rotulo] = (contagens, soma + valor)
+
+    def texto(self, nome_rotulo):
+        linhas = [f'# HELP {self.nome} {self.ajuda}', f'# TYPE {self.nome} histogram']
+        with self._trava:
+            series = sorted((r, list(c), s) for r, (c, s) in self._series.items())
+        for rotulo, contagens, soma in series:
+            acumulado = 0
+            for limite, contagem in zip(self.limites + (float('inf'),), contagens):
+                acumulado += contagem
+                le = '+Inf' if limite == float('inf') else f'{limite:g}'
+                linhas.append(f'{self.nome}_bucket{{{nome_rotulo}="{rotulo}",le="{le}"}} {acumulado}')
+            linhas.append(f'{self.nome}_sum{{{nome_rotulo}="{rotulo}"}} {soma:.6f}')
+            linhas.append(f'{self.nome}_count{{{nome_rotulo}="{rotulo}"}} {acumulado}')
+        return '\n'.join(linhas)
+
+class Medidor:
+    """Gauge do Prometheus: último valor de cada rótulo (ou um valor só, sem rótulo)."""
+
+    def __init__(self, nome, ajuda, nome_rotulo=None):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.nome_rotulo = nome_rotulo
+        self._valores = {}
+        self._trava = threading.Lock()
+
+    def definir(self, valor, rotulo=None):
+        with self._trava:
+            self._valores[rotulo] = valor
+
+    def texto(self):
+        linhas = [f'# HELP {self.nome} {self.ajuda}', f'# TYPE {self.nome} gauge']
+        with self._trava:
+            valores = sorted(self._valores.items(), key=lambda item: str(item[0]))
+        for rotulo, valor in valores:
+            rotulos = f'{{{self.nome_rotulo}="{rotulo}"}}' if self.nome_rotulo else ''
+            linhas.append(f'{self.nome}{rotulos} {valor if isinstance(valor, int) else f"{valor:.6g}"}')
+        return '\n'.join(linhas)
+
+class MetricasSecoes:
+    """Histogramas de tempo, tempo de figuras e bytes por seção (e gauges avulsos)."""
+
+    def __init__(self):
+        self.tempo = Histograma(
+            'predictfy_secao_segundos', 'Tempo de parede de cada seção da página.', LIMITES_SEGUNDOS)
+        self.figuras = Histograma(
+            'predictfy_secao_figuras_segundos', 'Tempo obtendo figuras (cache ou construção) na seção.',
+            LIMITES_SEGUNDOS)
+        self.bytes = Histograma(
+            'predictfy_secao_bytes', 'Bytes de figuras e cards enviados pela seção.', LIMITES_BYTES)
+        self.medidores = {}
+        self._ultima_exportacao = 0.0
+        self._trava = threading.Lock()
+
+    def medidor(self, nome, ajuda, nome_rotulo=None):
+        """Gauge `nome` (criado no primeiro uso)."""
+        with self._trava:
+            if nome not in self.medidores:
+                self.medidores[nome] = Medidor(nome, ajuda, nome_rotulo)
+            return self.medidores[nome]
+
+    def registrar(self, secao, segundos, figuras_s, enviados):
+        self.tempo.observar(secao, segundos)
+        self.figuras.observar(secao, figuras_s)
+        self.bytes.observar(secao, enviados)
+
+    def texto_prometheus(self):
+        blocos = [h.texto('secao') for h in (self.tempo, self.figuras, self.bytes)]
+        with self._trava:
+            medidores = list(self.medidores.values())
+        blocos += [m.texto() for m in medidores]
+        return '\n'.join(blocos) + '\n'
+
+    def exportar(self, caminho, intervalo=INTERVALO_EXPORTACAO, atualizar=None):
+        """Grava o texto no arquivo se a última gravação tiver mais de `intervalo` segundos.
+
+        `atualizar()` roda só quando o arquivo vai ser gravado (ex.: gauges dos caches).
+        Só uma das sessões simultâneas grava em cada intervalo.
+        """
+        agora = time.monotonic()
+        with self._trava:
+            if agora - self._ultima_exportacao < intervalo:
+                return False
+            self._ultima_exportacao = agora
+        if atualizar is not None:
+            atualizar()
+        caminho = Path(caminho)
+        try:
+            caminho.parent.mkdir(parents=True, exist_ok=True)
+            temporario = caminho.with_name(f'{caminho.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+            temporario.write_text(self.texto_prometheus(), encoding='utf-8')
+            os.replace(temporario, caminho)
+        except OSError:
+            return False
+        return True
+
+METRICAS = MetricasSecoes()
+
+# ============================================================================
+# SEÇÕES
+# ============================================================================
+
+_local = threading.local()
+
+class Secao:
+    """Mede uma seção da página: `with Secao('pf'):` ou `@Secao('pf')`.
+
+    A seção atual fica em um `threading.local` (cada sessão roda o script na
+    própria thread). Seções aninhadas somam também na de fora.
+    """
+
+    def __init__(self, nome, metricas=None, raiz=False):
+        self.nome = nome
+        self.metricas = metricas or METRICAS
+        self.raiz = raiz
+        self.figuras_s = 0.0
+        self.bytes = 0
+
+    def __call__(self, funcao):
+        @functools.wraps(funcao)
+        def medida(*args, **kwargs):
+            with Secao(self.nome, self.metricas):
+                return funcao(*args, **kwargs)
+        return medida
+
+    def iniciar(self):
+        # Um rerun interrompido (st.stop, nova interação) pode ter deixado seções abertas
+        self._anterior = None if self.raiz else getattr(_local, 'secao', None)
+        _local.secao = self
+        self._inicio = time.perf_counter()
+        return self
+
+    def encerrar(self):
+        duracao = time.perf_counter() - self._inicio
+        _local.secao = self._anterior
+        if self._anterior is not None:
+            self._anterior.figuras_s += self.figuras_s
+            self._anterior.bytes += self.bytes
+        self.metricas.registrar(self.nome, duracao, self.figuras_s, self.bytes)
+        return duracao
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.encerrar()
+        return False
+
+class SecoesEmSequencia:
+    """Seções consecutivas da página: cada `iniciar(nome)` encerra a anterior."""
+
+    def __init__(self, metricas=None):
+        self.metricas = metricas
+        self.atual = None
+
+    def iniciar(self, nome):
+        self.encerrar()
+        self.atual = Secao(nome, self.metricas).iniciar()
+
+    def encerrar(self):
+        if self.atual is not None:
+            self.atual.encerrar()
+            self.atual = None
+
+def enviados(n_bytes):
+    """Soma `n_bytes` (figura ou card já serializado) aos bytes da seção atual."""
+    secao = getattr(_local, 'secao', None)
+    if secao is not None:
+        secao.bytes += n_bytes
+
+class figura:
+    """Soma o tempo do bloco ao tempo de figuras da seção atual."""
+
+    def __enter__(self):
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        secao = getattr(_local, 'secao', None)
+        if secao is not None:
+            secao.figuras_s += time.perf_counter() - self._inicio
+        return False
+
+# ============================================================================
+# LINHA DE COMANDO
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Expõe o arquivo de métricas da dashboard em /metrics.")
+    parser.add_argument('--arquivo', required=True, help="Arquivo .prom gravado pelo app.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=PORTA_PADRAO)
+    args = parser.parse_args(argv)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != '/metrics':
+                self.send_error(404)
+                return
+            try:
+                corpo = Path(args.arquivo).read_bytes()
+            except OSError:
+                corpo = b''
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, *args):
+            pass
+
+    print(f"✅ Métricas em http://{args.host}:{args.porta}/metrics")
+    try:
+        ThreadingHTTPServer((args.host, args.porta), Handler).serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
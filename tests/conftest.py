@@ -0,0 +1,21 @@
+"""Dados sintéticos pequenos para os testes do pacote `predictfy`."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from predictfy.config import COLUNA_CLIENTE, COLUNA_DATA, COLUNA_VALOR
+
+@pytest.fixture
+def compras():
+    """Compras brutas: 40 clientes, 300 compras, algumas datas inválidas."""
+    rng = np.random.default_rng(7)
+    n = 300
+    datas = pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 365, n), unit='D')
+    df = pd.DataFrame({
+        COLUNA_CLIENTE: rng.integers(0, 40, n),
+        COLUNA_DATA: datas.strftime('%Y-%m-%d'),
+        COLUNA_VALOR: rng.gamma(2.0, 150.0, n).round(2),
+    })
+    df.loc[[5, 17], COLUNA_DATA] = 'sem data'
+    return df
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from predictfy import busca
+from predictfy.config import ARQUIVO_CLIENTES, ARQUIVO_RECOMENDACOES, COLUNA_CLIENTE
+
+@pytest.fixture
+def tabelas():
+    rng = np.random.default_rng(4)
+    clientes = pd.DataFrame({COLUNA_CLIENTE: rng.permutation(1000), 'cluster': 'Pessoa A'})
+    recomendacoes = pd.DataFrame({
+        COLUNA_CLIENTE: np.repeat([7, 3, 7, 500], [1, 2, 2, 1]),
+        'destino': list('abcdef'),
+        'ranking': [3, 1, 2, 1, 2, 1],
+    })
+    return clientes, recomendacoes
+
+def test_indice_inteiro(tabelas):
+    clientes, _ = tabelas
+    indice = busca.IndiceChave.construir(clientes[COLUNA_CLIENTE].to_numpy())
+    for chave in (0, 123, 999):
+        assert clientes[COLUNA_CLIENTE].to_numpy()[indice.linhas(chave)].tolist() == [chave]
+    assert len(indice.linhas(5000)) == 0
+
+def test_linhas_em_lote_igual_a_uma_por_vez(tabelas):
+    _, recomendacoes = tabelas
+    indice = busca.IndiceChave.construir(recomendacoes[COLUNA_CLIENTE].to_numpy())
+    chaves = busca.chaves_pesquisaveis([7, 3, 42, 500])
+    lote = indice.linhas_em_lote(chaves)
+    assert [sorted(l) for l in lote] == [sorted(indice.linhas(c)) for c in chaves]
+    assert [len(l) for l in lote] == [3, 2, 0, 1]
+
+def test_chaves_texto_conferem_a_chave_original():
+    ids = np.array(['abc', 'def', 'abc', 'xyz'], dtype=object)
+    df = pd.DataFrame({COLUNA_CLIENTE: ids, 'valor': [1, 2, 3, 4]})
+    procura = busca.BuscaClientes(df, None, {'clientes': busca.IndiceChave.construir(ids)})
+
+    cliente, recomendacoes = procura.buscar(' abc ')
+    assert cliente['valor'].tolist() == [1, 3]
+    assert recomendacoes is None
+    assert procura.buscar('nada')[0].empty
+
+def test_converter_chave():
+    assert busca.converter_chave(' 42 ', np.array([1])) == 42
+    assert busca.converter_chave('abc', np.array([1])) is None
+    assert busca.converter_chave(42, np.array(['a'], dtype=object)) == '42'
+
+def test_buscar_ordena_recomendacoes_e_rejeita_chave_invalida(tabelas):
+    clientes, recomendacoes = tabelas
+    indices = {'clientes': busca.IndiceChave.construir(clientes[COLUNA_CLIENTE].to_numpy()),
+               'recomendacoes': busca.IndiceChave.construir(recomendacoes[COLUNA_CLIENTE].to_numpy())}
+    procura = busca.BuscaClientes(clientes, recomendacoes, indices)
+
+    cliente, recs = procura.buscar('7')
+    assert cliente[COLUNA_CLIENTE].tolist() == [7]
+    assert recs['ranking'].tolist() == [1, 2, 3]
+    cliente, recs = procura.buscar('sete')
+    assert cliente.empty and recs.empty
+
+def test_abrir_grava_e_reaproveita_os_indices(tmp_path, tabelas, monkeypatch):
+    clientes, recomendacoes = tabelas
+    clientes.to_csv(tmp_path / ARQUIVO_CLIENTES, index=False)
+    recomendacoes.to_csv(tmp_path / ARQUIVO_RECOMENDACOES, index=False)
+
+    busca.abrir(tmp_path, clientes, recomendacoes)
+    caminho = busca.caminho_indices(tmp_path, busca.versao_indices(tmp_path))
+    assert caminho.exists()
+
+    # Segunda abertura lê os índices do disco
+    monkeypatch.setattr(busca.IndiceChave, 'construir', None)
+    reaberta = busca.abrir(tmp_path, clientes, recomendacoes)
+    assert reaberta.buscar(500)[1]['destino'].tolist() == ['f']
+
+def test_abrir_usa_a_versao_do_chamador(tmp_path, tabelas, monkeypatch):
+    clientes, recomendacoes = tabelas
+    monkeypatch.setattr(busca, 'versao_indices', None)
+
+    busca.abrir(tmp_path, clientes, recomendacoes, versao='v1')
+    assert busca.caminho_indices(tmp_path, 'v1').exists()
+    assert busca.abrir(tmp_path, clientes, recomendacoes, versao='v1').buscar(7)[0][COLUNA_CLIENTE].tolist() == [7]
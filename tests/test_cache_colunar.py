@@ -0,0 +1,76 @@
+import importlib
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+from predictfy import cache_colunar
+
+pytestmark = pytest.mark.skipif(not cache_colunar.PARQUET_DISPONIVEL, reason="sem pyarrow")
+
+@pytest.fixture
+def csv(tmp_path):
+    caminho = tmp_path / 'cliente.csv'
+    pd.DataFrame({'fk_contact': [1, 2, 3], 'valor': [1.5, 2.5, 3.5]}).to_csv(caminho, index=False)
+    return caminho
+
+@pytest.fixture
+def leituras(monkeypatch):
+    """Conta as leituras do CSV de verdade (as que não vêm do Parquet)."""
+    contagem = []
+    original = pd.read_csv
+
+    def contar(*args, **kwargs):
+        contagem.append(args[0])
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(cache_colunar.pd, 'read_csv', contar)
+    return contagem
+
+def test_segunda_leitura_vem_do_parquet(csv, leituras):
+    primeiro = cache_colunar.ler_csv(csv)
+    segundo = cache_colunar.ler_csv(csv)
+
+    pd.testing.assert_frame_equal(primeiro, segundo)
+    assert len(leituras) == 1
+    assert cache_colunar.caminhos_cache(csv)[0].exists()
+
+def test_arquivo_so_tocado_usa_o_hash(csv, leituras):
+    cache_colunar.ler_csv(csv)
+    stat = csv.stat()
+    os.utime(csv, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    cache_colunar.ler_csv(csv)
+    assert len(leituras) == 1
+
+def test_conteudo_novo_invalida(csv, leituras):
+    cache_colunar.ler_csv(csv)
+    csv.write_text('fk_contact,valor\n9,9.5\n')
+
+    assert cache_colunar.ler_csv(csv)['fk_contact'].tolist() == [9]
+    assert len(leituras) == 2
+
+def test_opcoes_de_leitura_tem_cache_proprio(csv, leituras):
+    cache_colunar.ler_csv(csv)
+    df = cache_colunar.ler_csv(csv, dtype={'valor': 'float32'})
+
+    assert df['valor'].dtype == 'float32'
+    assert len(leituras) == 2
+
+def test_mudar_o_codigo_do_preparo_invalida(csv, leituras, tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(str(tmp_path))
+    fonte = tmp_path / 'preparo_teste.py'
+    fonte.write_text("def preparar(df):\n    df['valor'] = df['valor'] * 2\n    return df\n")
+    modulo = importlib.import_module('preparo_teste')
+    assert cache_colunar.ler_csv(csv, preparar=modulo.preparar)['valor'].tolist() == [3.0, 5.0, 7.0]
+    assert cache_colunar.ler_csv(csv, preparar=modulo.preparar)['valor'].tolist() == [3.0, 5.0, 7.0]
+    assert len(leituras) == 1
+
+    fonte.write_text("def preparar(df):\n    df['valor'] = df['valor'] * 10\n    return df\n")
+    sys.modules.pop('preparo_teste')
+    cache_colunar._hash_fonte.cache_clear()
+    importlib.invalidate_caches()
+    modulo = importlib.import_module('preparo_teste')
+    assert cache_colunar.ler_csv(csv, preparar=modulo.preparar)['valor'].tolist() == [15.0, 25.0, 35.0]
+    assert len(leituras) == 2
@@ -0,0 +1,122 @@
+import os
+import threading
+import time
+
+import pytest
+
+from predictfy import cache_dados
+
+@pytest.fixture
+def pasta(tmp_path, monkeypatch):
+    # Só o polling manual dos testes: sem eventos do watchdog em paralelo
+    monkeypatch.setattr(cache_dados, 'WATCHDOG_DISPONIVEL', False)
+    (tmp_path / 'a.csv').write_text('x\n1\n')
+    (tmp_path / 'b.csv').write_text('y\n2\n')
+    return tmp_path
+
+def _reescrever(caminho, texto):
+    caminho.write_text(texto)
+    os.utime(caminho, ns=(0, time.time_ns()))
+
+def _cache(pasta, **kwargs):
+    """Cache com as fontes a.csv e b.csv; a vigia só verifica quando o teste chama."""
+    cargas = []
+
+    def ler(nome):
+        def carregar():
+            cargas.append(nome)
+            texto = (pasta / nome).read_text()
+            if texto == 'quebrado':
+                raise ValueError(texto)
+            return texto
+        return carregar
+
+    cache = cache_dados.CacheDados(pasta, intervalo=3600, **kwargs)
+    cache.registrar('a', ler('a.csv'), ('a.csv',))
+    cache.registrar('b', ler('b.csv'), ('b.csv',))
+    cache.iniciar()
+    return cache, cargas
+
+def test_vigia_so_publica_mudanca_estavel(pasta):
+    publicadas = []
+    vigia = cache_dados.VigiaArquivos(pasta, ('a.csv', 'b.csv'), lambda a, m: publicadas.append(m))
+
+    _reescrever(pasta / 'a.csv', 'x\n1\n2\n')
+    assert not vigia.verificar()
+    # Ainda sendo gravado: a assinatura mudou de novo desde a última olhada
+    _reescrever(pasta / 'a.csv', 'x\n1\n2\n3\n')
+    assert not vigia.verificar()
+    assert vigia.verificar()
+    assert publicadas == [{'a.csv'}]
+    assert not vigia.verificar()
+
+def test_recarga_publica_so_os_afetados(pasta):
+    cache, cargas = _cache(pasta)
+    try:
+        versao = cache.versao(('a.csv',))
+        assert cache.obter('a') == cache.obter('a') == 'x\n1\n'
+        cache.obter('b')
+        _reescrever(pasta / 'a.csv', 'x\n9\n')
+        cache._vigia.verificar()
+        cache._vigia.verificar()
+
+        assert cargas == ['a.csv', 'b.csv', 'a.csv']
+        assert cache.versao(('a.csv',)) != versao
+        assert cache.obter('a') == 'x\n9\n' and cache.obter('b') == 'y\n2\n'
+        assert len(cargas) == 3
+    finally:
+        cache._vigia.parar()
+
+def test_recarga_com_falha_mantem_a_versao_anterior(pasta):
+    cache, _ = _cache(pasta)
+    try:
+        assert cache.obter('a') == 'x\n1\n'
+        _reescrever(pasta / 'a.csv', 'quebrado')
+        cache._vigia.verificar()
+        cache._vigia.verificar()
+
+        assert cache.obter('a') == 'x\n1\n'
+        assert cache.estatisticas()['recargas'] == 1
+    finally:
+        cache._vigia.parar()
+
+def test_ttl_e_max_itens(pasta, monkeypatch):
+    agora = [1000.0]
+    monkeypatch.setattr(cache_dados.time, 'monotonic', lambda: agora[0])
+    cache, cargas = _cache(pasta, ttl=60, max_itens=1)
+    try:
+        cache.obter('a')
+        agora[0] += 30
+        cache.obter('a')
+        agora[0] += 31
+        cache.obter('a')
+        assert cargas == ['a.csv', 'a.csv']
+
+        cache.obter('b')
+        assert list(cache.carregados()) == ['b']
+        assert cache.estatisticas()['despejos'] == 1
+    finally:
+        cache._vigia.parar()
+
+def test_uma_carga_para_sessoes_simultaneas(pasta):
+    cache = cache_dados.CacheDados(pasta, intervalo=3600)
+    cargas = []
+    liberar = threading.Event()
+
+    def carregar():
+        cargas.append(1)
+        liberar.wait(5)
+        return 'valor'
+
+    cache.registrar('a', carregar, ('a.csv',))
+    resultados = []
+    threads = [threading.Thread(target=lambda: resultados.append(cache.obter('a'))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    liberar.set()
+    for t in threads:
+        t.join(5)
+
+    assert resultados == ['valor'] * 8
+    assert len(cargas) == 1
@@ -0,0 +1,60 @@
+import os
+
+from predictfy import cache_figuras
+
+class Figura:
+    """Figura falsa: o cache só precisa serializá-la."""
+
+    def __init__(self, texto):
+        self.texto = texto
+
+class CacheTexto(cache_figuras.CacheFiguras):
+    def _serializar(self, valor):
+        return valor.texto
+
+def test_constroi_so_na_falta():
+    cache = CacheTexto()
+    construidas = []
+
+    def construir():
+        construidas.append(1)
+        return Figura('{"data": []}')
+
+    assert cache.obter('v1', 'pf', construir) == cache.obter('v1', 'pf', construir) == '{"data": []}'
+    cache.obter('v2', 'pf', construir)
+    assert len(construidas) == 2
+    assert cache.estatisticas()['acertos'] == 1
+
+def test_despejo_por_itens_e_bytes():
+    cache = CacheTexto(max_itens=2, max_bytes=10)
+    cache.obter('v', 'a', lambda: Figura('aaaa'))
+    cache.obter('v', 'b', lambda: Figura('bbbb'))
+    cache.obter('v', 'a', lambda: Figura('nunca'))
+    cache.obter('v', 'c', lambda: Figura('cccccc'))
+
+    # 'b' (menos usada recentemente) sai para caber nos 10 bytes
+    estatisticas = cache.estatisticas()
+    assert estatisticas['itens'] == 2 and estatisticas['bytes'] == 10
+    assert estatisticas['despejos'] == 1
+    assert cache.obter('v', 'a', lambda: Figura('nunca')) == 'aaaa'
+    assert cache.obter('v', 'b', lambda: Figura('bb')) == 'bb'
+
+def test_disco_reaproveitado_por_outro_processo(tmp_path):
+    CacheTexto(pasta=tmp_path).obter('v1', 'pf', lambda: Figura('{"x": 1}'))
+
+    novo = CacheTexto(pasta=tmp_path)
+    assert novo.obter('v1', 'pf', lambda: Figura('nunca')) == '{"x": 1}'
+    assert novo.estatisticas()['leituras_disco'] == 1
+
+def test_disco_guarda_no_maximo_max_arquivos(tmp_path):
+    cache = CacheTexto(pasta=tmp_path, max_arquivos=2)
+    for i, nome in enumerate('abc'):
+        cache.obter('v', nome, lambda: Figura(nome))
+        os.utime(tmp_path / f'v-{nome}.json', (i, i))
+
+    assert sorted(p.name for p in tmp_path.glob('*.json')) == ['v-b.json', 'v-c.json']
+
+def test_fragmentos_guardam_o_html_pronto():
+    cache = cache_figuras.CacheFragmentos()
+    assert cache.obter('v', 'card', lambda: '<div>1</div>') == '<div>1</div>'
+    assert cache.obter('v', 'card', lambda: '<div>2</div>') == '<div>1</div>'
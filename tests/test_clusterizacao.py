@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from predictfy import clusterizacao, dados, rfm
+from predictfy.config import (
+    ARQUIVO_CLIENTES,
+    ARQUIVO_CLUSTERS,
+    COLUNA_CLIENTE,
+    COLUNA_CLUSTER,
+    COLUNA_DATA,
+    COLUNA_VALOR,
+    PASTA_COMPRAS,
+)
+
+REFERENCIA = pd.Timestamp('2024-06-30')
+
+@pytest.fixture
+def pasta(tmp_path):
+    """Pasta com `cliente.csv` segmentado (2 clusters PF, 2 PJ) e um arquivo de compras."""
+    rng = np.random.default_rng(2)
+    grupos = [('Pessoa Ativa', 10, 8, 500), ('Pessoa Inativa', 200, 2, 150),
+              ('Empresa Grande', 15, 30, 20_000), ('Empresa Pequena', 90, 5, 2_000)]
+    partes = []
+    for cluster, recency, frequency, monetary in grupos:
+        n = 60
+        partes.append(pd.DataFrame({
+            COLUNA_CLUSTER: cluster,
+            'recency': rng.poisson(recency, n),
+            'frequency': rng.poisson(frequency, n) + 1,
+            'monetary': rng.gamma(4.0, monetary / 4, n).round(2),
+        }))
+    clientes = pd.concat(partes, ignore_index=True)
+    clientes.insert(0, COLUNA_CLIENTE, np.arange(len(clientes)))
+    clientes.to_csv(tmp_path / ARQUIVO_CLIENTES, index=False)
+
+    (tmp_path / PASTA_COMPRAS).mkdir()
+    pd.DataFrame({COLUNA_CLIENTE: [0], COLUNA_DATA: [str(REFERENCIA.date())], COLUNA_VALOR: [10.0]}).to_csv(
+        tmp_path / PASTA_COMPRAS / 'compras_00000.csv', index=False)
+    return tmp_path
+
+def _lote(caminho, linhas):
+    pd.DataFrame(linhas, columns=[COLUNA_CLIENTE, COLUNA_DATA, COLUNA_VALOR]).to_csv(caminho, index=False)
+    return caminho
+
+def test_iniciar_deixa_a_atribuicao_estavel(pasta):
+    modelos, estado = clusterizacao.iniciar(pasta)
+
+    assert clusterizacao.carregar_modelo(pasta)[1] == REFERENCIA
+    rotulos = estado['cluster'].astype(str).copy()
+    clusterizacao.reatribuir(estado, modelos, REFERENCIA)
+    assert (estado['cluster'].astype(str) == rotulos).all()
+    clusters = pd.read_csv(pasta / ARQUIVO_CLUSTERS)
+    assert clusters['Qtd'].sum() == len(estado)
+
+def test_iniciar_sem_compras_nem_data(pasta):
+    (pasta / PASTA_COMPRAS / 'compras_00000.csv').unlink()
+    with pytest.raises(ValueError):
+        clusterizacao.iniciar(pasta)
+
+def test_atualizar_soma_o_lote_e_move_os_centroides(pasta):
+    clusterizacao.iniciar(pasta)
+    antes = clusterizacao.carregar_estado(pasta)
+    modelos_antes, _ = clusterizacao.carregar_modelo(pasta)
+    lote = _lote(pasta / 'lote.csv', [
+        (0, '2024-07-05', 100.0),
+        (0, '2024-07-03', 50.0),
+        (200, '2024-07-02', 30_000.0),
+        (9999, '2024-07-04', 80.0),
+    ])
+
+    dados_rfm = clusterizacao.atualizar([lote], pasta)
+
+    estado = clusterizacao.carregar_estado(pasta)
+    modelos, referencia = clusterizacao.carregar_modelo(pasta)
+    assert referencia == pd.Timestamp('2024-07-05')
+    assert len(estado) == len(antes) + 1
+    assert estado.loc[0, 'frequency'] == antes.loc[0, 'frequency'] + 2
+    assert estado.loc[0, 'monetary'] == pytest.approx(antes.loc[0, 'monetary'] + 150.0)
+    assert estado.loc[0, 'ultima_compra'] == pd.Timestamp('2024-07-05')
+    assert estado.loc[200, 'ultima_compra'] == pd.Timestamp('2024-07-02')
+    # Cliente novo sem tipo conhecido: fica no estado, mas fora dos clusters
+    assert pd.isna(estado.loc[9999, 'tipo']) and pd.isna(estado.loc[9999, 'cluster'])
+    assert dados_rfm.loc[9999, 'recency'] == 1
+
+    # Mini-batch: cada cliente tocado (com tipo) soma 1 à contagem do seu tipo
+    assert modelos['Pessoa'].contagens.sum() == modelos_antes['Pessoa'].contagens.sum() + 1
+    assert modelos['Empresa'].contagens.sum() == modelos_antes['Empresa'].contagens.sum() + 1
+    clusters = pd.read_csv(pasta / ARQUIVO_CLUSTERS)
+    assert clusters['Qtd'].sum() == len(estado) - 1
+
+def test_atualizar_publica_a_pertenca_no_cliente_csv(pasta):
+    clusterizacao.iniciar(pasta)
+    lote = _lote(pasta / 'lote.csv', [(c, '2024-07-05', 5_000.0) for c in range(60, 120)])
+    clusterizacao.atualizar([lote], pasta)
+
+    estado = clusterizacao.carregar_estado(pasta)
+    clientes = pd.read_csv(pasta / ARQUIVO_CLIENTES).set_index(COLUNA_CLIENTE)
+    assert clientes[COLUNA_CLUSTER].to_dict() == estado['cluster'].astype(str).to_dict()
+    assert clientes.loc[60, 'recency'] == 0
+    # O cubo lê a pertença do cliente.csv: o mapa dele é o mesmo do estado
+    mapa = rfm.ler_mapa_clusters(pasta / ARQUIVO_CLIENTES)
+    assert (mapa.astype(str) == estado['cluster'].astype(str).reindex(mapa.index)).all()
+    # ... e os quantis acompanham o cluster.csv regravado
+    tabela = dados.ler_quantis(pasta).set_index(COLUNA_CLUSTER)
+    assert set(tabela.index) == set(estado['cluster'].dropna().astype(str))
+
+def test_atualizar_usa_o_tipo_do_cadastro(pasta):
+    clusterizacao.iniciar(pasta)
+    pd.DataFrame({COLUNA_CLIENTE: [9998, 9999], 'tipo': ['Empresa', 'Empresa']}).to_csv(
+        pasta / 'cadastro.csv', index=False)
+    tipos = clusterizacao.ler_tipos(pasta / 'cadastro.csv')
+    lote = _lote(pasta / 'lote.csv', [(9999, '2024-07-04', 90_000.0), (9997, '2024-07-04', 80.0)])
+
+    clusterizacao.atualizar([lote], pasta, tipos=tipos)
+    estado = clusterizacao.carregar_estado(pasta)
+    assert estado.loc[9999, 'tipo'] == 'Empresa'
+    assert estado.loc[9999, 'cluster'].startswith('Empresa')
+    assert pd.isna(estado.loc[9997, 'cluster'])
+
+    # O tipo que chega depois tira o cliente do limbo
+    pd.DataFrame({COLUNA_CLIENTE: [9997], 'tipo': ['Pessoa']}).to_csv(pasta / 'cadastro.csv', index=False)
+    clusterizacao.atualizar([_lote(pasta / 'lote2.csv', [(1, '2024-07-06', 10.0)])], pasta,
+                            tipos=clusterizacao.ler_tipos(pasta / 'cadastro.csv'))
+    assert clusterizacao.carregar_estado(pasta).loc[9997, 'cluster'].startswith('Pessoa')
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from predictfy import cubo
+from predictfy.config import COLUNA_CLIENTE, COLUNA_CLUSTER, COLUNA_DATA, COLUNA_VALOR
+
+CLUSTERS = ['Pessoa Fiel', 'Pessoa Nova', 'Empresa Grande']
+
+@pytest.fixture
+def compras_clusters():
+    rng = np.random.default_rng(5)
+    clientes = np.arange(300)
+    mapa = pd.Series(pd.Categorical(rng.choice(CLUSTERS, len(clientes))), index=clientes)
+    n = 3000
+    compras = pd.DataFrame({
+        COLUNA_CLIENTE: rng.choice(clientes, n),
+        COLUNA_DATA: (pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 120, n), unit='D')),
+        COLUNA_VALOR: rng.gamma(2.0, 100.0, n).round(2),
+    })
+    return compras, mapa
+
+def _cubo(tmp_path, compras, mapa, nome='compras.csv'):
+    caminho = tmp_path / nome
+    compras.to_csv(caminho, index=False, date_format='%Y-%m-%d')
+    return cubo.agregar_arquivo(caminho, mapa, tamanho_bloco=500)
+
+def _fatia_exata(compras, mapa, inicio, fim):
+    periodo = compras[compras[COLUNA_DATA].between(pd.Timestamp(inicio), pd.Timestamp(fim))]
+    periodo = periodo.assign(cluster=periodo[COLUNA_CLIENTE].map(mapa).astype(str))
+    por_cliente = periodo.groupby(['cluster', COLUNA_CLIENTE]).agg(
+        ultima=(COLUNA_DATA, 'max'), pedidos=(COLUNA_VALOR, 'size'), gasto=(COLUNA_VALOR, 'sum'))
+    por_cliente['recencia'] = (pd.Timestamp(fim) - por_cliente['ultima']).dt.days
+    grupos = por_cliente.groupby(level='cluster')
+    return pd.DataFrame({
+        'quantidade': grupos.size(),
+        'recencia_media': grupos['recencia'].mean(),
+        'frequencia_media': grupos['pedidos'].mean(),
+        'gasto_medio_total': grupos['gasto'].mean(),
+    })
+
+@pytest.mark.parametrize('inicio, fim', [('2024-01-01', '2024-04-29'), ('2024-02-10', '2024-03-10')])
+def test_fatia_proxima_do_calculo_exato(tmp_path, compras_clusters, inicio, fim):
+    compras, mapa = compras_clusters
+    fatia = cubo.IndiceCubo(_cubo(tmp_path, compras, mapa)).fatia(inicio, fim).set_index('cluster')
+    exata = _fatia_exata(compras, mapa, inicio, fim)
+
+    assert sorted(fatia.index) == sorted(exata.index)
+    exata = exata.loc[fatia.index]
+    # Clientes distintos vêm do HyperLogLog: ~3% de erro
+    for coluna in ('quantidade', 'frequencia_media', 'gasto_medio_total'):
+        assert fatia[coluna].to_numpy() == pytest.approx(exata[coluna].to_numpy(), rel=0.05)
+    # A recência sai da área sob a curva de clientes: erro medido em relação à duração do período
+    duracao = (pd.Timestamp(fim) - pd.Timestamp(inicio)).days
+    assert fatia['recencia_media'].to_numpy() == pytest.approx(exata['recencia_media'].to_numpy(), abs=0.02 * duracao)
+    assert set(fatia['tipo'].astype(str)) == {'Pessoa', 'Empresa'}
+
+def test_fatia_limita_ao_periodo_do_cubo(tmp_path, compras_clusters):
+    compras, mapa = compras_clusters
+    indice = cubo.IndiceCubo(_cubo(tmp_path, compras, mapa))
+    primeira, ultima = indice.periodo
+
+    pd.testing.assert_frame_equal(indice.fatia('2023-01-01', '2030-01-01'), indice.fatia())
+    pd.testing.assert_frame_equal(indice.fatia(primeira, ultima), indice.fatia())
+    assert indice.fatia('2030-01-01', '2030-02-01').empty
+    assert indice.fatia('2023-01-01', '2023-02-01').empty
+    assert indice.fatia(ultima, primeira).empty
+
+def test_combinar_arquivos_igual_a_um_arquivo_so(tmp_path, compras_clusters):
+    compras, mapa = compras_clusters
+    inteiro = _cubo(tmp_path, compras, mapa)
+    combinado = cubo.combinar(_cubo(tmp_path, compras.iloc[::2], mapa, 'a.csv'),
+                              _cubo(tmp_path, compras.iloc[1::2], mapa, 'b.csv'))
+
+    pd.testing.assert_frame_equal(combinado, inteiro, check_exact=False)
@@ -0,0 +1,58 @@
+import threading
+
+import pandas as pd
+import pytest
+
+from predictfy.datasets import RegistroDatasets, linhas_dataset, memoria_dataset
+
+def test_carrega_so_no_primeiro_acesso():
+    cargas = []
+    registro = RegistroDatasets()
+    registro.registrar('clientes', lambda: cargas.append(1) or pd.DataFrame({'x': range(5)}))
+
+    assert not registro.carregado('clientes') and cargas == []
+    assert len(registro.obter('clientes')) == len(registro.obter('clientes')) == 5
+    assert cargas == [1]
+    with pytest.raises(KeyError):
+        registro.obter('inexistente')
+
+def test_requer_carrega_em_paralelo():
+    # As duas cargas só terminam se rodarem ao mesmo tempo
+    barreira = threading.Barrier(2, timeout=5)
+    preparadas = []
+    registro = RegistroDatasets(preparar_thread=lambda: preparadas.append(threading.current_thread().name))
+
+    def carregar(valor):
+        def carga():
+            barreira.wait()
+            return pd.DataFrame({'x': [valor]})
+        return carga
+
+    registro.registrar('a', carregar(1))
+    registro.registrar('b', carregar(2))
+    a, b = registro.requer('a', 'b')
+
+    assert (a['x'][0], b['x'][0]) == (1, 2)
+    assert len(preparadas) == 2 and all(n.startswith('predictfy-carga') for n in preparadas)
+
+def test_falha_fica_no_relatorio():
+    registro = RegistroDatasets()
+    registro.registrar('bom', lambda: pd.DataFrame({'x': range(3)}))
+    registro.registrar('ruim', lambda: 1 / 0)
+    registro.registrar('parado', lambda: None)
+
+    bom, ruim = registro.requer('bom', 'ruim')
+    relatorio = registro.relatorio().set_index('dataset')
+
+    assert len(bom) == 3 and ruim is None
+    assert list(registro.carregados()) == ['bom']
+    assert relatorio.loc['bom', 'carregado'] and relatorio.loc['bom', 'linhas'] == 3
+    assert not relatorio.loc['ruim', 'carregado'] and 'ZeroDivisionError' in relatorio.loc['ruim', 'erro']
+    assert not relatorio.loc['parado', 'carregado']
+
+def test_memoria_e_linhas_de_dicionarios():
+    df = pd.DataFrame({'s': ['abc'] * 100})
+    assert memoria_dataset(df) == df.memory_usage(deep=True).sum()
+    assert memoria_dataset({'a': df, 'b': df}) == 2 * memoria_dataset(df)
+    assert linhas_dataset({'a': df, 'kpis': {'x': 1}}) == 100
+    assert memoria_dataset(None) == 0
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from predictfy.config import COLUNA_CLIENTE, COLUNA_CLUSTER
+from predictfy.drilldown import IndiceClusters
+
+@pytest.fixture
+def clientes():
+    rng = np.random.default_rng(9)
+    n = 1_000
+    df = pd.DataFrame({
+        COLUNA_CLIENTE: rng.permutation(n),
+        COLUNA_CLUSTER: pd.Categorical(rng.choice(['Pessoa A', 'Pessoa B', 'Empresa A'], n)),
+        'monetary': rng.gamma(2.0, 300.0, n).round(2),
+    })
+    df.loc[[3, 50], COLUNA_CLUSTER] = np.nan
+    return df
+
+def test_totais_e_paginas(clientes):
+    indice = IndiceClusters(clientes)
+    for cluster, grupo in clientes.groupby(COLUNA_CLUSTER, observed=True):
+        assert indice.total(cluster) == len(grupo)
+        assert indice.paginas(cluster, tamanho=50) == -(-len(grupo) // 50)
+
+def test_paginas_percorrem_o_cluster_na_ordem_original(clientes):
+    indice = IndiceClusters(clientes)
+    grupo = clientes[clientes[COLUNA_CLUSTER] == 'Pessoa B']
+    paginas = [indice.pagina('Pessoa B', numero, tamanho=40) for numero in range(indice.paginas('Pessoa B', 40))]
+    pd.testing.assert_frame_equal(pd.concat(paginas), grupo)
+
+def test_ordenacao_e_projecao(clientes):
+    indice = IndiceClusters(clientes)
+    grupo = clientes[clientes[COLUNA_CLUSTER] == 'Empresa A'].sort_values('monetary', kind='stable')
+
+    primeira = indice.pagina('Empresa A', 0, tamanho=25, ordenar_por='monetary', colunas=['monetary'])
+    assert list(primeira.columns) == ['monetary']
+    assert primeira['monetary'].tolist() == grupo['monetary'].head(25).tolist()
+
+    segunda_desc = indice.pagina('Empresa A', 1, tamanho=25, ordenar_por='monetary', decrescente=True)
+    assert segunda_desc['monetary'].tolist() == grupo['monetary'].iloc[::-1].iloc[25:50].tolist()
+
+def test_ordenar_por_categoria(clientes):
+    clientes['faixa'] = pd.Categorical(np.where(clientes['monetary'] > 500, 'alta', 'baixa'),
+                                       categories=['baixa', 'alta'])
+    pagina = IndiceClusters(clientes).pagina('Pessoa A', 0, tamanho=10_000, ordenar_por='faixa')
+    codigos = pagina['faixa'].cat.codes.to_numpy()
+    assert (np.diff(codigos) >= 0).all()
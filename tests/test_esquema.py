@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+from predictfy import esquema
+from predictfy.config import ARQUIVO_RECOMENDACOES
+
+def test_tipo_do_cluster_por_categoria():
+    tipos = esquema.tipo_do_cluster(['Pessoa - A', 'Empresa - VIP', None, 'Pessoa - A'])
+    assert list(tipos.categories) == list(esquema.TIPOS)
+    assert tipos.astype(object).tolist()[:2] == ['Pessoa', 'Empresa']
+    assert pd.isna(tipos[2]) and tipos[3] == 'Pessoa'
+
+def test_compactar():
+    n = 100
+    df = pd.DataFrame({
+        'fk_contact': np.arange(n, dtype='int64'),
+        'grande': np.arange(n, dtype='int64') * 100_000,
+        'monetary': np.linspace(0, 1, n),
+        'score': np.linspace(0, 1, n),
+        'cluster': ['Pessoa - A', 'Empresa - B'] * (n // 2),
+        'nome': [f'cliente {i}' for i in range(n)],
+    })
+    esquema.compactar(df, float32=('score',))
+
+    assert df['fk_contact'].dtype == 'int8'
+    assert df['grande'].dtype == 'int32'
+    assert df['monetary'].dtype == 'float64'
+    assert df['score'].dtype == 'float32'
+    assert isinstance(df['cluster'].dtype, pd.CategoricalDtype)
+    # Alta cardinalidade continua string
+    assert df['nome'].dtype == object
+
+def test_preparador_tem_nome_por_arquivo():
+    preparar = esquema.preparador(ARQUIVO_RECOMENDACOES)
+    assert ARQUIVO_RECOMENDACOES in preparar.__qualname__
+    df = preparar(pd.DataFrame({'score': [0.5, 0.25]}))
+    assert df['score'].dtype == 'float32'
+
+def test_relatorio_mostra_a_economia():
+    n = 10_000
+    bruto = pd.DataFrame({'cluster': ['Pessoa - Potencial'] * n, 'recency': np.arange(n, dtype='int64')})
+    compacto = esquema.compactar(bruto.copy())
+    relatorio = esquema.relatorio_memoria({'compacto': compacto, 'ausente': None}).set_index('tabela')
+
+    assert list(relatorio.index) == ['compacto']
+    assert relatorio.loc['compacto', 'linhas'] == n
+    assert relatorio.loc['compacto', 'economia_pct'] > 50
+    assert relatorio.loc['compacto', 'sem_plano_mb'] * 1024**2 >= bruto.memory_usage(deep=True).sum() * 0.9
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from predictfy import filtros, snapshot
+from predictfy.esquema import tipo_do_cluster
+
+CLUSTERS = ['Pessoa - Fiéis', 'Pessoa - Dormindo', 'Empresa - VIP', 'Empresa - Pequenas']
+
+@pytest.fixture
+def clientes():
+    rng = np.random.default_rng(8)
+    n = 2000
+    return pd.DataFrame({
+        'cluster': rng.choice(CLUSTERS, n),
+        'recency': rng.integers(0, 1200, n),
+        'frequency': rng.integers(1, 30, n),
+        'monetary': rng.gamma(2.0, 500.0, n),
+    })
+
+@pytest.fixture
+def snap(clientes):
+    grupos = clientes.groupby('cluster')
+    df = pd.DataFrame({
+        'quantidade': grupos.size(),
+        'recencia_media': grupos['recency'].mean(),
+        'frequencia_media': grupos['frequency'].mean(),
+        'gasto_medio_total': grupos['monetary'].mean(),
+    }).reset_index()
+    df['tipo'] = tipo_do_cluster(df['cluster']).astype(str)
+    return snapshot.calcular_snapshot(df, 'v1')
+
+def _faixa(recencia):
+    return np.asarray(filtros.FAIXAS_RECENCIA)[np.searchsorted(filtros.LIMITES_RECENCIA, recencia)]
+
+@pytest.mark.parametrize('tipo, clusters, faixas', [
+    (None, None, None),
+    ('PF', None, None),
+    ('PJ', ['Empresa - VIP'], None),
+    (None, None, ['até 90 dias', '+950 dias']),
+    ('PF', ['Pessoa - Dormindo'], ['181–365 dias']),
+])
+def test_filtrar_igual_a_filtrar_os_clientes(clientes, tipo, clusters, faixas):
+    resultado = filtros.IndiceFiltros(clientes).filtrar(tipo, clusters, faixas)
+
+    mascara = np.ones(len(clientes), dtype=bool)
+    if tipo:
+        mascara &= clientes['cluster'].str.startswith(filtros.TIPOS_FILTRO[tipo]).to_numpy()
+    if clusters:
+        mascara &= clientes['cluster'].isin(clusters).to_numpy()
+    if faixas:
+        mascara &= np.isin(_faixa(clientes['recency']), faixas)
+    esperado = clientes[mascara]
+
+    assert resultado['clientes'] == len(esperado)
+    assert resultado['gasto_total'] == pytest.approx(esperado['monetary'].sum())
+    assert resultado['recencia_media'] == pytest.approx(esperado['recency'].mean())
+    por_cluster = resultado['por_cluster'].set_index('cluster')
+    assert por_cluster['clientes'].to_dict() == esperado.groupby('cluster').size().to_dict()
+
+def test_limites_das_faixas_fechados_a_direita():
+    df = pd.DataFrame({'cluster': 'Pessoa - Fiéis', 'recency': [90, 91, 950, 951],
+                       'frequency': 1, 'monetary': 1.0})
+    indice = filtros.IndiceFiltros(df)
+    assert indice.contagem.tolist() == [[1, 1, 0, 1, 1]]
+    assert indice.filtrar(faixas=['+950 dias'])['clientes'] == 1
+
+def test_filtro_sem_clientes(clientes):
+    resultado = filtros.IndiceFiltros(clientes).filtrar('PJ', ['Pessoa - Fiéis'])
+    assert resultado['clientes'] == 0
+    assert resultado['gasto_medio'] == 0.0
+    assert resultado['por_cluster'].empty
+
+def test_clusters_do_snapshot(snap):
+    assert sorted(filtros.clusters_do_snapshot(snap)) == sorted(CLUSTERS)
+    assert sorted(filtros.clusters_do_snapshot(snap, 'PJ')) == ['Empresa - Pequenas', 'Empresa - VIP']
+
+def test_snapshot_filtrado_por_tipo_e_cluster(snap):
+    filtrado = filtros.snapshot_filtrado(snap, 'PF', ['Pessoa - Dormindo'])
+
+    assert filtrado['df_empresa'].empty
+    assert filtrado['df_pessoa']['cluster'].tolist() == ['Pessoa - Dormindo']
+    quantidade = snap['df_pessoa'].set_index('cluster').loc['Pessoa - Dormindo', 'quantidade']
+    assert filtrado['kpis']['total_clientes'] == quantidade
+    assert filtrado['versao_dados'].startswith('v1-f')
+    assert filtrado['versao_dados'] != filtros.snapshot_filtrado(snap, 'PF')['versao_dados']
+    # A ordem dos clusters escolhidos não muda a versão (e o cache das figuras)
+    dois = ['Pessoa - Dormindo', 'Pessoa - Fiéis']
+    assert (filtros.snapshot_filtrado(snap, None, dois)['versao_dados']
+            == filtros.snapshot_filtrado(snap, None, dois[::-1])['versao_dados'])
+
+def test_snapshot_filtrado_por_faixa(snap, clientes):
+    indice = filtros.IndiceFiltros(clientes)
+    faixas = ['até 90 dias']
+    filtrado = filtros.snapshot_filtrado(snap, None, None, faixas, indice)
+
+    recentes = clientes[clientes['recency'] <= 90]
+    assert filtrado['kpis']['total_clientes'] == len(recentes)
+    assert filtrado['kpis']['ticket_medio_geral'] == pytest.approx(recentes['monetary'].mean())
+    assert not filtrado['tem_quantis']
+    assert 'periodo' not in filtrado
+
+def test_snapshot_filtrado_mantem_o_periodo(snap):
+    snap = {**snap, 'periodo': ('2024-01-01', '2024-03-31')}
+    assert filtros.snapshot_filtrado(snap, 'PJ')['periodo'] == snap['periodo']
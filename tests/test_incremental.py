@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from predictfy import clusterizacao, incremental, rfm
+from predictfy.config import ARQUIVO_CLIENTES, COLUNA_CLIENTE, COLUNA_DATA, COLUNA_VALOR
+
+COLUNAS = ['Qtd'] + [f'{m}_{a}' for m in incremental.METRICAS_ESTADO for a in ('sum', 'min', 'max', 'min_qtd')]
+
+@pytest.fixture
+def estado_clientes():
+    rng = np.random.default_rng(9)
+    n = 200
+    estado = pd.DataFrame({
+        'ultima_compra': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 90, n), unit='D'),
+        'frequency': rng.integers(1, 4, n),
+        'monetary': rng.gamma(2.0, 100.0, n).round(2),
+        'tipo': pd.Categorical(['Pessoa'] * n, categories=['Pessoa', 'Empresa']),
+        'cluster': pd.Categorical(rng.choice(['Pessoa A', 'Pessoa B'], n)),
+    }, index=pd.Index(np.arange(n), name=COLUNA_CLIENTE))
+    # Cliente 0 é o único com o menor gasto do seu cluster
+    estado.loc[0, 'monetary'] = 0.01
+    return estado
+
+def _lote(linhas):
+    lote = pd.DataFrame(linhas, columns=[COLUNA_CLIENTE, 'ultima_compra', 'frequency', 'monetary'])
+    lote['ultima_compra'] = pd.to_datetime(lote['ultima_compra'])
+    return lote.set_index(COLUNA_CLIENTE)
+
+def _comparar(agregados, esperado):
+    pd.testing.assert_frame_equal(
+        agregados[COLUNAS].sort_index(), esperado[COLUNAS].sort_index(), check_dtype=False, check_exact=False)
+
+def test_delta_igual_ao_recalculo_completo(estado_clientes):
+    agregados = incremental.agregar(estado_clientes)
+    com_frequencia_1 = estado_clientes.index[(estado_clientes['frequency'] == 1) & (estado_clientes.index > 5)][:3]
+    lote = _lote([
+        (0, '2024-04-10', 1, 50.0),  # último detentor do mínimo de gasto: força a varredura
+        *[(c, '2024-04-05', 2, 10.0) for c in com_frequencia_1],  # detentores de um mínimo repetido
+        (5, '2023-12-01', 1, 1.0),  # compra antiga: a última compra não muda
+    ])
+
+    agregados, estado = incremental.aplicar_delta(agregados, estado_clientes.copy(), lote)
+
+    _comparar(agregados, incremental.agregar(estado))
+    assert estado.loc[0, 'monetary'] == pytest.approx(50.01)
+    assert estado.loc[5, 'ultima_compra'] == estado_clientes.loc[5, 'ultima_compra']
+
+def test_deltas_seguidos(estado_clientes):
+    rng = np.random.default_rng(1)
+    agregados, estado = incremental.agregar(estado_clientes), estado_clientes.copy()
+    for dia in range(5):
+        clientes = rng.choice(estado.index, 30, replace=False)
+        lote = _lote([(c, pd.Timestamp('2024-04-01') + pd.Timedelta(days=dia), 1, 20.0) for c in clientes])
+        agregados, estado = incremental.aplicar_delta(agregados, estado, lote)
+    _comparar(agregados, incremental.agregar(estado))
+
+def _atribuir_por_tipo(clientes):
+    return np.where(clientes['tipo'].to_numpy() == 'Pessoa', 'Pessoa B', None)
+
+def test_clientes_novos(estado_clientes):
+    agregados = incremental.agregar(estado_clientes)
+    lote = _lote([(1000, '2024-04-01', 1, 5.0), (1001, '2024-04-02', 2, 7.0)])
+    tipos = pd.Series(pd.Categorical(['Pessoa'], categories=['Pessoa', 'Empresa']), index=[1000])
+
+    sem_modelo, estado = incremental.aplicar_delta(agregados, estado_clientes.copy(), lote, tipos=tipos)
+    assert len(estado) == len(estado_clientes) + 2
+    _comparar(sem_modelo, agregados)
+
+    com_modelo, estado = incremental.aplicar_delta(
+        agregados, estado_clientes.copy(), lote, atribuir_novos=_atribuir_por_tipo, tipos=tipos)
+    # Só o cliente de tipo conhecido entra nos agregados
+    assert com_modelo.loc['Pessoa B', 'Qtd'] == agregados.loc['Pessoa B', 'Qtd'] + 1
+    assert pd.isna(estado.loc[1001, 'tipo']) and pd.isna(estado.loc[1001, 'cluster'])
+    _comparar(com_modelo, incremental.agregar(estado))
+
+    # O tipo do 1001 chega num delta seguinte: entra com as compras acumuladas
+    tipos = pd.Series(pd.Categorical(['Pessoa'], categories=['Pessoa', 'Empresa']), index=[1001])
+    com_modelo, estado = incremental.aplicar_delta(
+        com_modelo, estado, _lote([(1001, '2024-04-03', 1, 3.0)]), atribuir_novos=_atribuir_por_tipo, tipos=tipos)
+    assert estado.loc[1001, 'frequency'] == 3
+    _comparar(com_modelo, incremental.agregar(estado))
+
+def test_combinar_particoes(estado_clientes):
+    partes = [estado_clientes.iloc[:70], estado_clientes.iloc[70:]]
+    combinado = incremental.combinar(*(incremental.agregar(p) for p in partes))
+    _comparar(combinado, incremental.agregar(estado_clientes))
+
+def test_renderizar_recencia(estado_clientes):
+    agregados = incremental.agregar(estado_clientes)
+    clusters = incremental.renderizar(agregados, '2024-04-30').set_index('cluster')
+    recencia = (pd.Timestamp('2024-04-30') - estado_clientes['ultima_compra']).dt.days
+    por_cluster = recencia.groupby(estado_clientes['cluster'].astype(str))
+    assert clusters['recency_mean'].to_numpy() == pytest.approx(por_cluster.mean().loc[clusters.index].to_numpy())
+    assert (clusters['recency_min'] == por_cluster.min().loc[clusters.index]).all()
+
+def test_cli_tem_estado_proprio(tmp_path, estado_clientes):
+    clientes = rfm.calcular_rfm(estado_clientes, '2024-04-30').assign(
+        cluster=estado_clientes['cluster']).reset_index()
+    clientes.to_csv(tmp_path / ARQUIVO_CLIENTES, index=False)
+    clusterizacao.iniciar(tmp_path, '2024-04-30')
+    estado_modelo = (tmp_path / clusterizacao.PASTA_MODELO / clusterizacao.ARQUIVO_ESTADO).read_bytes()
+
+    incremental.main(['--pasta', str(tmp_path), 'iniciar', '--data-referencia', '2024-04-30'])
+    lote = tmp_path / 'lote.csv'
+    pd.DataFrame({COLUNA_CLIENTE: [1], COLUNA_DATA: ['2024-05-01'], COLUNA_VALOR: [9.0]}).to_csv(lote, index=False)
+    incremental.main(['--pasta', str(tmp_path), 'aplicar', str(lote)])
+
+    assert (tmp_path / clusterizacao.PASTA_MODELO / clusterizacao.ARQUIVO_ESTADO).read_bytes() == estado_modelo
+    estado = clusterizacao.carregar_estado(tmp_path, incremental.ARQUIVO_ESTADO)
+    assert estado.loc[1, 'frequency'] == estado_clientes.loc[1, 'frequency'] + 1
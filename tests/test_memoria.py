@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+from predictfy import memoria, telemetria
+
+def test_objetos_compartilhados_contados_uma_vez():
+    tabela = pd.DataFrame({'x': np.arange(10_000, dtype='int64')})
+    indice = type('Indice', (), {})()
+    indice.tabela = tabela
+
+    medida = memoria.medir({'clientes': tabela, 'indice': indice}, {'copia': tabela.copy()})
+    bytes_por_item = medida.set_index('item')['bytes']
+
+    assert bytes_por_item['clientes'] >= 80_000
+    assert bytes_por_item['indice'] < 80_000
+    assert bytes_por_item['copia'] >= 80_000
+
+def test_resumo_multiplica_as_copias_pelas_sessoes():
+    medida = memoria.medir({'a': np.zeros(1_000)}, {'b': np.zeros(500)})
+    totais = memoria.resumo(medida, sessoes=3)
+    assert totais['estimado_bytes'] == totais['compartilhado_bytes'] + 3 * totais['por_sessao_bytes']
+
+def test_sessoes_ativas_pela_janela(monkeypatch):
+    monkeypatch.setattr(memoria, '_sessoes', {})
+    assert memoria.sessoes_ativas() == 1
+    relogio = iter([100.0, 100.0, 150.0, 200.0, 420.0])
+    monkeypatch.setattr(memoria.time, 'monotonic', lambda: next(relogio))
+    memoria.marcar_sessao('a')
+    memoria.marcar_sessao('b')
+    memoria.marcar_sessao('a')
+    assert memoria.sessoes_ativas(janela=300) == 2
+    assert memoria.sessoes_ativas(janela=300) == 1
+
+def test_registrar_metricas():
+    metricas = telemetria.MetricasSecoes()
+    memoria.registrar_metricas(memoria.medir({'a': np.zeros(1_000)}, {}), 2, metricas)
+    texto = metricas.texto_prometheus()
+    assert 'predictfy_memoria_bytes{item="compartilhado:a"}' in texto
+    assert 'predictfy_sessoes_ativas 2' in texto
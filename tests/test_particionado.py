@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from predictfy import particionado, quantis, rfm
+from predictfy.config import COLUNA_CLIENTE, COLUNA_CLUSTER
+
+@pytest.fixture
+def caminho(tmp_path):
+    rng = np.random.default_rng(5)
+    n = 2_000
+    clientes = pd.DataFrame({
+        COLUNA_CLIENTE: np.arange(n),
+        COLUNA_CLUSTER: rng.choice(['Pessoa A', 'Pessoa B', 'Empresa A'], n),
+        'recency': rng.integers(0, 400, n),
+        'frequency': rng.integers(1, 20, n),
+        'monetary': rng.gamma(2.0, 300.0, n).round(2),
+    })
+    caminho = tmp_path / 'cliente.csv'
+    clientes.to_csv(caminho, index=False)
+    return caminho
+
+def test_faixas_cobrem_o_arquivo_em_linhas_inteiras(caminho):
+    lista = particionado.faixas(caminho, 7)
+    conteudo = caminho.read_bytes()
+    inicio_dados = conteudo.index(b'\n') + 1
+
+    assert lista[0][0] == inicio_dados and lista[-1][1] == len(conteudo)
+    assert all(a == b for (_, a), (b, _) in zip(lista, lista[1:]))
+    assert all(conteudo[a - 1:a] == b'\n' for a, _ in lista)
+
+def test_faixas_somam_o_arquivo_inteiro(caminho):
+    parciais, esbocos = [], {}
+    for a, b in particionado.faixas(caminho, 5):
+        parcial, e = particionado.agregar_faixa(caminho, a, b, tamanho_bloco=97)
+        parciais.append(parcial)
+        esbocos = quantis.combinar_esbocos(esbocos, e)
+
+    pd.testing.assert_frame_equal(
+        rfm.finalizar_clusters(rfm.combinar_parciais(parciais)), rfm.agregar_clientes(caminho))
+    _, inteiro = quantis.agregar_clientes(caminho)
+    assert quantis.tabela_quantis(esbocos).equals(quantis.tabela_quantis(inteiro))
+
+def test_agregar_clientes_em_processos(caminho, monkeypatch):
+    monkeypatch.setattr(particionado, 'TAMANHO_MINIMO_PARTICAO', 1)
+    clusters, esbocos = particionado.agregar_clientes(caminho, processos=3)
+
+    pd.testing.assert_frame_equal(clusters, rfm.agregar_clientes(caminho))
+    assert sum(e['monetary'].n for e in esbocos.values()) == 2_000
@@ -0,0 +1,80 @@
+import math
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from predictfy import quantis, rfm
+from predictfy.config import COLUNA_CLUSTER
+
+@pytest.fixture
+def valores():
+    return np.random.default_rng(3).lognormal(5.0, 1.5, 20_000)
+
+@pytest.mark.parametrize('precisao', [0.01, 0.05])
+def test_quantis_com_erro_relativo_limitado(valores, precisao):
+    esboco = quantis.EsbocoQuantis(precisao).adicionar(valores)
+    qs = (0.1, 0.5, 0.9, 0.99)
+    exatos = np.quantile(valores, qs, method='lower')
+    for aproximado, exato in zip(esboco.quantis(qs), exatos):
+        assert abs(aproximado - exato) <= precisao * exato * (1 + 1e-9)
+
+def test_combinar_igual_a_um_esboco_so(valores):
+    inteiro = quantis.EsbocoQuantis().adicionar(valores)
+    partes = [quantis.EsbocoQuantis().adicionar(p) for p in np.array_split(valores, 5)]
+    combinado = partes[0]
+    for parte in partes[1:]:
+        combinado.combinar(parte)
+
+    assert combinado.n == inteiro.n
+    assert (combinado.minimo, combinado.maximo) == (inteiro.minimo, inteiro.maximo)
+    assert combinado.quantis() == inteiro.quantis()
+
+def test_combinar_precisoes_diferentes():
+    with pytest.raises(ValueError):
+        quantis.EsbocoQuantis(0.01).combinar(quantis.EsbocoQuantis(0.02))
+
+def test_zeros_vazio_e_nan():
+    esboco = quantis.EsbocoQuantis().adicionar([0, 0, 0, np.nan, 10])
+    assert esboco.n == 4 and esboco.zeros == 3
+    assert esboco.quantis((0.5, 1.0)) == [0.0, 10.0]
+    assert all(math.isnan(v) for v in quantis.EsbocoQuantis().quantis())
+
+def test_ida_e_volta_em_dict(valores):
+    esboco = quantis.EsbocoQuantis().adicionar(valores)
+    copia = quantis.EsbocoQuantis.de_dict(esboco.para_dict())
+    assert copia.quantis() == esboco.quantis()
+
+def test_agregar_clientes_em_blocos(tmp_path):
+    rng = np.random.default_rng(11)
+    n = 500
+    clientes = pd.DataFrame({
+        COLUNA_CLUSTER: rng.choice(['Pessoa A', 'Pessoa B', 'Empresa A'], n),
+        'recency': rng.integers(0, 400, n),
+        'frequency': rng.integers(1, 20, n),
+        'monetary': rng.gamma(2.0, 300.0, n),
+    })
+    caminho = tmp_path / 'cliente.csv'
+    clientes.to_csv(caminho, index=False)
+
+    clusters, esbocos = quantis.agregar_clientes(caminho, tamanho_bloco=37)
+
+    pd.testing.assert_frame_equal(clusters, rfm.agregar_clientes(caminho))
+    tabela = quantis.tabela_quantis(esbocos).set_index(COLUNA_CLUSTER)
+    for cluster, grupo in clientes.groupby(COLUNA_CLUSTER):
+        assert esbocos[cluster]['monetary'].n == len(grupo)
+        exato = np.quantile(grupo['monetary'], 0.5, method='lower')
+        assert tabela.loc[cluster, 'monetary_p50'] == pytest.approx(exato, rel=quantis.PRECISAO)
+
+def test_esbocos_presos_ao_cluster_csv(tmp_path, valores):
+    esbocos = {'Pessoa A': {'monetary': quantis.EsbocoQuantis().adicionar(valores)}}
+    clusters = tmp_path / 'cluster.csv'
+    clusters.write_text('cluster,Qtd\nPessoa A,1\n')
+    quantis.salvar_esbocos(esbocos, tmp_path / 'cluster_quantis.json')
+    assert quantis.ler_esbocos(tmp_path / 'cluster_quantis.json')['Pessoa A']['monetary'].n == len(valores)
+
+    # Regravar o cluster.csv sem refazer os esboços os invalida
+    clusters.write_text('cluster,Qtd\nPessoa A,2\n')
+    os.utime(clusters, ns=(0, 0))
+    assert quantis.ler_esbocos(tmp_path / 'cluster_quantis.json') is None
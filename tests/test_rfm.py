@@ -0,0 +1,56 @@
+import pandas as pd
+import pytest
+
+from predictfy import rfm
+from predictfy.config import COLUNA_CLIENTE, COLUNA_CLUSTER, COLUNA_DATA, COLUNA_VALOR, COLUNAS_CLUSTER
+
+def _esperado(compras):
+    datas = pd.to_datetime(compras[COLUNA_DATA], errors='coerce')
+    grupos = compras.assign(data=datas).groupby(COLUNA_CLIENTE)
+    return pd.DataFrame({
+        'ultima_compra': grupos['data'].max(),
+        'frequency': grupos.size(),
+        'monetary': grupos[COLUNA_VALOR].sum(),
+    })
+
+@pytest.mark.parametrize('tamanho_bloco', [1, 7, 64, 10_000])
+def test_agregar_compras_igual_ao_groupby_completo(tmp_path, compras, tamanho_bloco):
+    metade = len(compras) // 2
+    caminhos = [tmp_path / 'a.csv', tmp_path / 'b.csv']
+    compras.iloc[:metade].to_csv(caminhos[0], index=False)
+    compras.iloc[metade:].to_csv(caminhos[1], index=False)
+
+    estado = rfm.agregar_compras(caminhos, tamanho_bloco=tamanho_bloco)
+
+    assert estado.index.name == COLUNA_CLIENTE
+    assert estado.index.is_unique
+    pd.testing.assert_frame_equal(estado.sort_index(), _esperado(compras), check_names=False)
+
+def test_agregar_compras_sem_arquivos():
+    with pytest.raises(ValueError):
+        rfm.agregar_compras([])
+
+def test_calcular_rfm_usa_a_compra_mais_recente():
+    estado = pd.DataFrame({
+        'ultima_compra': pd.to_datetime(['2024-01-10', '2024-01-01']),
+        'frequency': [3, 1],
+        'monetary': [30.0, 5.0],
+    }, index=[1, 2])
+    assert rfm.calcular_rfm(estado)['recency'].tolist() == [0, 9]
+    assert rfm.calcular_rfm(estado, '2024-01-20')['recency'].tolist() == [10, 19]
+
+def test_parciais_combinados_igual_ao_agregado_direto():
+    df = pd.DataFrame({
+        COLUNA_CLUSTER: ['a', 'b', 'a', 'c', 'b', 'a'],
+        'recency': [10, 20, 30, 40, 50, 60],
+        'frequency': [1, 2, 3, 4, 5, 6],
+        'monetary': [1.0, 2.0, 3.0, 4.0, 5.0, 6.0],
+    })
+    direto = rfm.finalizar_clusters(rfm.parcial_clusters(df))
+    em_blocos = rfm.finalizar_clusters(rfm.combinar_parciais(
+        [rfm.parcial_clusters(df.iloc[:2]), rfm.parcial_clusters(df.iloc[2:])]))
+
+    pd.testing.assert_frame_equal(direto, em_blocos, check_dtype=False)
+    assert list(direto.columns) == COLUNAS_CLUSTER
+    a = direto.set_index(COLUNA_CLUSTER).loc['a']
+    assert (a['Qtd'], a['recency_mean'], a['recency_min'], a['recency_max']) == (3, 100 / 3, 10, 60)
@@ -0,0 +1,85 @@
+import asyncio
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from predictfy import servico
+from predictfy.config import COLUNA_CLIENTE
+
+@pytest.fixture
+def recomendacoes():
+    return pd.DataFrame({
+        COLUNA_CLIENTE: np.repeat([7, 3, 500], [3, 1, 1]),
+        'destino': list('abcde'),
+        'ranking': [3, 1, 2, 1, 1],
+        'score': np.array([0.9056, 0.5, 0.25, 1.0, 0.1], dtype='float32'),
+    })
+
+def test_recomendacoes_na_ordem_do_ranking(recomendacoes):
+    s = servico.ServicoRecomendacoes(recomendacoes)
+    itens = json.loads(s.recomendacoes('7'))
+
+    assert [i['destino'] for i in itens] == ['b', 'c', 'a']
+    assert itens[0]['score'] == 0.5 and itens[2]['score'] == 0.9056
+
+def test_lote_igual_a_um_por_vez(recomendacoes):
+    s = servico.ServicoRecomendacoes(recomendacoes)
+    lote = json.loads(s.lote([7, '3', 42, 'x', 7]))
+
+    assert set(lote) == {'7', '3'}
+    assert lote['7'] == json.loads(s.recomendacoes(7))
+
+def test_lote_acima_do_limite(recomendacoes, monkeypatch):
+    monkeypatch.setattr(servico, 'MAX_LOTE', 2)
+    s = servico.ServicoRecomendacoes(recomendacoes)
+    with pytest.raises(ValueError, match='2'):
+        s.lote([7, 3, 500])
+
+    rota, status, corpo = servico.ServidorHTTP(s).rotear(
+        'POST', '/recomendacoes/lote', json.dumps({'clientes': [7, 3, 500]}).encode())
+    assert status == 413 and 'máximo é 2' in json.loads(corpo)['erro']
+
+def test_ausentes_nao_ocupam_o_cache(recomendacoes):
+    s = servico.ServicoRecomendacoes(recomendacoes, tamanho_cache=2)
+    s.recomendacoes(7)
+    s.recomendacoes(3)
+    for chave in range(1_000, 1_010):
+        assert s.recomendacoes(chave) is None
+    s.lote(list(range(2_000, 2_010)))
+
+    assert s.cache.estatisticas()['itens'] == 2
+    s.recomendacoes(7)
+    assert s.cache.acertos == 1
+
+def test_http_keep_alive(recomendacoes):
+    s = servico.ServicoRecomendacoes(recomendacoes)
+
+    async def conversar():
+        servidor = await asyncio.start_server(servico.ServidorHTTP(s).atender, '127.0.0.1', 0)
+        porta = servidor.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', porta)
+        respostas = []
+        corpo = json.dumps({'clientes': [3]}).encode()
+        for pedido in (
+            b'GET /recomendacoes/500 HTTP/1.1\r\n\r\n',
+            b'GET /recomendacoes/42 HTTP/1.1\r\n\r\n',
+            b'POST /recomendacoes/lote HTTP/1.1\r\nContent-Length: %d\r\n\r\n%s' % (len(corpo), corpo),
+        ):
+            writer.write(pedido)
+            status = (await reader.readline()).split()[1]
+            tamanho = 0
+            while (linha := await reader.readline()) != b'\r\n':
+                if linha.lower().startswith(b'content-length'):
+                    tamanho = int(linha.split(b':')[1])
+            respostas.append((int(status), json.loads(await reader.readexactly(tamanho))))
+        writer.close()
+        servidor.close()
+        await servidor.wait_closed()
+        return respostas
+
+    respostas = asyncio.run(conversar())
+    assert [status for status, _ in respostas] == [200, 404, 200]
+    assert respostas[0][1][0]['destino'] == 'e'
+    assert list(respostas[2][1]) == ['3']
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from predictfy import dados, quantis, rfm, snapshot
+from predictfy.config import ARQUIVO_CLIENTES, ARQUIVO_CLUSTERS, ARQUIVO_QUANTIS, COLUNA_CLUSTER
+
+@pytest.fixture
+def pasta(tmp_path):
+    rng = np.random.default_rng(2)
+    n = 600
+    pd.DataFrame({
+        'fk_contact': np.arange(n),
+        COLUNA_CLUSTER: rng.choice(['Pessoa - Potencial', 'Pessoa - Quase dormindo', 'Empresa - VIP'], n,
+                                   p=[0.5, 0.3, 0.2]),
+        'recency': rng.integers(0, 400, n),
+        'frequency': rng.integers(1, 20, n),
+        'monetary': rng.gamma(2.0, 300.0, n).round(2),
+    }).to_csv(tmp_path / ARQUIVO_CLIENTES, index=False)
+    clusters, esbocos = quantis.agregar_clientes(tmp_path / ARQUIVO_CLIENTES)
+    rfm.salvar_clusters(clusters, tmp_path / ARQUIVO_CLUSTERS)
+    quantis.salvar_esbocos(esbocos, tmp_path / ARQUIVO_QUANTIS)
+    return tmp_path
+
+def test_kpis_batem_com_o_cluster_csv(pasta):
+    snap = snapshot.obter_snapshot(pasta)
+    clientes = pd.read_csv(pasta / ARQUIVO_CLIENTES)
+    kpis = snap['kpis']
+
+    assert kpis['total_clientes'] == len(clientes)
+    assert kpis['total_pf'] == clientes[COLUNA_CLUSTER].str.startswith('Pessoa').sum()
+    assert kpis['ticket_medio_geral'] == pytest.approx(clientes['monetary'].mean())
+    assert kpis['quase_dormindo_qtd'] == (clientes[COLUNA_CLUSTER] == 'Pessoa - Quase dormindo').sum()
+    assert snap['vip_pj']['cluster'] == 'Empresa - VIP'
+    assert snap['tem_quantis'] and 'monetary_p90' in snap['df_pessoa']
+
+def test_snapshot_gravado_e_reaproveitado(pasta):
+    primeiro = snapshot.obter_snapshot(pasta)
+    assert snapshot.caminho_snapshot(pasta).exists()
+
+    def nao_carregar():
+        raise AssertionError("snapshot em disco deveria ser reaproveitado")
+
+    segundo = snapshot.obter_snapshot(pasta, carregar_clusters=nao_carregar)
+    assert segundo['versao_dados'] == primeiro['versao_dados']
+    pd.testing.assert_frame_equal(segundo['df_pessoa'], primeiro['df_pessoa'])
+
+def test_nova_versao_dos_dados_recalcula(pasta):
+    primeiro = snapshot.obter_snapshot(pasta)
+    # cluster.csv regravado sem os esboços (ex.: `python -m predictfy.rfm`)
+    clusters = pd.read_csv(pasta / ARQUIVO_CLUSTERS)
+    clusters.loc[0, 'Qtd'] += 10
+    rfm.salvar_clusters(clusters, pasta / ARQUIVO_CLUSTERS)
+
+    segundo = snapshot.obter_snapshot(pasta)
+    assert segundo['versao_dados'] != primeiro['versao_dados']
+    assert segundo['kpis']['total_clientes'] == primeiro['kpis']['total_clientes'] + 10
+    assert not segundo['tem_quantis'] and dados.ler_quantis(pasta) is None
+
+def test_formato_antigo_e_ignorado(pasta, monkeypatch):
+    snapshot.obter_snapshot(pasta)
+    monkeypatch.setattr(snapshot, 'VERSAO_FORMATO', snapshot.VERSAO_FORMATO + 1)
+    assert snapshot.ler_snapshot(pasta) is None
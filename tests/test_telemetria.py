@@ -0,0 +1,41 @@
+from predictfy import telemetria
+
+def test_histograma_cumulativo():
+    h = telemetria.Histograma('t_segundos', 'Teste.', (0.1, 1.0))
+    for valor in (0.05, 0.5, 0.7, 3.0):
+        h.observar('pf', valor)
+    texto = h.texto('secao')
+
+    assert 't_segundos_bucket{secao="pf",le="0.1"} 1' in texto
+    assert 't_segundos_bucket{secao="pf",le="1"} 3' in texto
+    assert 't_segundos_bucket{secao="pf",le="+Inf"} 4' in texto
+    assert 't_segundos_count{secao="pf"} 4' in texto
+
+def test_secoes_aninhadas_somam_bytes_na_de_fora():
+    metricas = telemetria.MetricasSecoes()
+    with telemetria.Secao('rerun', metricas, raiz=True) as rerun:
+        telemetria.enviados(10)
+        partes = telemetria.SecoesEmSequencia(metricas)
+        partes.iniciar('pf')
+        telemetria.enviados(100)
+        partes.iniciar('pj')
+        with telemetria.figura():
+            telemetria.enviados(1_000)
+        partes.encerrar()
+    telemetria.enviados(5)  # fora de qualquer seção: ignorado
+
+    assert rerun.bytes == 1_110
+    series = metricas.bytes._series
+    assert {s: soma for s, (_, soma) in series.items()} == {'pf': 100, 'pj': 1_000, 'rerun': 1_110}
+    assert rerun.figuras_s > 0
+
+def test_exportar_respeita_o_intervalo(tmp_path):
+    metricas = telemetria.MetricasSecoes()
+    metricas.registrar('pf', 0.2, 0.1, 500)
+    caminho = tmp_path / 'metricas.prom'
+    chamadas = []
+
+    assert metricas.exportar(caminho, intervalo=60, atualizar=lambda: chamadas.append(1))
+    assert not metricas.exportar(caminho, intervalo=60, atualizar=lambda: chamadas.append(1))
+    assert chamadas == [1]
+    assert 'predictfy_secao_bytes_sum{secao="pf"} 500' in caminho.read_text()